@@ -0,0 +1,135 @@
+"""
+Batch meta-tool for mcp-openapi-proxy.
+
+Adds a synthetic "batch_call" tool that takes a list of {tool, arguments} entries and runs
+them concurrently through the normal dispatcher, so independent lookups cost one MCP round
+trip instead of one each. Every entry goes through the same rate limiter, circuit breakers
+and load balancer as a direct call. A failing entry does not fail the others.
+Configuration is controlled via environment variables:
+- ENABLE_BATCH_TOOL: Set to "true" to register the batch_call tool (default: false).
+- BATCH_MAX_CONCURRENCY: Entries of one batch in flight at a time (default: 8).
+- BATCH_MAX_CALLS: Maximum entries accepted in one batch (default: 50).
+"""
+
+import os
+import asyncio
+from typing import Any, Awaitable, Callable, Collection, Dict, List, Optional
+
+from mcp import types
+
+from . import jsonlib
+from .logging_setup import logger
+
+BATCH_TOOL_NAME = "batch_call"
+
+Dispatch = Callable[[types.CallToolRequest], Awaitable[types.CallToolResult]]
+
+
+def _int_env(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw:
+        try:
+            return max(int(raw), 1)
+        except ValueError:
+            logger.warning(f"Invalid {name} env var: {raw}. Ignoring.")
+    return default
+
+
+def batch_enabled() -> bool:
+    return os.getenv("ENABLE_BATCH_TOOL", "false").lower() in ("true", "1", "yes")
+
+
+def batch_tool() -> types.Tool:
+    """The batch_call tool definition."""
+    max_calls = _int_env("BATCH_MAX_CALLS", 50)
+    return types.Tool(
+        name=BATCH_TOOL_NAME,
+        description=(
+            "Run several independent tool calls concurrently and return all results in one response. "
+            "Each entry names a tool and its arguments; entries that fail are reported individually."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "calls": {
+                    "type": "array",
+                    "description": f"Up to {max_calls} calls to run.",
+                    "maxItems": max_calls,
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "tool": {"type": "string", "description": "Name of the tool to call."},
+                            "arguments": {"type": "object", "description": "Arguments for the tool."},
+                        },
+                        "required": ["tool"],
+                    },
+                }
+            },
+            "required": ["calls"],
+        },
+    )
+
+
+def _content_value(content: Any) -> Any:
+    """Flatten one content item of a tool result for the batch response."""
+    if isinstance(content, types.TextContent):
+        try:
+            return jsonlib.loads(content.text)
+        except ValueError:
+            return content.text
+    return content.model_dump(exclude_none=True)
+
+
+def _error_result(message: str) -> types.CallToolResult:
+    return types.CallToolResult(content=[types.TextContent(type="text", text=message)], isError=True)
+
+
+async def run_batch(arguments: Dict[str, Any], dispatch: Dispatch,
+                    tool_names: Optional[Collection[str]] = None) -> types.CallToolResult:
+    """
+    Run the entries of a batch_call concurrently through dispatch and collect their results.
+    Entries naming a tool outside tool_names (when given) fail without being dispatched.
+    """
+    calls = arguments.get("calls")
+    if not isinstance(calls, list) or not calls:
+        return _error_result("batch_call requires a non-empty 'calls' array.")
+    max_calls = _int_env("BATCH_MAX_CALLS", 50)
+    if len(calls) > max_calls:
+        return _error_result(f"batch_call accepts at most {max_calls} calls, got {len(calls)}.")
+    semaphore = asyncio.Semaphore(_int_env("BATCH_MAX_CONCURRENCY", 8))
+
+    async def run_one(index: int, entry: Any) -> Dict[str, Any]:
+        item: Dict[str, Any] = {"index": index}
+        if not isinstance(entry, dict) or not isinstance(entry.get("tool"), str):
+            return {**item, "isError": True, "error": "Each entry needs a 'tool' name."}
+        item["tool"] = entry["tool"]
+        if entry["tool"] == BATCH_TOOL_NAME:
+            return {**item, "isError": True, "error": "batch_call cannot be nested."}
+        if tool_names is not None and entry["tool"] not in tool_names:
+            return {**item, "isError": True, "error": f"Unknown tool: {entry['tool']}"}
+        tool_arguments = entry.get("arguments") or {}
+        if not isinstance(tool_arguments, dict):
+            return {**item, "isError": True, "error": "'arguments' must be an object."}
+        request = types.CallToolRequest(
+            method="tools/call",
+            params=types.CallToolRequestParams(name=entry["tool"], arguments=tool_arguments),
+        )
+        async with semaphore:
+            try:
+                result = await dispatch(request)
+            except Exception as e:
+                logger.error(f"batch_call entry {index} ({entry['tool']}) raised: {e}", exc_info=True)
+                return {**item, "isError": True, "error": str(e)}
+        values = [_content_value(content) for content in result.content]
+        item["isError"] = bool(result.isError)
+        item["result"] = values[0] if len(values) == 1 else values
+        return item
+
+    results: List[Dict[str, Any]] = await asyncio.gather(*[run_one(i, entry) for i, entry in enumerate(calls)])
+    failed = sum(1 for item in results if item["isError"])
+    logger.debug(f"batch_call ran {len(results)} calls, {failed} failed")
+    summary = {"succeeded": len(results) - failed, "failed": failed, "results": results}
+    return types.CallToolResult(
+        content=[types.TextContent(type="text", text=jsonlib.dumps(summary))],
+        isError=failed == len(results),
+    )
@@ -0,0 +1,159 @@
+"""
+Per-upstream circuit breaker for mcp-openapi-proxy.
+
+Each base URL gets a breaker that moves between closed, open and half-open states.
+While a breaker is open, tool calls fail immediately instead of waiting on connect or
+read timeouts; after the probe interval a single call is let through to test recovery.
+Configuration is controlled via environment variables:
+- CIRCUIT_BREAKER_ENABLED: Set to "true" to enable circuit breaking (default: false).
+- CIRCUIT_BREAKER_FAILURE_THRESHOLD: Consecutive failures that open the circuit (default: 5).
+- CIRCUIT_BREAKER_ERROR_RATE: Failure ratio over the window that opens the circuit (default: 0.5).
+- CIRCUIT_BREAKER_WINDOW: Number of recent calls the error rate is computed over (default: 20).
+- CIRCUIT_BREAKER_MIN_CALLS: Calls required in the window before the error rate applies (default: 10).
+- CIRCUIT_BREAKER_PROBE_INTERVAL: Seconds an open circuit waits before a half-open probe (default: 30).
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from .logging_setup import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """Tracks call outcomes for one upstream and decides whether calls may proceed."""
+
+    def __init__(self, name: str, failure_threshold: int = 5, error_rate: float = 0.5, window: int = 20,
+                 min_calls: int = 10, probe_interval: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.error_rate = error_rate
+        self.min_calls = min_calls
+        self.probe_interval = probe_interval
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started_at: Optional[float] = None
+        self._outcomes: Deque[bool] = deque(maxlen=max(window, 1))
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Return True if a call may be sent now. In half-open state only one probe is admitted."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if now - self.opened_at < self.probe_interval:
+                    return False
+                logger.info(f"Circuit for {self.name} half-open; sending probe request")
+                self.state = HALF_OPEN
+                self.probe_started_at = now
+                return True
+            # Half-open: a probe is in flight. Admit another only if it went stale.
+            if self.probe_started_at is not None and now - self.probe_started_at < self.probe_interval:
+                return False
+            self.probe_started_at = now
+            return True
+
+    def retry_in(self) -> float:
+        """Seconds until the next probe will be admitted."""
+        reference = self.probe_started_at if self.state == HALF_OPEN and self.probe_started_at else self.opened_at
+        return max(0.0, reference + self.probe_interval - time.monotonic())
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._outcomes.append(True)
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                logger.info(f"Circuit for {self.name} closed after successful probe")
+                self.state = CLOSED
+                self.probe_started_at = None
+                self._outcomes.clear()
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._outcomes.append(False)
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN:
+                self._open("probe failed")
+                return
+            if self.state == OPEN:
+                return
+            if self.consecutive_failures >= self.failure_threshold:
+                self._open(f"{self.consecutive_failures} consecutive failures")
+                return
+            failures = self._outcomes.count(False)
+            if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.error_rate:
+                self._open(f"error rate {failures}/{len(self._outcomes)}")
+
+    def _open(self, reason: str) -> None:
+        logger.warning(f"Circuit for {self.name} opened: {reason}")
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        self.probe_started_at = None
+
+
+class CircuitBreakerRegistry:
+    """Holds one CircuitBreaker per upstream base URL."""
+
+    def __init__(self, enabled: bool = False, **breaker_kwargs):
+        self.enabled = enabled
+        self.breaker_kwargs = breaker_kwargs
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreakerRegistry":
+        enabled = os.getenv("CIRCUIT_BREAKER_ENABLED", "false").lower() in ("true", "1", "yes")
+        settings = {
+            "failure_threshold": ("CIRCUIT_BREAKER_FAILURE_THRESHOLD", int, 5),
+            "error_rate": ("CIRCUIT_BREAKER_ERROR_RATE", float, 0.5),
+            "window": ("CIRCUIT_BREAKER_WINDOW", int, 20),
+            "min_calls": ("CIRCUIT_BREAKER_MIN_CALLS", int, 10),
+            "probe_interval": ("CIRCUIT_BREAKER_PROBE_INTERVAL", float, 30.0),
+        }
+        kwargs = {}
+        for key, (env_name, cast, default) in settings.items():
+            raw = os.getenv(env_name)
+            kwargs[key] = default
+            if raw:
+                try:
+                    kwargs[key] = cast(raw)
+                except ValueError:
+                    logger.warning(f"Invalid {env_name} env var: {raw}. Ignoring.")
+        return cls(enabled, **kwargs)
+
+    def get(self, base_url: str) -> Optional[CircuitBreaker]:
+        """Return the breaker for base_url, or None when circuit breaking is disabled."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            breaker = self._breakers.get(base_url)
+            if breaker is None:
+                breaker = CircuitBreaker(base_url, **self.breaker_kwargs)
+                self._breakers[base_url] = breaker
+            return breaker
+
+
+_registry: Optional[CircuitBreakerRegistry] = None
+
+
+def get_circuit_breakers() -> CircuitBreakerRegistry:
+    """Return the process-wide breaker registry, building it from the environment on first use."""
+    global _registry
+    if _registry is None:
+        _registry = CircuitBreakerRegistry.from_env()
+    return _registry
+
+
+def reset_circuit_breakers() -> None:
+    """Drop the process-wide breaker registry so it is rebuilt from the environment."""
+    global _registry
+    _registry = None
@@ -0,0 +1,92 @@
+"""
+Response compaction for mcp-openapi-proxy.
+
+Removes what carries no information for the caller from a decoded JSON response: null
+values, empty objects and arrays, boilerplate keys such as `_links` or `created_by`, and
+structure nested beyond a depth. Everything happens in one pass over the object.
+Configuration is controlled via environment variables:
+- RESPONSE_COMPACT: Set to "true" to compact JSON responses (default: false).
+- RESPONSE_COMPACT_DROP_KEYS: Comma-separated key names or patterns removed at any depth,
+  e.g. "_links,url,*_url,created_by" (default: none).
+- RESPONSE_COMPACT_MAX_DEPTH: Objects and arrays nested deeper than this are replaced by a
+  short placeholder such as "{5 keys}" (default: 0, no limit).
+"""
+
+from fnmatch import fnmatchcase
+from typing import Any, Dict, FrozenSet, Tuple
+
+from . import metrics
+from .logging_setup import logger
+from .utils import getenv
+
+
+def compaction_enabled() -> bool:
+    return (getenv("RESPONSE_COMPACT") or "false").lower() in ("true", "1", "yes")
+
+
+class Compactor:
+    """One-pass compaction of decoded JSON."""
+
+    def __init__(self, drop_keys: Tuple[str, ...] = (), max_depth: int = 0):
+        self.exact: FrozenSet[str] = frozenset(k for k in drop_keys if not any(c in k for c in "*?["))
+        self.patterns = tuple(k for k in drop_keys if k not in self.exact)
+        self.max_depth = max_depth
+        # Responses repeat the same keys many times; remember each decision.
+        self._decisions: Dict[str, bool] = {}
+        self.keys_dropped = 0
+        self.values_dropped = 0
+        self.containers_elided = 0
+
+    @classmethod
+    def from_env(cls) -> "Compactor":
+        drop_keys = tuple(k.strip() for k in (getenv("RESPONSE_COMPACT_DROP_KEYS") or "").split(",") if k.strip())
+        max_depth = 0
+        raw = getenv("RESPONSE_COMPACT_MAX_DEPTH")
+        if raw:
+            try:
+                max_depth = max(int(raw), 0)
+            except ValueError:
+                logger.warning(f"Invalid RESPONSE_COMPACT_MAX_DEPTH env var: {raw}. Ignoring.")
+        return cls(drop_keys, max_depth)
+
+    def _drop(self, key: str) -> bool:
+        decision = self._decisions.get(key)
+        if decision is None:
+            decision = key in self.exact or any(fnmatchcase(key, p) for p in self.patterns)
+            self._decisions[key] = decision
+        return decision
+
+    def compact(self, value: Any, depth: int = 0) -> Any:
+        """
+        Return a compacted copy of value. Nulls and empty containers are removed from
+        objects only; array elements are kept so positions stay meaningful.
+        """
+        if isinstance(value, dict):
+            if self.max_depth and depth >= self.max_depth and value:
+                self.containers_elided += 1
+                return f"{{{len(value)} keys}}"
+            out = {}
+            for key, item in value.items():
+                if self._drop(key):
+                    self.keys_dropped += 1
+                    continue
+                if isinstance(item, (dict, list)):
+                    item = self.compact(item, depth + 1)
+                if item is None or item == {} or item == []:
+                    self.values_dropped += 1
+                    continue
+                out[key] = item
+            return out
+        if isinstance(value, list):
+            if self.max_depth and depth >= self.max_depth and value:
+                self.containers_elided += 1
+                return f"[{len(value)} items]"
+            return [self.compact(item, depth + 1) if isinstance(item, (dict, list)) else item for item in value]
+        return value
+
+    def record(self) -> None:
+        """Add this compaction's counts to the process-wide counters."""
+        metrics.increment("compaction.responses")
+        metrics.increment("compaction.keys_dropped", self.keys_dropped)
+        metrics.increment("compaction.values_dropped", self.values_dropped)
+        metrics.increment("compaction.containers_elided", self.containers_elided)
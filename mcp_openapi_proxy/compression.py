@@ -0,0 +1,117 @@
+"""
+Request and response compression for mcp-openapi-proxy.
+
+Upstream requests advertise every content coding the proxy can decode (gzip and deflate
+always, br with 'brotli' and zstd with 'zstandard' installed). Both upstream clients decode
+the body chunk by chunk as it is read, so compressed responses are never buffered whole.
+Large JSON request bodies can be gzip-compressed for APIs that accept Content-Encoding.
+Configuration is controlled via environment variables:
+- REQUEST_COMPRESSION_TOOLS: Comma-separated tool name patterns whose JSON bodies are sent
+  gzip-compressed, e.g. "bulk_*,post_upload" or "*" for all tools (default: none).
+- REQUEST_COMPRESSION_MIN_BYTES: Smallest serialized body that is compressed (default: 1024).
+- REQUEST_COMPRESSION_LEVEL: gzip compression level, 1-9 (default: 6).
+"""
+
+import os
+import gzip
+from fnmatch import fnmatchcase
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import jsonlib, metrics
+from .logging_setup import logger
+
+
+def available_encodings() -> List[str]:
+    """Content codings the installed decoders can handle, in order of preference."""
+    encodings = ["gzip", "deflate"]
+    try:
+        import brotli  # noqa: F401
+        encodings.append("br")
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            encodings.append("br")
+        except ImportError:
+            pass
+    try:
+        import zstandard  # noqa: F401
+        encodings.append("zstd")
+    except ImportError:
+        pass
+    return encodings
+
+
+_accept_encoding: Optional[str] = None
+
+
+def accept_encoding() -> str:
+    """Value of the Accept-Encoding header sent upstream."""
+    global _accept_encoding
+    if _accept_encoding is None:
+        _accept_encoding = ", ".join(available_encodings())
+        logger.debug(f"Upstream Accept-Encoding: {_accept_encoding}")
+    return _accept_encoding
+
+
+class RequestCompression:
+    """Decides, per tool, whether a JSON request body is sent gzip-compressed."""
+
+    def __init__(self, tool_patterns: Optional[List[str]] = None, min_bytes: int = 1024, level: int = 6):
+        self.tool_patterns = list(tool_patterns or [])
+        self.min_bytes = min_bytes
+        self.level = level
+
+    @classmethod
+    def from_env(cls) -> "RequestCompression":
+        patterns = [p.strip() for p in os.getenv("REQUEST_COMPRESSION_TOOLS", "").split(",") if p.strip()]
+        min_bytes = 1024
+        raw = os.getenv("REQUEST_COMPRESSION_MIN_BYTES")
+        if raw:
+            try:
+                min_bytes = int(raw)
+            except ValueError:
+                logger.warning(f"Invalid REQUEST_COMPRESSION_MIN_BYTES env var: {raw}. Ignoring.")
+        level = 6
+        raw = os.getenv("REQUEST_COMPRESSION_LEVEL")
+        if raw:
+            try:
+                level = min(max(int(raw), 1), 9)
+            except ValueError:
+                logger.warning(f"Invalid REQUEST_COMPRESSION_LEVEL env var: {raw}. Ignoring.")
+        return cls(patterns, min_bytes, level)
+
+    def applies(self, tool_name: str) -> bool:
+        return any(fnmatchcase(tool_name, pattern) for pattern in self.tool_patterns)
+
+    def encode(self, tool_name: str, headers: Dict[str, str], body: Any) -> Tuple[Dict[str, str], Optional[bytes]]:
+        """
+        Return the headers and pre-encoded body to send for tool_name.
+        The body is None when it should be sent as plain JSON by the client.
+        """
+        if body is None or not self.applies(tool_name):
+            return headers, None
+        raw = jsonlib.dumps(body).encode("utf-8")
+        if len(raw) < self.min_bytes:
+            return headers, None
+        data = gzip.compress(raw, compresslevel=self.level)
+        metrics.increment("upstream.request_bytes_uncompressed", len(raw))
+        metrics.increment("upstream.request_bytes_compressed", len(data))
+        logger.debug(f"Compressed request body for {tool_name}: {len(raw)} -> {len(data)} bytes")
+        headers = {**headers, "Content-Type": "application/json", "Content-Encoding": "gzip"}
+        return headers, data
+
+
+_compression: Optional[RequestCompression] = None
+
+
+def get_request_compression() -> RequestCompression:
+    global _compression
+    if _compression is None:
+        _compression = RequestCompression.from_env()
+    return _compression
+
+
+def reset_request_compression() -> None:
+    global _compression, _accept_encoding
+    _compression = None
+    _accept_encoding = None
@@ -0,0 +1,131 @@
+"""
+Multi-spec federation for mcp-openapi-proxy.
+
+Serves several OpenAPI specs from one proxy process. Each spec carries its own settings
+(API_KEY, EXTRA_HEADERS, TOOL_WHITELIST, TOOL_NAME_PREFIX, SERVER_URL_OVERRIDE, ...) as an
+overlay of the usual environment variables. The overlay applies while the spec is fetched,
+while its tools are registered and while its tools are called. All specs share the process's
+event loop and upstream machinery (rate limiter, circuit breakers, load balancer).
+Configuration is controlled via environment variables:
+- OPENAPI_SPECS_CONFIG: Path to a JSON file, or inline JSON, listing the specs to serve, e.g.
+  {"specs": [{"name": "slack", "spec_url": "https://...", "env": {"API_KEY": "${SLACK_TOKEN}"}}]}
+  Values in "env" undergo ${VAR} expansion. TOOL_NAME_PREFIX defaults to "<name>_".
+"""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from mcp import types
+
+from .logging_setup import logger
+from .utils import fetch_openapi_spec, spec_settings
+
+
+class FederatedSpec:
+    """One spec served by a federated proxy, with its setting overlay."""
+
+    def __init__(self, name: str, spec_url: str, env: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.spec_url = spec_url
+        self.env = dict(env or {})
+        self.env.setdefault("TOOL_NAME_PREFIX", f"{name}_")
+        self.spec_data: Optional[Dict[str, Any]] = None
+
+    @contextmanager
+    def activate(self) -> Iterator[None]:
+        """Apply this spec's settings for the duration of the block."""
+        with spec_settings(self.env):
+            yield
+
+    def __repr__(self) -> str:
+        return f"FederatedSpec(name={self.name!r}, spec_url={self.spec_url!r})"
+
+
+# Tool name -> spec serving it, filled by register_federated_functions.
+tool_specs: Dict[str, FederatedSpec] = {}
+
+
+def load_specs_config(raw: str) -> List[FederatedSpec]:
+    """Parse OPENAPI_SPECS_CONFIG, given either as a file path or as inline JSON."""
+    text = raw
+    if not raw.lstrip().startswith(("{", "[")):
+        path = raw[7:] if raw.startswith("file://") else raw
+        with open(path, "r") as f:
+            text = f.read()
+    config = json.loads(text)
+    entries = config.get("specs", []) if isinstance(config, dict) else config
+    specs: List[FederatedSpec] = []
+    for index, entry in enumerate(entries):
+        if not isinstance(entry, dict) or not entry.get("spec_url"):
+            logger.warning(f"Skipping federated spec entry {index}: 'spec_url' is required.")
+            continue
+        name = str(entry.get("name") or f"spec{index}")
+        env = {str(k): os.path.expandvars(str(v)) for k, v in (entry.get("env") or {}).items()}
+        specs.append(FederatedSpec(name, entry["spec_url"], env))
+    names = [spec.name for spec in specs]
+    duplicates = {name for name in names if names.count(name) > 1}
+    if duplicates:
+        raise ValueError(f"Duplicate federated spec names: {sorted(duplicates)}")
+    return specs
+
+
+def _fetch(spec: FederatedSpec) -> FederatedSpec:
+    with spec.activate():
+        spec.spec_data = fetch_openapi_spec(spec.spec_url)
+    return spec
+
+
+def fetch_specs(specs: List[FederatedSpec]) -> List[FederatedSpec]:
+    """Fetch all specs concurrently. Specs that fail to load are logged and dropped."""
+    if not specs:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(specs), 16), thread_name_prefix="spec-fetch") as pool:
+        fetched = list(pool.map(_fetch, specs))
+    loaded = []
+    for spec in fetched:
+        if spec.spec_data:
+            loaded.append(spec)
+        else:
+            logger.error(f"Failed to fetch or parse federated spec '{spec.name}' from {spec.spec_url}")
+    return loaded
+
+
+def register_federated_functions(specs: List[FederatedSpec]) -> List[types.Tool]:
+    """
+    Register the tools of every spec into one namespace.
+
+    Each spec is registered under its own settings; on a tool name clash the first spec wins.
+    The combined tools and call plans replace those of the low-level server.
+    """
+    from . import openapi, server_lowlevel
+
+    combined_tools: List[types.Tool] = []
+    combined_plans: Dict[str, Dict] = {}
+    tool_specs.clear()
+    for spec in specs:
+        with spec.activate():
+            spec_tools = openapi.register_functions(spec.spec_data or {})
+        for tool in spec_tools:
+            if tool.name in tool_specs:
+                logger.warning(
+                    f"Skipping tool '{tool.name}' from spec '{spec.name}': already provided by "
+                    f"'{tool_specs[tool.name].name}'."
+                )
+                continue
+            combined_tools.append(tool)
+            combined_plans[tool.name] = openapi.operation_plans[tool.name]
+            tool_specs[tool.name] = spec
+        logger.info(f"Registered {len(spec_tools)} tools from federated spec '{spec.name}'.")
+    openapi.operation_plans.clear()
+    openapi.operation_plans.update(combined_plans)
+    server_lowlevel.tools.clear()
+    server_lowlevel.tools.extend(combined_tools)
+    return combined_tools
+
+
+def spec_for_tool(tool_name: str) -> Optional[FederatedSpec]:
+    """Return the federated spec serving tool_name, or None outside federated mode."""
+    return tool_specs.get(tool_name)
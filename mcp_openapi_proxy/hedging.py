@@ -0,0 +1,171 @@
+"""
+Hedged requests for idempotent GET tool calls.
+
+When a GET has not answered within the hedge delay, a second identical request is sent,
+to another replica when one is available. The first successful response wins; the other
+attempt runs to completion in the background and its response is closed, releasing its
+connection. The delay is either fixed or the p95 of the tool's primary attempts, including
+those that lost to a hedge.
+Configuration is controlled via environment variables:
+- HEDGE_ENABLED: Set to "true" to enable hedging of GET calls (default: false).
+- HEDGE_DELAY_MS: Fixed hedge delay in milliseconds (default: use the tool's observed p95).
+- HEDGE_MIN_SAMPLES: Latency samples a tool needs before its p95 is trusted (default: 20).
+- HEDGE_MAX_RATIO: Maximum fraction of GET calls that may be hedged (default: 0.1).
+"""
+
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from .logging_setup import logger
+from .upstream import choose_base_url, UpstreamUnavailable
+
+
+class LatencyTracker:
+    """Keeps a sliding window of recent latencies per tool."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tool_name: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(tool_name)
+            if samples is None:
+                samples = self._samples[tool_name] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, tool_name: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Return the q-th percentile (0-100) latency, or None with fewer than min_samples samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(tool_name, ()))
+        if not samples or len(samples) < min_samples:
+            return None
+        index = min(len(samples) - 1, int(round(q / 100.0 * (len(samples) - 1))))
+        return samples[index]
+
+
+class Hedger:
+    """Decides when to hedge and enforces the hedged-call budget."""
+
+    def __init__(self, enabled: bool = False, delay: Optional[float] = None, min_samples: int = 20,
+                 max_ratio: float = 0.1):
+        self.enabled = enabled
+        self.delay = delay
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.latencies = LatencyTracker()
+        self.calls = 0
+        self.hedged = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "Hedger":
+        enabled = os.getenv("HEDGE_ENABLED", "false").lower() in ("true", "1", "yes")
+        kwargs: Dict[str, Any] = {}
+        for key, env_name, cast in (
+            ("delay", "HEDGE_DELAY_MS", lambda v: float(v) / 1000.0),
+            ("min_samples", "HEDGE_MIN_SAMPLES", int),
+            ("max_ratio", "HEDGE_MAX_RATIO", float),
+        ):
+            raw = os.getenv(env_name)
+            if raw:
+                try:
+                    kwargs[key] = cast(raw)
+                except ValueError:
+                    logger.warning(f"Invalid {env_name} env var: {raw}. Ignoring.")
+        return cls(enabled, **kwargs)
+
+    def delay_for(self, tool_name: str) -> Optional[float]:
+        """Return the hedge delay for tool_name, or None if the call should not be hedged."""
+        if not self.enabled:
+            return None
+        if self.delay is not None:
+            return self.delay
+        return self.latencies.percentile(tool_name, 95, self.min_samples)
+
+    def count_call(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def allow_hedge(self) -> bool:
+        with self._lock:
+            if self.hedged + 1 > self.max_ratio * self.calls:
+                return False
+            self.hedged += 1
+            return True
+
+
+async def hedged_send(tool_name: str, base_url: str, base_urls: List[str],
+                      send_to: Callable[[str], Awaitable[Any]]) -> Any:
+    """
+    Run send_to(base_url), hedging with a second attempt if it is slow.
+
+    Cancelling an attempt would not stop its worker thread, only lose its response, so the
+    losing attempt is left to finish and its response is closed when it arrives. Every
+    successful primary attempt is recorded, so slow primaries keep the hedge delay honest.
+    """
+    hedger = get_hedger()
+    if not hedger.enabled:
+        return await send_to(base_url)
+    hedger.count_call()
+    started = time.monotonic()
+    delay = hedger.delay_for(tool_name)
+    primary = asyncio.ensure_future(send_to(base_url))
+    attempts = [primary]
+    winner: Optional[asyncio.Future] = None
+
+    def settle(task: asyncio.Future) -> None:
+        if task.cancelled() or task.exception() is not None:
+            return
+        if task is primary:
+            hedger.latencies.record(tool_name, time.monotonic() - started)
+        if task is not winner:
+            close = getattr(task.result(), "close", None)
+            if close is not None:
+                close()
+
+    try:
+        if delay is not None:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if not done and hedger.allow_hedge():
+                try:
+                    backup_url = choose_base_url(base_urls, exclude=[base_url]) or base_url
+                except UpstreamUnavailable:
+                    backup_url = base_url
+                logger.debug(f"Hedging {tool_name} after {delay:.3f}s against {backup_url}")
+                attempts.append(asyncio.ensure_future(send_to(backup_url)))
+        pending = set(attempts)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = task
+                    return task.result()
+        # Every attempt failed: surface the primary's error.
+        return primary.result()
+    finally:
+        for task in attempts:
+            # Runs at once for attempts already done, else when the attempt finishes.
+            task.add_done_callback(settle)
+
+
+_hedger: Optional[Hedger] = None
+
+
+def get_hedger() -> Hedger:
+    """Return the process-wide hedger, building it from the environment on first use."""
+    global _hedger
+    if _hedger is None:
+        _hedger = Hedger.from_env()
+    return _hedger
+
+
+def reset_hedger() -> None:
+    """Drop the process-wide hedger so it is rebuilt from the environment."""
+    global _hedger
+    _hedger = None
@@ -0,0 +1,116 @@
+"""
+JSON backend for mcp-openapi-proxy.
+
+Every hot JSON path of the proxy (spec parsing, response decoding and re-encoding, request
+bodies, the spec resource) goes through loads/dumps here. Decoding uses orjson when it is
+installed, then ujson, and falls back to the standard library; values a fast backend
+cannot handle (integers beyond 64 bits, NaN literals) are retried with the standard library.
+By default the output is exactly that of json.dumps, whatever the backend, so encoding stays
+on the standard library. With JSON_COMPACT the fast backend also encodes, and the output
+changes on every backend alike: no spaces after separators, non-ASCII characters written
+as UTF-8 rather than escaped, and NaN and Infinity written as null.
+Configuration is controlled via environment variables:
+- JSON_BACKEND: "auto" (default), "orjson", "ujson" or "stdlib".
+- JSON_COMPACT: "true" to encode compact JSON with the fast backend (default: false).
+"""
+
+import os
+import json
+import math
+from typing import Any, Callable, Optional, Tuple, Union
+
+from .logging_setup import logger
+
+JSONDecodeError = json.JSONDecodeError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is not installed
+    orjson = None
+
+try:
+    import ujson
+except ImportError:  # pragma: no cover - exercised when ujson is not installed
+    ujson = None
+
+
+def _finite(value: Any) -> Any:
+    """value with NaN and infinite floats replaced by None, as orjson writes them."""
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def _stdlib_dumps(value: Any, indent: Optional[int]) -> str:
+    """The compact format, with the standard library."""
+    separators = (",", ":") if indent is None else (",", ": ")
+    try:
+        return json.dumps(value, indent=indent, separators=separators, ensure_ascii=False, allow_nan=False)
+    except ValueError:
+        return json.dumps(_finite(value), indent=indent, separators=separators, ensure_ascii=False)
+
+
+def _backend_functions(name: str) -> Tuple[str, Callable[[Union[str, bytes]], Any], Callable[[Any, Optional[int]], str]]:
+    if name in ("auto", "orjson") and orjson is not None:
+        options = orjson.OPT_NON_STR_KEYS
+
+        def orjson_dumps(value: Any, indent: Optional[int]) -> str:
+            if indent not in (None, 2):
+                return _stdlib_dumps(value, indent)
+            option = options | orjson.OPT_INDENT_2 if indent == 2 else options
+            return orjson.dumps(value, option=option).decode("utf-8")
+
+        return "orjson", orjson.loads, orjson_dumps
+    if name in ("auto", "ujson") and ujson is not None:
+        def ujson_dumps(value: Any, indent: Optional[int]) -> str:
+            if indent is not None:
+                return _stdlib_dumps(value, indent)
+            # ujson raises OverflowError for NaN, leaving it to the standard library.
+            return ujson.dumps(value, ensure_ascii=False, escape_forward_slashes=False)
+
+        return "ujson", ujson.loads, ujson_dumps
+    if name not in ("auto", "stdlib"):
+        logger.warning(f"JSON_BACKEND {name} is not installed; using the standard library.")
+    return "stdlib", json.loads, _stdlib_dumps
+
+
+BACKEND, _loads, _dumps = _backend_functions(os.getenv("JSON_BACKEND", "auto").lower())
+COMPACT = os.getenv("JSON_COMPACT", "false").lower() in ("true", "1", "yes")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON text or UTF-8 bytes. Raises JSONDecodeError (a ValueError) if invalid."""
+    if BACKEND == "stdlib":
+        return json.loads(data)
+    try:
+        return _loads(data)
+    except (ValueError, OverflowError):
+        # Let the standard library decide: it accepts NaN and big integers, and raises the
+        # usual JSONDecodeError for text that is not JSON.
+        return json.loads(data)
+
+
+def dumps(value: Any, indent: Optional[int] = None) -> str:
+    """Encode value as JSON text: as json.dumps does, or in the compact format with JSON_COMPACT."""
+    if not COMPACT:
+        return json.dumps(value, indent=indent)
+    if BACKEND == "stdlib":
+        return _stdlib_dumps(value, indent)
+    try:
+        return _dumps(value, indent)
+    except (TypeError, ValueError, OverflowError):
+        return _stdlib_dumps(value, indent)
+
+
+def dumps_bytes(value: Any) -> bytes:
+    """Encode value as UTF-8 JSON, for request bodies."""
+    if COMPACT and BACKEND == "orjson":
+        try:
+            return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return dumps(value).encode("utf-8")
@@ -0,0 +1,89 @@
+"""
+Cursor pagination of tools/list, resources/list and prompts/list for mcp-openapi-proxy.
+
+Specs with thousands of operations make one tools/list result several megabytes, more than
+some clients accept. With a page size set, each list request returns one page and an opaque
+nextCursor for the next. A cursor names a position in one version of the list, identified
+by a hash of the item names, so pages stay consistent while the registry is unchanged; a
+cursor from an earlier version is rejected as invalid and the client starts over. Resources
+created by tool calls (spilled responses, summaries) are listed after the static ones and
+left out of the version, so a call made while a client walks the pages does not void its cursor.
+Configuration is controlled via environment variables:
+- LIST_PAGE_SIZE: Items per page of tools, resources and prompts (default: 0, everything in
+  one page).
+"""
+
+import base64
+import hashlib
+import binascii
+from typing import Any, List, Optional, Sequence, Tuple
+
+from mcp import types
+from mcp.shared.exceptions import McpError
+
+from .logging_setup import logger
+from .utils import getenv
+
+
+def page_size() -> int:
+    raw = getenv("LIST_PAGE_SIZE")
+    if raw:
+        try:
+            return max(int(raw), 0)
+        except ValueError:
+            logger.warning(f"Invalid LIST_PAGE_SIZE env var: {raw}. Ignoring.")
+    return 0
+
+
+def registry_version(items: Sequence[Any]) -> str:
+    """A short hash of the item names, in order."""
+    digest = hashlib.sha256("\n".join(str(getattr(item, "name", item)) for item in items).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def encode_cursor(kind: str, version: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{kind}:{version}:{offset}".encode("ascii")).decode("ascii")
+
+
+def _invalid(cursor: str, reason: str) -> McpError:
+    logger.debug(f"Rejected list cursor {cursor}: {reason}")
+    return McpError(types.ErrorData(code=types.INVALID_PARAMS, message=f"Invalid cursor: {reason}"))
+
+
+def decode_cursor(cursor: str, kind: str, version: str) -> int:
+    """The offset a cursor points to. Raises McpError (invalid params) for a foreign or stale cursor."""
+    try:
+        cursor_kind, cursor_version, offset = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii").split(":")
+        position = int(offset)
+    except (ValueError, UnicodeError, binascii.Error):
+        raise _invalid(cursor, "malformed") from None
+    if cursor_kind != kind or position < 0:
+        raise _invalid(cursor, f"not a {kind} cursor")
+    if cursor_version != version:
+        raise _invalid(cursor, f"the {kind} list has changed; list again from the start")
+    return position
+
+
+def request_cursor(request: Any) -> Optional[str]:
+    """The cursor of a list request, if any."""
+    return getattr(getattr(request, "params", None), "cursor", None)
+
+
+def paginate_list(
+    items: List[Any], cursor: Optional[str], kind: str, stable: Optional[int] = None
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Return the page of items a list request asks for and the cursor of the next page, if any.
+
+    Only the first `stable` items (default: all) make up the version; items after them may
+    come and go between pages without invalidating cursors.
+    """
+    size = page_size()
+    if size <= 0 and cursor is None:
+        return items, None
+    version = registry_version(items if stable is None else items[:stable])
+    start = decode_cursor(cursor, kind, version) if cursor is not None else 0
+    if size <= 0:
+        return items[start:], None
+    end = start + size
+    return items[start:end], encode_cursor(kind, version, end) if end < len(items) else None
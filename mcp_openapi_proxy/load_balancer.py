@@ -0,0 +1,141 @@
+"""
+Load balancing across multiple upstream base URLs.
+
+Candidates come from a comma-separated SERVER_URL_OVERRIDE or from every entry in the
+spec's 'servers' list. Endpoints that keep failing are passively ejected for a while.
+Configuration is controlled via environment variables:
+- LOAD_BALANCER_STRATEGY: "first" (default, always the first URL), "round_robin",
+  "least_outstanding" or "ewma" (EWMA latency weighted by outstanding requests).
+- LOAD_BALANCER_EJECT_FAILURES: Consecutive failures that eject an endpoint (default: 3).
+- LOAD_BALANCER_EJECT_SECONDS: How long an ejected endpoint is skipped (default: 30).
+- LOAD_BALANCER_EWMA_DECAY: Weight of the newest latency sample in the EWMA (default: 0.3).
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from .logging_setup import logger
+
+STRATEGIES = ("first", "round_robin", "least_outstanding", "ewma")
+
+
+class Endpoint:
+    """Passive health and load statistics for one base URL."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+
+    def is_ejected(self, now: float) -> bool:
+        return now < self.ejected_until
+
+
+class LoadBalancer:
+    """Picks a base URL per call and records how each endpoint performed."""
+
+    def __init__(self, strategy: str = "first", eject_failures: int = 3, eject_seconds: float = 30.0,
+                 ewma_decay: float = 0.3):
+        if strategy not in STRATEGIES:
+            logger.warning(f"Unknown LOAD_BALANCER_STRATEGY '{strategy}', using 'first'.")
+            strategy = "first"
+        self.strategy = strategy
+        self.eject_failures = eject_failures
+        self.eject_seconds = eject_seconds
+        self.ewma_decay = ewma_decay
+        self._endpoints: Dict[str, Endpoint] = {}
+        self._cursor = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "LoadBalancer":
+        strategy = os.getenv("LOAD_BALANCER_STRATEGY", "first").strip().lower() or "first"
+        kwargs = {}
+        for key, env_name, cast in (
+            ("eject_failures", "LOAD_BALANCER_EJECT_FAILURES", int),
+            ("eject_seconds", "LOAD_BALANCER_EJECT_SECONDS", float),
+            ("ewma_decay", "LOAD_BALANCER_EWMA_DECAY", float),
+        ):
+            raw = os.getenv(env_name)
+            if raw:
+                try:
+                    kwargs[key] = cast(raw)
+                except ValueError:
+                    logger.warning(f"Invalid {env_name} env var: {raw}. Ignoring.")
+        return cls(strategy, **kwargs)
+
+    def endpoint(self, url: str) -> Endpoint:
+        with self._lock:
+            endpoint = self._endpoints.get(url)
+            if endpoint is None:
+                endpoint = self._endpoints[url] = Endpoint(url)
+            return endpoint
+
+    def choose(self, urls: List[str], exclude: Iterable[str] = ()) -> Optional[str]:
+        """Pick one of urls, skipping excluded and (if possible) ejected endpoints."""
+        excluded = set(exclude)
+        candidates = [url for url in urls if url not in excluded]
+        if not candidates:
+            return None
+        if self.strategy == "first" or len(candidates) == 1:
+            return candidates[0]
+        now = time.monotonic()
+        endpoints = [self.endpoint(url) for url in candidates]
+        healthy = [e for e in endpoints if not e.is_ejected(now)]
+        if not healthy:
+            # Everything is ejected: fail open on the endpoint that comes back first.
+            return min(endpoints, key=lambda e: e.ejected_until).url
+        with self._lock:
+            if self.strategy == "round_robin":
+                self._cursor += 1
+                return healthy[self._cursor % len(healthy)].url
+            if self.strategy == "least_outstanding":
+                return min(healthy, key=lambda e: e.outstanding).url
+            # ewma: endpoints without samples score zero so they get probed first.
+            return min(healthy, key=lambda e: (e.ewma_latency or 0.0) * (e.outstanding + 1)).url
+
+    def start(self, url: str) -> None:
+        endpoint = self.endpoint(url)
+        with self._lock:
+            endpoint.outstanding += 1
+
+    def finish(self, url: str, latency: float, ok: Optional[bool]) -> None:
+        """Record a finished call. ok=None means the call never reached the upstream."""
+        endpoint = self.endpoint(url)
+        with self._lock:
+            endpoint.outstanding = max(0, endpoint.outstanding - 1)
+            if ok is None:
+                return
+            if endpoint.ewma_latency is None:
+                endpoint.ewma_latency = latency
+            else:
+                endpoint.ewma_latency += self.ewma_decay * (latency - endpoint.ewma_latency)
+            if ok:
+                endpoint.consecutive_failures = 0
+                return
+            endpoint.consecutive_failures += 1
+            if self.strategy != "first" and endpoint.consecutive_failures >= self.eject_failures:
+                endpoint.ejected_until = time.monotonic() + self.eject_seconds
+                endpoint.consecutive_failures = 0
+                logger.warning(f"Ejecting upstream {url} for {self.eject_seconds:.0f}s after repeated failures")
+
+
+_load_balancer: Optional[LoadBalancer] = None
+
+
+def get_load_balancer() -> LoadBalancer:
+    """Return the process-wide load balancer, building it from the environment on first use."""
+    global _load_balancer
+    if _load_balancer is None:
+        _load_balancer = LoadBalancer.from_env()
+    return _load_balancer
+
+
+def reset_load_balancer() -> None:
+    """Drop the process-wide load balancer so it is rebuilt from the environment."""
+    global _load_balancer
+    _load_balancer = None
@@ -0,0 +1,249 @@
+"""
+XML and HTML condensing for mcp-openapi-proxy.
+
+Markup responses are passed through raw by default, tags and all. With condensing on, they
+are parsed incrementally while the body streams in, without building a document tree:
+XML becomes JSON (attributes as "@name", repeated elements as lists, text as "#text" next
+to attributes or children), and HTML becomes readable text with scripts, styles and other
+non-content elements dropped. Parsing stops once the output reaches the size budget, so
+the rest of a large body is never read.
+Configuration is controlled via environment variables:
+- RESPONSE_CONDENSE_MARKUP: Set to "true" to condense XML and HTML responses (default: false).
+- RESPONSE_CONDENSE_MAX_CHARS: Output size at which condensing stops (default: the token
+  budget of truncation.py in bytes when one is set, otherwise no limit).
+"""
+
+import re
+import codecs
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+from xml.etree.ElementTree import ParseError, XMLPullParser
+
+from . import jsonlib, metrics
+from .logging_setup import logger
+from .media import iter_body
+from .truncation import budget_chars
+from .utils import getenv
+
+HTML_TYPES = ("text/html", "application/xhtml+xml")
+SKIPPED_TAGS = frozenset({"script", "style", "noscript", "template", "svg", "iframe", "object", "canvas"})
+BLOCK_TAGS = frozenset({
+    "p", "div", "section", "article", "header", "footer", "main", "nav", "aside", "table", "tr",
+    "ul", "ol", "dl", "dt", "dd", "pre", "blockquote", "h1", "h2", "h3", "h4", "h5", "h6",
+    "title", "form", "fieldset", "figure", "figcaption", "hr", "address",
+})
+CHUNK_SIZE = 65536
+
+
+def condense_enabled() -> bool:
+    return (getenv("RESPONSE_CONDENSE_MARKUP") or "false").lower() in ("true", "1", "yes")
+
+
+def markup_kind(mime_type: str) -> Optional[str]:
+    """"html" or "xml" for markup media types, None otherwise."""
+    if mime_type in HTML_TYPES:
+        return "html"
+    if mime_type in ("application/xml", "text/xml") or mime_type.endswith("+xml"):
+        return "xml"
+    return None
+
+
+def streams_markup(mime_type: str) -> bool:
+    """True if a response of this type is condensed, so its body should be left streaming."""
+    return condense_enabled() and markup_kind(mime_type) is not None
+
+
+def max_chars() -> int:
+    raw = getenv("RESPONSE_CONDENSE_MAX_CHARS")
+    if raw:
+        try:
+            return max(int(raw), 0)
+        except ValueError:
+            logger.warning(f"Invalid RESPONSE_CONDENSE_MAX_CHARS env var: {raw}. Ignoring.")
+    return budget_chars()
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self, limit: int):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.parts: List[str] = []
+        self.size = 0
+        self.skipping = 0
+        self.full = False
+
+    def _emit(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        if self.limit and self.size >= self.limit:
+            self.full = True
+
+    def handle_starttag(self, tag: str, attrs: Any) -> None:
+        if tag in SKIPPED_TAGS:
+            self.skipping += 1
+        elif tag == "li":
+            self._emit("\n- ")
+        elif tag in ("br", "td", "th"):
+            self._emit("\n" if tag == "br" else "\t")
+        elif tag in BLOCK_TAGS:
+            self._emit("\n")
+
+    def handle_startendtag(self, tag: str, attrs: Any) -> None:
+        if tag not in SKIPPED_TAGS:
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in SKIPPED_TAGS:
+            self.skipping = max(self.skipping - 1, 0)
+        elif tag in BLOCK_TAGS:
+            self._emit("\n")
+
+    def handle_data(self, data: str) -> None:
+        if not self.skipping and data.strip():
+            self._emit(re.sub(r"\s+", " ", data))
+
+    def text(self) -> str:
+        # Data may arrive split across feeds, so spaces are collapsed again over the whole text.
+        lines = (re.sub(r" {2,}", " ", line).strip() for line in "".join(self.parts).splitlines())
+        text = re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+        return text[:self.limit] + "\n[truncated]" if self.full and self.limit else text
+
+
+def condense_html(chunks: Iterable[bytes], encoding: str = "utf-8", limit: int = 0) -> str:
+    """Readable text of an HTML body fed as byte chunks, stopping once limit characters are out."""
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    extractor = _TextExtractor(limit)
+    for chunk in chunks:
+        extractor.feed(decoder.decode(chunk))
+        if extractor.full:
+            break
+    else:
+        extractor.feed(decoder.decode(b"", final=True))
+        extractor.close()
+    return extractor.text()
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+class _Frame:
+    """An open XML element being condensed."""
+
+    __slots__ = ("tag", "value", "repeated")
+
+    def __init__(self, tag: str, attributes: Dict[str, str]):
+        self.tag = tag
+        self.value: Dict[str, Any] = {f"@{_local_name(k)}": v for k, v in attributes.items()}
+        self.repeated: Set[str] = set()
+
+    def add(self, tag: str, child: Any) -> None:
+        if tag in self.repeated:
+            self.value[tag].append(child)
+        elif tag in self.value:
+            self.value[tag] = [self.value[tag], child]
+            self.repeated.add(tag)
+        else:
+            self.value[tag] = child
+
+    def close(self, text: Optional[str]) -> Any:
+        text = (text or "").strip()
+        if not self.value:
+            return text or None
+        if text:
+            self.value["#text"] = text
+        return self.value
+
+
+def condense_xml(chunks: Iterable[bytes], limit: int = 0) -> Dict[str, Any]:
+    """
+    JSON-like structure of an XML body fed as byte chunks. Text between child elements
+    (mixed content) is dropped. Raises xml.etree.ElementTree.ParseError for malformed XML.
+    """
+    parser = XMLPullParser(events=("start", "end"))
+    stack: List[_Frame] = []
+    elements: List[Any] = []
+    result: Dict[str, Any] = {}
+    size = 0
+    truncated = False
+    for chunk in chunks:
+        parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == "start":
+                stack.append(_Frame(_local_name(element.tag), element.attrib))
+                elements.append(element)
+                size += len(stack[-1].tag) + sum(len(k) + len(v) + 6 for k, v in element.attrib.items()) + 4
+                continue
+            frame = stack.pop()
+            elements.pop()
+            size += len(element.text or "")
+            value = frame.close(element.text)
+            element.clear()
+            if elements:
+                # Children are condensed already; drop them so no tree builds up.
+                elements[-1].remove(element)
+                stack[-1].add(frame.tag, value)
+            else:
+                result[frame.tag] = value
+        if limit and size >= limit and stack:
+            truncated = True
+            break
+    else:
+        parser.close()
+    if truncated:
+        while stack:
+            frame = stack.pop()
+            value = frame.close(None)
+            if stack:
+                stack[-1].add(frame.tag, value)
+            else:
+                result[frame.tag] = value
+        result["_truncated"] = True
+    return result
+
+
+def _charset(response: Any) -> str:
+    headers = getattr(response, "headers", None) or {}
+    content_type = headers.get("Content-Type") or headers.get("content-type") or ""
+    match = re.search(r"charset=([\w.:-]+)", content_type, re.I)
+    if match:
+        try:
+            return codecs.lookup(match.group(1)).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def condense_response(response: Any, kind: str, tool_name: str) -> str:
+    """Condensed text of a markup response. Blocking; run it off the event loop."""
+    limit = max_chars()
+    charset = _charset(response) if getattr(response, "iter_content", None) is not None else "utf-8"
+    consumed: List[bytes] = []
+    body = iter_body(response, CHUNK_SIZE)
+
+    def recorded() -> Iterator[bytes]:
+        for chunk in body:
+            consumed.append(chunk)
+            yield chunk
+
+    if kind == "xml":
+        try:
+            condensed = jsonlib.dumps(condense_xml(recorded(), limit))
+        except ParseError as e:
+            logger.debug(f"{tool_name} returned malformed XML ({e}); condensing it as HTML")
+            # Replay what the XML parser consumed, then continue with the rest of the body.
+            read_so_far = list(consumed)
+            condensed = condense_html(_chain(read_so_far, recorded()), charset, limit)
+    else:
+        condensed = condense_html(recorded(), charset, limit)
+    read = sum(len(chunk) for chunk in consumed)
+    metrics.increment("markup.responses")
+    metrics.increment("markup.bytes_in", read)
+    metrics.increment("markup.chars_out", len(condensed))
+    logger.debug(f"Condensed {kind} response of {tool_name}: {read} bytes read -> {len(condensed)} chars")
+    return condensed
+
+
+def _chain(first: List[bytes], rest: Iterator[bytes]) -> Iterator[bytes]:
+    yield from first
+    yield from rest
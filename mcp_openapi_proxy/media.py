@@ -0,0 +1,146 @@
+"""
+Binary and media responses for mcp-openapi-proxy.
+
+Responses whose Content-Type is not textual are never decoded as text. Their bodies are read
+as bytes, up to a size cap, and returned as MCP content that matches the media type: images
+as ImageContent, audio as AudioContent, anything else as an embedded blob resource. With
+BINARY_SPILL_DIR set, large bodies and non-media binaries are written to a file instead,
+and the tool returns its path.
+Configuration is controlled via environment variables:
+- BINARY_MAX_BYTES: Largest binary body read, in bytes (default: 20971520).
+- BINARY_INLINE_MAX_BYTES: Largest binary body returned inline when BINARY_SPILL_DIR is set
+  (default: 1048576).
+- BINARY_SPILL_DIR: Directory where binary bodies are written instead of being inlined.
+"""
+
+import os
+import base64
+import mimetypes
+import uuid
+from typing import Any, Iterator, Optional, Tuple
+
+from mcp import types
+from pydantic import AnyUrl
+
+from . import jsonlib, metrics
+from .logging_setup import logger
+
+TEXT_TYPES = (
+    "application/json", "application/xml", "application/javascript", "application/ecmascript",
+    "application/x-www-form-urlencoded", "application/yaml", "application/x-yaml",
+    "application/graphql", "application/x-ndjson", "application/problem+json",
+)
+
+
+def _int_env(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw:
+        try:
+            return max(int(raw), 0)
+        except ValueError:
+            logger.warning(f"Invalid {name} env var: {raw}. Ignoring.")
+    return default
+
+
+def media_type(response: Any) -> str:
+    """The bare, lower-cased media type of a response, or "" if it has none."""
+    headers = getattr(response, "headers", None) or {}
+    content_type = headers.get("Content-Type") or headers.get("content-type") or ""
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def body_size(response: Any) -> int:
+    """Size of a response body that has already been read, without decoding it."""
+    content = getattr(response, "content", None)
+    if isinstance(content, (bytes, bytearray)):
+        return len(content)
+    return len(getattr(response, "text", "") or "")
+
+
+def is_binary_media_type(mime_type: str) -> bool:
+    """True for media types whose bodies must not be decoded as text. Unknown means text."""
+    if not mime_type or mime_type.startswith("text/") or mime_type in TEXT_TYPES:
+        return False
+    return not mime_type.endswith(("+json", "+xml", "/json", "/xml"))
+
+
+def read_capped(response: Any, max_bytes: int) -> Tuple[bytes, bool]:
+    """
+    Read up to max_bytes of a response body. Returns the bytes and whether the body was
+    larger than the cap, in which case reading stops early.
+    """
+    iter_content = getattr(response, "iter_content", None)
+    if iter_content is None:
+        data = getattr(response, "content", b"") or b""
+        return data[:max_bytes], len(data) > max_bytes
+    chunks = []
+    size = 0
+    try:
+        for chunk in iter_content(65536):
+            size += len(chunk)
+            if size > max_bytes:
+                return b"", True
+            chunks.append(chunk)
+    finally:
+        close = getattr(response, "close", None)
+        if close is not None:
+            close()
+    return b"".join(chunks), False
+
+
+def iter_body(response: Any, chunk_size: int = 65536) -> Iterator[bytes]:
+    """Yield a response body in chunks as it arrives, closing the response when done or abandoned."""
+    iter_content = getattr(response, "iter_content", None)
+    if iter_content is None:
+        yield (getattr(response, "text", "") or "").encode("utf-8")
+        return
+    try:
+        yield from iter_content(chunk_size)
+    finally:
+        close = getattr(response, "close", None)
+        if close is not None:
+            close()
+
+
+def _spill_to_file(directory: str, data: bytes, mime_type: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    extension = mimetypes.guess_extension(mime_type) or ".bin"
+    path = os.path.join(directory, f"{uuid.uuid4().hex}{extension}")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def binary_result(response: Any, url: str, tool_name: str) -> types.CallToolResult:
+    """Build the tool result for a binary response. Blocking; run it off the event loop."""
+    mime_type = media_type(response) or "application/octet-stream"
+    max_bytes = _int_env("BINARY_MAX_BYTES", 20 * 1024 * 1024)
+    data, too_large = read_capped(response, max_bytes)
+    if too_large:
+        logger.warning(f"Binary response of {tool_name} exceeds BINARY_MAX_BYTES ({max_bytes})")
+        return types.CallToolResult(
+            content=[types.TextContent(type="text", text=f"Binary response ({mime_type}) exceeds {max_bytes} bytes")],
+            isError=True,
+        )
+    metrics.increment("binary.responses")
+    metrics.increment("binary.bytes", len(data))
+    spill_dir: Optional[str] = os.getenv("BINARY_SPILL_DIR") or None
+    is_media = mime_type.startswith(("image/", "audio/"))
+    if spill_dir and (not is_media or len(data) > _int_env("BINARY_INLINE_MAX_BYTES", 1024 * 1024)):
+        path = _spill_to_file(spill_dir, data, mime_type)
+        logger.debug(f"Wrote {len(data)} byte {mime_type} response of {tool_name} to {path}")
+        summary = {"path": path, "size": len(data), "mimeType": mime_type}
+        return types.CallToolResult(content=[types.TextContent(type="text", text=jsonlib.dumps(summary))], isError=False)
+    encoded = base64.b64encode(data).decode("ascii")
+    content: Any
+    if mime_type.startswith("image/"):
+        content = types.ImageContent(type="image", data=encoded, mimeType=mime_type)
+    elif mime_type.startswith("audio/"):
+        content = types.AudioContent(type="audio", data=encoded, mimeType=mime_type)
+    else:
+        content = types.EmbeddedResource(
+            type="resource",
+            resource=types.BlobResourceContents(uri=AnyUrl(url), mimeType=mime_type, blob=encoded),
+        )
+    logger.debug(f"Returning {len(data)} byte {mime_type} response of {tool_name} as {content.type} content")
+    return types.CallToolResult(content=[content], isError=False)
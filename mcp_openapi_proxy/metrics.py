@@ -0,0 +1,47 @@
+"""
+In-process counters for mcp-openapi-proxy.
+
+Counters are plain named numbers that can be incremented or tracked as a running peak.
+A snapshot is served as the proxy_metrics resource when resources are enabled.
+"""
+
+import threading
+from typing import Dict, Union
+
+Number = Union[int, float]
+
+METRICS_URI = "file:///proxy_metrics.json"
+
+_counters: Dict[str, Number] = {}
+_lock = threading.Lock()
+
+
+def increment(name: str, amount: Number = 1) -> Number:
+    """Add amount to a counter and return its new value."""
+    with _lock:
+        value = _counters.get(name, 0) + amount
+        _counters[name] = value
+        return value
+
+
+def track_peak(name: str, value: Number) -> None:
+    """Record value under name if it exceeds the current peak."""
+    with _lock:
+        if value > _counters.get(name, 0):
+            _counters[name] = value
+
+
+def get(name: str) -> Number:
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def snapshot(prefix: str = "") -> Dict[str, Number]:
+    """Return a copy of all counters, optionally only those starting with prefix."""
+    with _lock:
+        return {k: v for k, v in sorted(_counters.items()) if k.startswith(prefix)}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
@@ -0,0 +1,94 @@
+"""
+CPU offloading for mcp-openapi-proxy.
+
+Decoding and encoding multi-megabyte JSON or YAML runs for hundreds of milliseconds. On the
+event loop that stalls every other session, so stages working on payloads above a size
+threshold run in a worker pool instead. Stages that touch process state (the spill store,
+the continuation cache, per-spec settings) always use threads; pure codec calls use the
+configured pool, which may be a process pool to escape the GIL.
+Configuration is controlled via environment variables:
+- OFFLOAD_THRESHOLD_BYTES: Payload size from which a stage is offloaded (default: 262144).
+  Set to 0 to run every stage on the event loop.
+- OFFLOAD_EXECUTOR: "thread" (default) or "process", the pool used for pure codec calls.
+- OFFLOAD_WORKERS: Workers per pool (default: 4).
+"""
+
+import os
+import asyncio
+import functools
+import contextvars
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from . import metrics
+from .logging_setup import logger
+
+T = TypeVar("T")
+
+_executors: Dict[str, Executor] = {}
+_executors_lock = threading.Lock()
+
+
+def _int_env(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw:
+        try:
+            return max(int(raw), 0)
+        except ValueError:
+            logger.warning(f"Invalid {name} env var: {raw}. Ignoring.")
+    return default
+
+
+def offload_threshold() -> int:
+    return _int_env("OFFLOAD_THRESHOLD_BYTES", 256 * 1024)
+
+
+def executor_kind() -> str:
+    kind = os.getenv("OFFLOAD_EXECUTOR", "thread").lower()
+    if kind not in ("thread", "process"):
+        logger.warning(f"Invalid OFFLOAD_EXECUTOR env var: {kind}. Ignoring.")
+        return "thread"
+    return kind
+
+
+def get_executor(kind: str = "thread") -> Executor:
+    """The shared pool of the given kind, created on first use."""
+    with _executors_lock:
+        executor = _executors.get(kind)
+        if executor is None:
+            workers = max(_int_env("OFFLOAD_WORKERS", 4), 1)
+            if kind == "process":
+                executor = ProcessPoolExecutor(max_workers=workers)
+            else:
+                executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mcp-openapi-proxy-offload")
+            _executors[kind] = executor
+            logger.debug(f"Created {kind} offload pool with {workers} workers")
+        return executor
+
+
+def reset_executors() -> None:
+    """Shut down and forget the offload pools."""
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown(wait=False, cancel_futures=True)
+        _executors.clear()
+
+
+async def run_offloaded(func: Callable[..., T], *args: Any, size: Optional[int] = None,
+                        pure: bool = False, **kwargs: Any) -> T:
+    """
+    Run func(*args, **kwargs) in a pool if size reaches the threshold (always when size is
+    None), otherwise inline. Pass pure=True only for functions of their arguments alone,
+    which may then run in a process pool; their arguments and result must pickle.
+    """
+    threshold = offload_threshold()
+    if threshold == 0 or (size is not None and size < threshold):
+        return func(*args, **kwargs)
+    kind = executor_kind() if pure else "thread"
+    call = functools.partial(func, *args, **kwargs)
+    if kind == "thread":
+        # Keep context variables, such as the active spec's settings, in the worker.
+        call = functools.partial(contextvars.copy_context().run, call)
+    metrics.increment(f"offload.{kind}_calls")
+    return await asyncio.get_running_loop().run_in_executor(get_executor(kind), call)
@@ -11,11 +11,18 @@ from typing import Dict, Optional, List, Union
 from urllib.parse import unquote, quote
 from mcp import types
 from mcp_openapi_proxy.utils import normalize_tool_name
+from mcp_openapi_proxy.projection import add_select_argument
+from mcp_openapi_proxy.schema_filter import compile_response_fields, field_compiler, schema_filter_enabled
+from mcp_openapi_proxy.schemas import BODY_ARGUMENT, SchemaInterner, request_body_schema
+from . import jsonlib
 from .logging_setup import logger
 
 # Define the required tool name pattern
 TOOL_NAME_REGEX = r"^[a-zA-Z0-9_-]{1,64}$"
 
+# Call plans built at registration, keyed by tool name, so dispatch needs no spec scan.
+operation_plans: Dict[str, Dict] = {}
+
 def fetch_openapi_spec(url: str, retries: int = 3) -> Optional[Dict]:
     """Fetch and parse an OpenAPI specification from a URL with retries."""
     logger.debug(f"Fetching OpenAPI spec from URL: {url}")
@@ -35,7 +42,7 @@ def fetch_openapi_spec(url: str, retries: int = 3) -> Optional[Dict]:
                 content = response.text
             logger.debug(f"Fetched content length: {len(content)} bytes")
             try:
-                spec = json.loads(content)
+                spec = jsonlib.loads(content)
                 logger.debug(f"Parsed as JSON from {url}")
             except json.JSONDecodeError:
                 try:
@@ -128,6 +135,11 @@ def register_functions(spec: Dict) -> List[types.Tool]:
     from .utils import is_tool_whitelisted # Keep import here to avoid circular dependency if utils imports openapi
 
     tools_list: List[types.Tool] = [] # Use a local list for registration
+    operation_plans.clear()
+    # One compiler per registration, so component schemas shared by operations compile once.
+    response_compiler = field_compiler(spec) if schema_filter_enabled() else None
+    # Tools share one copy of each distinct schema fragment, e.g. a common Error or Pagination schema.
+    interner = SchemaInterner()
     logger.debug("Starting tool registration from OpenAPI spec.")
     if not spec:
         logger.error("OpenAPI spec is None or empty during registration.")
@@ -244,45 +256,59 @@ def register_functions(spec: Dict) -> List[types.Tool]:
                           input_schema['required'].append(tp_name)
 
 
-                # Handle request body (for POST, PUT, PATCH)
-                request_body = operation.get('requestBody')
-                if request_body and isinstance(request_body, dict):
-                     content = request_body.get('content')
-                     if content and isinstance(content, dict):
-                          # Prefer application/json if available
-                          json_content = content.get('application/json')
-                          if json_content and isinstance(json_content, dict) and 'schema' in json_content:
-                               body_schema = json_content['schema']
-                               # If body schema is object with properties, merge them
-                               if body_schema.get('type') == 'object' and 'properties' in body_schema:
-                                    input_schema['properties'].update(body_schema['properties'])
-                                    if 'required' in body_schema and isinstance(body_schema['required'], list):
-                                         # Add required body properties, avoiding duplicates
-                                         for req_prop in body_schema['required']:
-                                              if req_prop not in input_schema['required']:
-                                                   input_schema['required'].append(req_prop)
-                               # If body schema is not an object or has no properties,
-                               # maybe represent it as a single 'body' parameter? Needs decision.
-                               # else:
-                               #    input_schema['properties']['body'] = body_schema
-                               #    if request_body.get('required', False):
-                               #         input_schema['required'].append('body')
-
+                # Handle request body (for POST, PUT, PATCH). Object bodies contribute their
+                # properties as arguments; any other body (array, oneOf, scalar, or an object
+                # whose properties clash with parameters) is passed as one "body" argument.
+                body_argument = None
+                body_schema, body_required = request_body_schema(operation, spec)
+                if isinstance(body_schema, dict):
+                    body_properties = body_schema.get('properties')
+                    if (
+                        body_schema.get('type', 'object') == 'object'
+                        and isinstance(body_properties, dict) and body_properties
+                        and not any(k in body_schema for k in ('oneOf', 'anyOf'))
+                        and not set(body_properties) & set(input_schema['properties'])
+                    ):
+                        input_schema['properties'].update(body_properties)
+                        for req_prop in body_schema.get('required') or []:
+                            if req_prop not in input_schema['required']:
+                                input_schema['required'].append(req_prop)
+                    elif BODY_ARGUMENT not in input_schema['properties']:
+                        body_argument = BODY_ARGUMENT
+                        input_schema['properties'][BODY_ARGUMENT] = {"description": "Request body", **body_schema}
+                        if body_required:
+                            input_schema['required'].append(BODY_ARGUMENT)
+                    else:
+                        logger.warning(f"Request body of {function_name} clashes with its '{BODY_ARGUMENT}' parameter; not exposed.")
+
+                add_select_argument(input_schema)
 
                 # Create and register the tool
                 tool = types.Tool(
                     name=function_name,
                     description=description,
-                    inputSchema=input_schema,
+                    inputSchema=interner.intern(input_schema),
                 )
                 tools_list.append(tool)
                 registered_names.add(function_name)
+                operation_plans[function_name] = {
+                    "path": path,
+                    "method": method.upper(),
+                    "operation": operation,
+                    "original_path": path,
+                    "spec": spec,
+                    "body_argument": body_argument,
+                    "response_fields": (
+                        compile_response_fields(operation, spec, response_compiler) if response_compiler else None
+                    ),
+                }
                 logger.debug(f"Registered tool: {function_name} from {raw_name}") # Simplified log
 
             except Exception as e:
                 logger.error(f"Error registering function for {method.upper()} {path}: {e}", exc_info=True)
 
     logger.info(f"Successfully registered {len(tools_list)} tools from OpenAPI spec.")
+    logger.debug(f"Input schemas share {len(interner)} distinct fragments ({interner.shared} duplicates reused)")
 
     # Update the global/shared tools list if necessary (depends on server implementation)
     # Example for lowlevel server:
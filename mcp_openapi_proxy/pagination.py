@@ -0,0 +1,342 @@
+"""
+Automatic pagination for mcp-openapi-proxy.
+
+For tools that opt in, a GET response that is one page of a list is followed to the
+subsequent pages and the items are aggregated into a single result, up to a page, item and
+byte cap. The pagination style is detected per response, in this order:
+1. A Link header with rel="next".
+2. A next-page URL in the body (e.g. "next", "links.next", "_links.next.href").
+3. A cursor in the body (e.g. "next_cursor", "response_metadata.next_cursor"), sent back
+   as the PAGINATION_CURSOR_PARAM query parameter.
+4. An offset or page-number query parameter, when PAGINATION_OFFSET_PARAM or
+   PAGINATION_PAGE_PARAM is set. These pages are computable up front, so up to
+   PAGINATION_PIPELINE_DEPTH of them are fetched concurrently.
+Next-page URLs are only followed under the base URL the first request went to, since each
+request carries the tool's credentials and is counted against that upstream's rate limit and
+circuit breaker; a next URL elsewhere ends the walk and is reported as pagination.next.
+Configuration is controlled via environment variables:
+- PAGINATION_TOOLS: Comma-separated tool name patterns that follow pagination (default: none).
+- PAGINATION_ITEMS_PATH: JMESPath to the items array of a page (default: auto-detect).
+- PAGINATION_NEXT_PATH: JMESPath to a next-page URL in the body (default: auto-detect).
+- PAGINATION_CURSOR_PATH: JMESPath to the next cursor in the body (default: auto-detect).
+- PAGINATION_CURSOR_PARAM: Query parameter carrying the cursor (default: "cursor").
+- PAGINATION_OFFSET_PARAM: Query parameter holding the item offset, e.g. "offset".
+- PAGINATION_PAGE_PARAM: Query parameter holding the page number, e.g. "page".
+- PAGINATION_MAX_PAGES: Maximum pages fetched per call, first included (default: 10).
+- PAGINATION_MAX_ITEMS: Maximum items returned per call (default: 1000).
+- PAGINATION_MAX_BYTES: Maximum response bytes read per call (default: 1000000).
+- PAGINATION_PIPELINE_DEPTH: Offset or page-number pages fetched ahead (default: 2).
+"""
+
+import asyncio
+from fnmatch import fnmatchcase
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import jmespath
+from requests.utils import parse_header_links
+
+from . import jsonlib
+from .logging_setup import logger
+from .projection import ProjectionError, compile_expression
+from .utils import getenv
+
+ITEMS_KEYS = ("data", "items", "results", "records", "entries", "values", "members", "channels")
+NEXT_URL_PATHS = ("next", "links.next", "_links.next.href", "next_page_url", "paging.next", "meta.next")
+CURSOR_PATHS = (
+    "next_cursor", "nextCursor", "next_page_token", "nextPageToken", "cursor",
+    "response_metadata.next_cursor", "meta.next_cursor", "paging.cursors.after", "pagination.next_cursor",
+)
+
+Fetch = Callable[[str, Optional[Dict[str, Any]]], Awaitable[Any]]
+Progress = Callable[[float, Optional[float], Optional[str]], Awaitable[None]]
+
+
+def _search(expression: str, data: Any) -> Any:
+    try:
+        return compile_expression(expression).search(data)
+    except (ProjectionError, jmespath.exceptions.JMESPathError) as e:
+        logger.warning(f"Invalid pagination JMESPath '{expression}': {e}")
+        return None
+
+
+def _int_setting(name: str, default: int) -> int:
+    raw = getenv(name)
+    if raw:
+        try:
+            return max(int(raw), 1)
+        except ValueError:
+            logger.warning(f"Invalid {name} env var: {raw}. Ignoring.")
+    return default
+
+
+class PaginationConfig:
+    """Pagination settings for one tool call."""
+
+    def __init__(self, items_path: Optional[str] = None, next_path: Optional[str] = None,
+                 cursor_path: Optional[str] = None, cursor_param: str = "cursor",
+                 offset_param: Optional[str] = None, page_param: Optional[str] = None,
+                 max_pages: int = 10, max_items: int = 1000, max_bytes: int = 1_000_000,
+                 pipeline_depth: int = 2):
+        self.items_path = items_path
+        self.next_path = next_path
+        self.cursor_path = cursor_path
+        self.cursor_param = cursor_param
+        self.offset_param = offset_param
+        self.page_param = page_param
+        self.max_pages = max_pages
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.pipeline_depth = pipeline_depth
+
+    @classmethod
+    def from_env(cls) -> "PaginationConfig":
+        return cls(
+            items_path=getenv("PAGINATION_ITEMS_PATH") or None,
+            next_path=getenv("PAGINATION_NEXT_PATH") or None,
+            cursor_path=getenv("PAGINATION_CURSOR_PATH") or None,
+            cursor_param=getenv("PAGINATION_CURSOR_PARAM") or "cursor",
+            offset_param=getenv("PAGINATION_OFFSET_PARAM") or None,
+            page_param=getenv("PAGINATION_PAGE_PARAM") or None,
+            max_pages=_int_setting("PAGINATION_MAX_PAGES", 10),
+            max_items=_int_setting("PAGINATION_MAX_ITEMS", 1000),
+            max_bytes=_int_setting("PAGINATION_MAX_BYTES", 1_000_000),
+            pipeline_depth=_int_setting("PAGINATION_PIPELINE_DEPTH", 2),
+        )
+
+
+def pagination_enabled(tool_name: str) -> bool:
+    patterns = [p.strip() for p in (getenv("PAGINATION_TOOLS") or "").split(",") if p.strip()]
+    return any(fnmatchcase(tool_name, pattern) for pattern in patterns)
+
+
+def extract_items(body: Any, config: PaginationConfig) -> Optional[List[Any]]:
+    """Return the list of items on a page, or None if the body does not look like a page."""
+    if isinstance(body, list):
+        return body
+    if not isinstance(body, dict):
+        return None
+    if config.items_path:
+        items = _search(config.items_path, body)
+        return items if isinstance(items, list) else None
+    for key in ITEMS_KEYS:
+        if isinstance(body.get(key), list):
+            return body[key]
+    lists = [value for value in body.values() if isinstance(value, list)]
+    return lists[0] if len(lists) == 1 else None
+
+
+def link_next(response: Any) -> Optional[str]:
+    """URL of the rel="next" entry of the Link header, if any."""
+    headers = getattr(response, "headers", None) or {}
+    header = headers.get("Link") or headers.get("link")
+    if not header:
+        return None
+    for link in parse_header_links(header):
+        if "next" in str(link.get("rel", "")).split():
+            return link.get("url")
+    return None
+
+
+def body_next(body: Any, config: PaginationConfig) -> Optional[str]:
+    if not isinstance(body, dict):
+        return None
+    for path in ([config.next_path] if config.next_path else NEXT_URL_PATHS):
+        value = _search(path, body)
+        if isinstance(value, str) and value.startswith(("http://", "https://", "/", "?")):
+            return value
+    return None
+
+
+def body_cursor(body: Any, config: PaginationConfig) -> Optional[str]:
+    if not isinstance(body, dict) or body.get("has_more") is False or body.get("hasMore") is False:
+        return None
+    for path in ([config.cursor_path] if config.cursor_path else CURSOR_PATHS):
+        value = _search(path, body)
+        if isinstance(value, (str, int)) and not isinstance(value, bool) and value != "":
+            return str(value)
+    return None
+
+
+class Aggregate:
+    """Items collected so far across pages, with the reason collection stopped."""
+
+    def __init__(self, config: PaginationConfig):
+        self.config = config
+        self.items: List[Any] = []
+        self.pages = 0
+        self.bytes_read = 0
+        self.stopped_by: Optional[str] = None
+
+    def add(self, items: List[Any], size: int) -> bool:
+        """Add one page; returns False once a cap is reached."""
+        self.pages += 1
+        self.bytes_read += size
+        room = self.config.max_items - len(self.items)
+        self.items.extend(items[:room])
+        if len(items) > room or len(self.items) >= self.config.max_items:
+            self.stopped_by = "max_items"
+        elif self.pages >= self.config.max_pages:
+            self.stopped_by = "max_pages"
+        elif self.bytes_read >= self.config.max_bytes:
+            self.stopped_by = "max_bytes"
+        return self.stopped_by is None
+
+    def result(self, style: str, next_ref: Optional[Any]) -> str:
+        complete = self.stopped_by is None and next_ref is None
+        summary = {
+            "items": self.items,
+            "pagination": {
+                "style": style,
+                "pages": self.pages,
+                "items": len(self.items),
+                "complete": complete,
+                "stopped_by": self.stopped_by,
+                "next": None if complete else next_ref,
+            },
+        }
+        return jsonlib.dumps(summary)
+
+
+def url_origin(url: str) -> Tuple[str, str]:
+    """The (scheme, host[:port]) of a URL, lower-cased."""
+    parts = urlsplit(url)
+    return parts.scheme.lower(), parts.netloc.lower()
+
+
+def under_base(url: str, base_url: str) -> bool:
+    """True if url is base_url or a path below it, on the same origin."""
+    base_parts, parts = urlsplit(base_url), urlsplit(url)
+    if url_origin(url) != url_origin(base_url):
+        return False
+    prefix = base_parts.path.rstrip("/")
+    return parts.path == prefix or parts.path.startswith(prefix + "/")
+
+
+def _parse(response: Any) -> Tuple[Any, int]:
+    text = getattr(response, "text", "") or ""
+    try:
+        return jsonlib.loads(text), len(text)
+    except ValueError:
+        return None, len(text)
+
+
+async def paginate(first: Any, url: str, params: Optional[Dict[str, Any]], fetch: Fetch,
+                   config: Optional[PaginationConfig] = None,
+                   progress: Optional[Progress] = None,
+                   page_filter: Optional[Callable[[Any], Any]] = None,
+                   base_url: Optional[str] = None) -> Optional[str]:
+    """
+    Follow the pages after `first`, the response to GET url?params.
+
+    fetch(url, params) returns the response for another page. page_filter, if given, is
+    applied to each page body before its items are taken; next links and cursors are always
+    read from the unfiltered body. Next-page URLs are only fetched when they lie under
+    base_url (default: the origin of url). Returns the aggregated result
+    as JSON text, or None when `first` is not a page of a longer list (the caller then
+    returns it unchanged).
+    """
+    config = config or PaginationConfig.from_env()
+    base = base_url or "{}://{}".format(*url_origin(url))
+
+    def page_items(page_body: Any) -> Optional[List[Any]]:
+        return extract_items(page_filter(page_body) if page_filter else page_body, config)
+
+    body, size = _parse(first)
+    items = page_items(body)
+    if items is None:
+        return None
+    aggregate = Aggregate(config)
+    params = dict(params or {})
+
+    async def report() -> None:
+        if progress is not None:
+            await progress(aggregate.pages, config.max_pages, f"Fetched {len(aggregate.items)} items")
+
+    more = aggregate.add(items, size)
+    await report()
+
+    if link_next(first) or body_next(body, config):
+        style = "link" if link_next(first) else "next_url"
+        response, current_url = first, url
+        while True:
+            next_url = link_next(response) if style == "link" else body_next(body, config)
+            if not next_url or not more:
+                return aggregate.result(style, urljoin(current_url, next_url) if next_url else None)
+            next_url = urljoin(current_url, next_url)
+            if not under_base(next_url, base):
+                # The request would carry the tool's credentials elsewhere, outside this upstream's accounting.
+                logger.warning(f"Not following next page outside {base}: {next_url}")
+                aggregate.stopped_by = "foreign_url"
+                return aggregate.result(style, next_url)
+            current_url = next_url
+            response = await fetch(current_url, None)
+            body, size = _parse(response)
+            new_items = page_items(body) or []
+            more = aggregate.add(new_items, size) and bool(new_items)
+            await report()
+
+    if body_cursor(body, config) is not None:
+        while True:
+            cursor = body_cursor(body, config)
+            if cursor is None or not more:
+                return aggregate.result("cursor", cursor)
+            params[config.cursor_param] = cursor
+            response = await fetch(url, dict(params))
+            body, size = _parse(response)
+            new_items = page_items(body) or []
+            more = aggregate.add(new_items, size) and bool(new_items)
+            await report()
+
+    counter = config.offset_param or config.page_param
+    if counter and items:
+        return await _paginate_counter(url, params, items, fetch, config, aggregate, more, report, page_items)
+    # A single page: leave the response as it is.
+    return None
+
+
+async def _paginate_counter(url: str, params: Dict[str, Any], first_items: List[Any], fetch: Fetch,
+                            config: PaginationConfig, aggregate: Aggregate, more: bool,
+                            report: Callable[[], Awaitable[None]],
+                            page_items: Callable[[Any], Optional[List[Any]]]) -> str:
+    """Offset or page-number pagination, fetching up to pipeline_depth pages ahead."""
+    param = config.offset_param or config.page_param
+    style = "offset" if config.offset_param else "page"
+    page_size = len(first_items)
+    try:
+        start = int(params.get(param, 0 if style == "offset" else 1))
+    except (TypeError, ValueError):
+        start = 0 if style == "offset" else 1
+    step = page_size if style == "offset" else 1
+    next_value = start + step
+    last_full = True
+    pending: List[Tuple[int, asyncio.Task]] = []
+
+    def schedule() -> None:
+        nonlocal next_value
+        remaining_pages = config.max_pages - aggregate.pages - len(pending)
+        while len(pending) < config.pipeline_depth and remaining_pages > 0:
+            page_params = {**params, param: next_value}
+            pending.append((next_value, asyncio.ensure_future(fetch(url, page_params))))
+            next_value += step
+            remaining_pages -= 1
+
+    try:
+        while more and last_full:
+            schedule()
+            if not pending:
+                break
+            value, task = pending.pop(0)
+            body, size = _parse(await task)
+            new_items = page_items(body) or []
+            last_full = len(new_items) >= page_size
+            more = aggregate.add(new_items, size) and bool(new_items)
+            await report()
+            if not (more and last_full):
+                next_ref = None if not last_full or not new_items else value + step
+                return aggregate.result(style, next_ref)
+        # Only reached when the first page already hit a cap.
+        return aggregate.result(style, next_value)
+    finally:
+        for _, task in pending:
+            task.cancel()
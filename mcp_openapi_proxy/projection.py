@@ -0,0 +1,116 @@
+"""
+JMESPath response projection for mcp-openapi-proxy.
+
+Reduces a JSON response to the fields that matter before it is returned, either with an
+expression configured per tool name or path pattern, or with a `_select` expression passed
+by the caller. Expressions are compiled once and cached.
+Configuration is controlled via environment variables:
+- RESPONSE_PROJECTIONS: JSON object mapping tool name patterns, or path patterns starting
+  with "/", to JMESPath expressions, e.g.
+  {"get_dcim_devices*": "results[].{id: id, name: name, site: site.name}"}
+- RESPONSE_SELECT_ARGUMENT: Set to "true" to add an optional `_select` argument (a JMESPath
+  expression applied after any configured projection) to every tool (default: false).
+"""
+
+import json
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import jmespath
+
+from .logging_setup import logger
+from .utils import getenv
+
+SELECT_ARGUMENT = "_select"
+SELECT_SCHEMA = {
+    "type": "string",
+    "description": "Optional JMESPath expression selecting the parts of the response to return, "
+                   "e.g. 'items[].{id: id, name: name}'.",
+}
+
+
+class ProjectionError(ValueError):
+    """Raised for an invalid projection expression."""
+
+
+@lru_cache(maxsize=512)
+def compile_expression(expression: str):
+    """Compile a JMESPath expression once per process."""
+    try:
+        return jmespath.compile(expression)
+    except jmespath.exceptions.JMESPathError as e:
+        raise ProjectionError(f"Invalid JMESPath expression '{expression}': {e}") from e
+
+
+@lru_cache(maxsize=16)
+def _parse_projections(raw: str) -> Tuple[Tuple[str, str], ...]:
+    try:
+        config = json.loads(raw)
+    except ValueError:
+        logger.warning(f"Invalid RESPONSE_PROJECTIONS env var: {raw}. Ignoring.")
+        return ()
+    if not isinstance(config, dict):
+        logger.warning("RESPONSE_PROJECTIONS must be a JSON object. Ignoring.")
+        return ()
+    projections: List[Tuple[str, str]] = []
+    for pattern, expression in config.items():
+        try:
+            compile_expression(str(expression))
+        except ProjectionError as e:
+            logger.warning(f"Skipping RESPONSE_PROJECTIONS entry '{pattern}': {e}")
+            continue
+        projections.append((str(pattern), str(expression)))
+    return tuple(projections)
+
+
+def select_argument_enabled() -> bool:
+    return (getenv("RESPONSE_SELECT_ARGUMENT") or "false").lower() in ("true", "1", "yes")
+
+
+def projection_for(tool_name: str, path: str) -> Optional[str]:
+    """The configured expression for a tool, matched by tool name or path pattern."""
+    raw = getenv("RESPONSE_PROJECTIONS")
+    if not raw:
+        return None
+    for pattern, expression in _parse_projections(raw):
+        target = path if pattern.startswith("/") else tool_name
+        if fnmatchcase(target, pattern):
+            return expression
+    return None
+
+
+def project(data: Any, expressions: List[str]) -> Any:
+    """Apply the expressions to decoded JSON, in order."""
+    for expression in expressions:
+        data = compile_expression(expression).search(data)
+    return data
+
+
+def projection_expressions(tool_name: str, path: str, select: Optional[str] = None) -> List[str]:
+    """
+    The expressions to apply to a response of tool_name, configured one first.
+    Raises ProjectionError if `select` is not a valid expression.
+    """
+    expressions = [e for e in (projection_for(tool_name, path), select) if e]
+    for expression in expressions:
+        compile_expression(expression)
+    return expressions
+
+
+def add_select_argument(input_schema: Dict[str, Any]) -> None:
+    """Add the optional `_select` argument to a tool's input schema if enabled."""
+    if not select_argument_enabled():
+        return
+    properties = input_schema.setdefault("properties", {})
+    if SELECT_ARGUMENT in properties:
+        logger.warning(f"Not adding the {SELECT_ARGUMENT} argument: the operation has a parameter of that name.")
+        return
+    properties[SELECT_ARGUMENT] = dict(SELECT_SCHEMA)
+
+
+def takes_select_argument(input_schema: Any) -> bool:
+    """True if `_select` is enabled and the schema got it from add_select_argument."""
+    if not select_argument_enabled() or not isinstance(input_schema, dict):
+        return False
+    return (input_schema.get("properties") or {}).get(SELECT_ARGUMENT) == SELECT_SCHEMA
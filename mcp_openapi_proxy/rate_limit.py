@@ -0,0 +1,307 @@
+"""
+Client-side rate limiting for upstream API calls.
+
+Token buckets are kept per base URL and, optionally, per tool group. Buckets also
+adapt to the quota advertised by the upstream through X-RateLimit-* / RateLimit-*
+response headers and Retry-After, so calls are queued briefly instead of being
+sent only to come back as 429s.
+Configuration is controlled via environment variables:
+- RATE_LIMIT: Default limit per base URL, e.g. "10/s", "300/m" (unset: no static limit).
+- RATE_LIMIT_BURST: Bucket capacity for RATE_LIMIT (default: one period's worth, at least 1).
+- RATE_LIMIT_UPSTREAMS: Comma-separated "base_url_or_host=rate" pairs overriding RATE_LIMIT for
+  some upstreams, e.g. "slack.com=50/m,https://api.notion.com/v1=3/s".
+- RATE_LIMIT_TOOL_GROUPS: Comma-separated "pattern=rate" pairs matched against tool names,
+  e.g. "slack_chat_*=1/s,slack_users_*=20/m".
+- RATE_LIMIT_MAX_WAIT: Maximum seconds a call may be queued waiting for capacity (default: 10).
+- RATE_LIMIT_ADAPTIVE: Set to "false" to ignore upstream rate-limit headers (default: true).
+"""
+
+import os
+import re
+import time
+import asyncio
+import threading
+from fnmatch import fnmatchcase
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+from .logging_setup import logger
+
+_PERIODS = {"s": 1.0, "sec": 1.0, "m": 60.0, "min": 60.0, "h": 3600.0, "hour": 3600.0}
+
+# Reset values above this are treated as epoch timestamps rather than deltas.
+_EPOCH_THRESHOLD = 1_000_000_000
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call would have to wait longer than RATE_LIMIT_MAX_WAIT."""
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Rate limit for {key} exhausted; retry after {retry_after:.1f}s")
+        self.key = key
+        self.retry_after = retry_after
+
+
+def parse_rate(value: str) -> Optional[Tuple[float, float]]:
+    """Parse a rate such as "10/s" or "300/min" into (tokens per second, period tokens)."""
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*/\s*(\d*)\s*([a-z]+)\s*", value.lower())
+    if not match:
+        logger.warning(f"Invalid rate limit value: '{value}'. Ignoring.")
+        return None
+    count, multiplier, unit = match.groups()
+    if unit not in _PERIODS:
+        logger.warning(f"Invalid rate limit period in '{value}'. Ignoring.")
+        return None
+    period = _PERIODS[unit] * (float(multiplier) if multiplier else 1.0)
+    return float(count) / period, float(count)
+
+
+class TokenBucket:
+    """A token bucket that also tracks the upstream's own view of remaining quota."""
+
+    def __init__(self, rate: Optional[float] = None, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.upstream_remaining: Optional[int] = None
+        self.upstream_reset_at = 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.upstream_remaining is not None and now >= self.upstream_reset_at:
+            self.upstream_remaining = None
+
+    def reserve(self, now: float) -> float:
+        """Take one token and return how long the caller must wait before using it."""
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.rate is not None:
+            self.tokens -= 1
+            if self.tokens < 0:
+                wait = max(wait, -self.tokens / self.rate)
+        if self.upstream_remaining is not None:
+            if self.upstream_remaining <= 0:
+                wait = max(wait, self.upstream_reset_at - now)
+            self.upstream_remaining -= 1
+        return wait
+
+    def release(self) -> None:
+        """Give back a token taken by reserve() for a call that was never sent."""
+        if self.rate is not None:
+            self.tokens = min(self.capacity, self.tokens + 1)
+        if self.upstream_remaining is not None:
+            self.upstream_remaining += 1
+
+    def update_from_upstream(self, now: float, remaining: Optional[int], reset: Optional[float],
+                             retry_after: Optional[float]) -> None:
+        """Fold upstream quota hints (all relative to now) into the bucket."""
+        if retry_after is not None:
+            self.blocked_until = max(self.blocked_until, now + retry_after)
+        if remaining is not None and reset is not None:
+            self.upstream_remaining = remaining
+            self.upstream_reset_at = now + reset
+        elif remaining is not None and remaining <= 0 and retry_after is None:
+            # No reset hint: back off for a second rather than hammering.
+            self.blocked_until = max(self.blocked_until, now + 1.0)
+
+
+def _header(headers: Mapping[str, str], *names: str) -> Optional[str]:
+    lowered = {k.lower(): v for k, v in headers.items()}
+    for name in names:
+        value = lowered.get(name.lower())
+        if value is not None:
+            return str(value)
+    return None
+
+
+def _to_float(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        # Some APIs send lists such as "100, 100;w=60"; the first entry is the active one.
+        return float(value.split(",")[0].split(";")[0].strip())
+    except ValueError:
+        return None
+
+
+def parse_rate_limit_headers(headers: Mapping[str, str], now_epoch: Optional[float] = None
+                             ) -> Tuple[Optional[int], Optional[float], Optional[float]]:
+    """
+    Extract (remaining, reset seconds, retry-after seconds) from response headers.
+
+    Understands X-RateLimit-*, RateLimit-* and the structured "RateLimit: remaining=..., reset=..."
+    form. Reset values larger than an epoch threshold are treated as Unix timestamps.
+    """
+    now_epoch = time.time() if now_epoch is None else now_epoch
+    remaining = _to_float(_header(headers, "X-RateLimit-Remaining", "RateLimit-Remaining"))
+    reset = _to_float(_header(headers, "X-RateLimit-Reset", "RateLimit-Reset"))
+
+    structured = _header(headers, "RateLimit")
+    if structured and (remaining is None or reset is None):
+        fields = dict(re.findall(r"(\w+)=([\d.]+)", structured))
+        remaining = remaining if remaining is not None else _to_float(fields.get("remaining", fields.get("r")))
+        reset = reset if reset is not None else _to_float(fields.get("reset", fields.get("t")))
+
+    if reset is not None and reset > _EPOCH_THRESHOLD:
+        reset = max(0.0, reset - now_epoch)
+
+    retry_after = None
+    retry_after_raw = _header(headers, "Retry-After")
+    if retry_after_raw:
+        retry_after = _to_float(retry_after_raw)
+        if retry_after is None:
+            try:
+                retry_after = max(0.0, parsedate_to_datetime(retry_after_raw).timestamp() - now_epoch)
+            except (TypeError, ValueError):
+                logger.debug(f"Unparseable Retry-After header: {retry_after_raw}")
+
+    return (int(remaining) if remaining is not None else None), reset, retry_after
+
+
+class RateLimiter:
+    """Registry of token buckets keyed by base URL and tool group."""
+
+    def __init__(self, default_rate: Optional[Tuple[float, float]] = None, burst: Optional[float] = None,
+                 tool_groups: Optional[List[Tuple[str, Tuple[float, float]]]] = None,
+                 max_wait: float = 10.0, adaptive: bool = True,
+                 upstream_rates: Optional[Dict[str, Tuple[float, float]]] = None):
+        self.default_rate = default_rate
+        self.burst = burst
+        self.tool_groups = tool_groups or []
+        self.upstream_rates = {key.rstrip("/"): rate for key, rate in (upstream_rates or {}).items()}
+        self.max_wait = max_wait
+        self.adaptive = adaptive
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        default_rate = parse_rate(os.getenv("RATE_LIMIT", "")) if os.getenv("RATE_LIMIT") else None
+        burst = None
+        burst_env = os.getenv("RATE_LIMIT_BURST")
+        if burst_env:
+            try:
+                burst = float(burst_env)
+            except ValueError:
+                logger.warning(f"Invalid RATE_LIMIT_BURST env var: {burst_env}. Ignoring.")
+        upstream_rates = {}
+        for entry in os.getenv("RATE_LIMIT_UPSTREAMS", "").split(","):
+            if "=" not in entry:
+                if entry.strip():
+                    logger.warning(f"Skipping malformed RATE_LIMIT_UPSTREAMS entry: '{entry}'")
+                continue
+            upstream, rate = entry.rsplit("=", 1)
+            parsed = parse_rate(rate)
+            if upstream.strip() and parsed:
+                upstream_rates[upstream.strip()] = parsed
+        tool_groups = []
+        for entry in os.getenv("RATE_LIMIT_TOOL_GROUPS", "").split(","):
+            if "=" not in entry:
+                if entry.strip():
+                    logger.warning(f"Skipping malformed RATE_LIMIT_TOOL_GROUPS entry: '{entry}'")
+                continue
+            pattern, rate = entry.split("=", 1)
+            parsed = parse_rate(rate)
+            if pattern.strip() and parsed:
+                tool_groups.append((pattern.strip(), parsed))
+        max_wait = 10.0
+        max_wait_env = os.getenv("RATE_LIMIT_MAX_WAIT")
+        if max_wait_env:
+            try:
+                max_wait = float(max_wait_env)
+            except ValueError:
+                logger.warning(f"Invalid RATE_LIMIT_MAX_WAIT env var: {max_wait_env}. Ignoring.")
+        adaptive = os.getenv("RATE_LIMIT_ADAPTIVE", "true").lower() in ("true", "1", "yes")
+        return cls(default_rate, burst, tool_groups, max_wait, adaptive, upstream_rates)
+
+    def _bucket(self, key: str, rate: Optional[Tuple[float, float]], burst: Optional[float] = None) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            per_second, period_tokens = rate if rate else (None, 1.0)
+            bucket = TokenBucket(per_second, burst if burst is not None else period_tokens)
+            self._buckets[key] = bucket
+        return bucket
+
+    def _url_bucket(self, base_url: str) -> TokenBucket:
+        """The bucket of base_url, limited by its RATE_LIMIT_UPSTREAMS entry (URL, then host) or RATE_LIMIT."""
+        key = f"url:{base_url}"
+        if key not in self._buckets:
+            for upstream in (base_url.rstrip("/"), urlparse(base_url).hostname):
+                if upstream in self.upstream_rates:
+                    return self._bucket(key, self.upstream_rates[upstream])
+        return self._bucket(key, self.default_rate, self.burst)
+
+    def _buckets_for(self, base_url: str, tool_name: str) -> List[TokenBucket]:
+        """Return the base URL bucket followed by the tool group bucket, if any."""
+        buckets = [self._url_bucket(base_url)]
+        for pattern, rate in self.tool_groups:
+            if fnmatchcase(tool_name, pattern):
+                buckets.append(self._bucket(f"group:{pattern}", rate))
+                break
+        return buckets
+
+    async def acquire(self, base_url: str, tool_name: str) -> float:
+        """
+        Wait until a call to base_url for tool_name may be sent. Returns the time waited.
+        Raises RateLimitExceeded if the wait would exceed max_wait.
+        """
+        with self._lock:
+            now = time.monotonic()
+            buckets = self._buckets_for(base_url, tool_name)
+            wait = max(bucket.reserve(now) for bucket in buckets)
+            if wait > self.max_wait:
+                for bucket in buckets:
+                    bucket.release()
+                raise RateLimitExceeded(base_url, wait)
+        if wait > 0:
+            logger.debug(f"Rate limiter queueing {tool_name} for {wait:.3f}s")
+            await asyncio.sleep(wait)
+        return wait
+
+    def observe(self, base_url: str, tool_name: str, status_code: Optional[int],
+                headers: Optional[Mapping[str, str]]) -> Optional[float]:
+        """
+        Adapt buckets from an upstream response. Returns the suggested delay before a retry
+        when the upstream answered 429 and the delay fits within max_wait, otherwise None.
+        """
+        if not self.adaptive or not headers:
+            return None
+        remaining, reset, retry_after = parse_rate_limit_headers(headers)
+        if status_code == 429 and retry_after is None:
+            retry_after = reset if reset is not None else 1.0
+        if remaining is None and retry_after is None:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            buckets = self._buckets_for(base_url, tool_name)
+            # Remaining quota counts against the most specific bucket the call went through,
+            # but a 429 / Retry-After slows down the whole upstream, whatever the tool group.
+            buckets[-1].update_from_upstream(now, remaining, reset, retry_after)
+            for bucket in buckets[:-1]:
+                bucket.update_from_upstream(now, None, None, retry_after)
+        logger.debug(f"Upstream rate limit for {tool_name}: remaining={remaining}, reset={reset}, retry_after={retry_after}")
+        if status_code == 429 and retry_after is not None and retry_after <= self.max_wait:
+            return retry_after
+        return None
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide rate limiter, building it from the environment on first use."""
+    global _rate_limiter
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter.from_env()
+    return _rate_limiter
+
+
+def reset_rate_limiter() -> None:
+    """Drop the process-wide rate limiter so it is rebuilt from the environment."""
+    global _rate_limiter
+    _rate_limiter = None
@@ -0,0 +1,164 @@
+"""
+Schema-driven response slimming for mcp-openapi-proxy.
+
+At registration, each operation's declared success response schema is compiled into a field
+whitelist, stored in the operation's call plan. Responses are then filtered against it in
+one pass, dropping fields the schema does not document. Free-form parts of a schema (no
+declared properties, or a map via additionalProperties) are kept whole.
+Configuration is controlled via environment variables:
+- RESPONSE_SCHEMA_FILTER: Set to "true" to filter responses by their declared schema
+  (default: false).
+- RESPONSE_SCHEMA_FILTER_MODE: "all" keeps every declared property (default); "required"
+  keeps only required properties where a schema lists any.
+- RESPONSE_SCHEMA_FILTER_TOP_N: Keep at most this many properties per object, required
+  ones first, then in declaration order (default: 0, no limit).
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from . import metrics
+from .logging_setup import logger
+from .schemas import deref
+from .utils import getenv
+
+# A compiled whitelist: None keeps a value whole, a dict maps each kept key to the whitelist
+# of its value. Arrays are transparent: the whitelist applies to each element.
+FieldTree = Optional[Dict[str, Any]]
+
+MAX_DEPTH = 16
+
+
+def schema_filter_enabled() -> bool:
+    return (getenv("RESPONSE_SCHEMA_FILTER") or "false").lower() in ("true", "1", "yes")
+
+
+def response_schema(operation: Dict[str, Any], spec: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The JSON schema of an operation's success response, if it declares one."""
+    responses = operation.get("responses") or {}
+    # YAML specs may key responses by int; prefer 200, then the other 2xx codes.
+    codes = sorted((code for code in responses if str(code).startswith("2")), key=lambda c: (str(c) != "200", str(c)))
+    for code in codes:
+        response = deref(responses[code], spec)
+        if not isinstance(response, dict):
+            continue
+        if "schema" in response:  # Swagger 2.0
+            return response["schema"]
+        content = response.get("content") or {}
+        media = content.get("application/json") or next(
+            (value for key, value in content.items() if "json" in key), None
+        )
+        if isinstance(media, dict) and media.get("schema"):
+            return media["schema"]
+    return None
+
+
+def _merge(a: FieldTree, b: FieldTree) -> FieldTree:
+    if a is None or b is None:
+        return None
+    merged = dict(a)
+    for key, subtree in b.items():
+        merged[key] = _merge(merged[key], subtree) if key in merged else subtree
+    return merged
+
+
+class FieldCompiler:
+    """
+    Compiles response schemas of one spec into whitelists.
+
+    A recursive reference is expanded once more below itself and kept whole beyond that.
+    Whitelists of references are cached for reuse across operations, unless recursion or
+    the depth limit cut them short (then they depend on where they were reached).
+    """
+
+    def __init__(self, spec: Dict[str, Any], mode: str = "all", top_n: int = 0):
+        self.spec = spec
+        self.mode = mode
+        self.top_n = top_n
+        self._cache: Dict[str, FieldTree] = {}
+        self._cuts = 0
+
+    def compile(self, schema: Any, refs: Tuple[str, ...] = (), depth: int = 0) -> FieldTree:
+        if isinstance(schema, dict) and isinstance(schema.get("$ref"), str):
+            ref = schema["$ref"]
+            if ref in self._cache:
+                return self._cache[ref]
+            if refs.count(ref) >= 2:
+                self._cuts += 1
+                return None
+            cuts = self._cuts
+            tree = self.compile(deref(schema, self.spec), refs + (ref,), depth)
+            if self._cuts == cuts:
+                self._cache[ref] = tree
+            return tree
+        if not isinstance(schema, dict):
+            return None
+        if depth > MAX_DEPTH:
+            self._cuts += 1
+            return None
+        for combiner in ("allOf", "oneOf", "anyOf"):
+            if isinstance(schema.get(combiner), list) and schema[combiner]:
+                trees = [self.compile(part, refs, depth) for part in schema[combiner]]
+                if schema.get("properties"):
+                    trees.append(self.compile({k: v for k, v in schema.items() if k != combiner}, refs, depth))
+                merged = trees[0]
+                for tree in trees[1:]:
+                    merged = _merge(merged, tree)
+                return merged
+        if schema.get("type") == "array" or "items" in schema:
+            return self.compile(schema.get("items"), refs, depth + 1)
+        properties = schema.get("properties")
+        if not isinstance(properties, dict) or not properties or isinstance(schema.get("additionalProperties"), dict):
+            return None
+        names: List[str] = list(properties)
+        required = [name for name in schema.get("required") or [] if name in properties]
+        if self.mode == "required" and required:
+            names = required
+        if self.top_n:
+            names = (required + [name for name in names if name not in required])[:self.top_n]
+        return {name: self.compile(properties[name], refs, depth + 1) for name in names}
+
+
+def field_compiler(spec: Dict[str, Any]) -> FieldCompiler:
+    """A compiler for spec using the configured mode and top-N."""
+    mode = (getenv("RESPONSE_SCHEMA_FILTER_MODE") or "all").lower()
+    top_n = 0
+    raw = getenv("RESPONSE_SCHEMA_FILTER_TOP_N")
+    if raw:
+        try:
+            top_n = max(int(raw), 0)
+        except ValueError:
+            logger.warning(f"Invalid RESPONSE_SCHEMA_FILTER_TOP_N env var: {raw}. Ignoring.")
+    return FieldCompiler(spec, mode, top_n)
+
+
+def compile_response_fields(operation: Dict[str, Any], spec: Dict[str, Any],
+                            compiler: Optional[FieldCompiler] = None) -> FieldTree:
+    """
+    Compile the field whitelist of an operation. Pass one compiler for all operations of a
+    spec so shared component schemas are compiled once.
+    """
+    schema = response_schema(operation, spec)
+    if schema is None:
+        return None
+    return (compiler or field_compiler(spec)).compile(schema)
+
+
+def filter_fields(value: Any, fields: FieldTree) -> Any:
+    """Return value with only whitelisted fields, in a single pass."""
+    dropped = 0
+
+    def walk(node: Any, tree: FieldTree) -> Any:
+        nonlocal dropped
+        if tree is None:
+            return node
+        if isinstance(node, list):
+            return [walk(item, tree) for item in node]
+        if isinstance(node, dict):
+            kept = {key: walk(item, tree[key]) for key, item in node.items() if key in tree}
+            dropped += len(node) - len(kept)
+            return kept
+        return node
+
+    result = walk(value, fields)
+    metrics.increment("schema_filter.keys_dropped", dropped)
+    return result
@@ -0,0 +1,162 @@
+"""
+OpenAPI schema helpers for mcp-openapi-proxy.
+
+Resolves local JSON references ("#/components/schemas/Device") inside a spec, builds the
+JSON schema of an operation's request body, and interns schema fragments so that the tools
+of a large spec share one copy of each distinct fragment.
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import unquote
+
+from .logging_setup import logger
+
+
+def resolve_ref(spec: Dict[str, Any], ref: str) -> Optional[Any]:
+    """Return the node a local "#/..." reference points to, or None if it cannot be found."""
+    if not ref.startswith("#/"):
+        logger.debug(f"Cannot resolve non-local reference: {ref}")
+        return None
+    node: Any = spec
+    for part in ref[2:].split("/"):
+        part = unquote(part).replace("~1", "/").replace("~0", "~")
+        if isinstance(node, dict) and part in node:
+            node = node[part]
+        elif isinstance(node, list) and part.isdigit() and int(part) < len(node):
+            node = node[int(part)]
+        else:
+            logger.debug(f"Unresolvable reference: {ref}")
+            return None
+    return node
+
+
+def deref(schema: Any, spec: Dict[str, Any], max_hops: int = 32) -> Any:
+    """Follow $ref chains until a schema that is not a bare reference is reached."""
+    hops = 0
+    while isinstance(schema, dict) and isinstance(schema.get("$ref"), str) and hops < max_hops:
+        schema = resolve_ref(spec, schema["$ref"])
+        hops += 1
+    return schema
+
+
+# Tool argument carrying a request body that is not an object with properties.
+BODY_ARGUMENT = "body"
+
+# Media types whose request body schema becomes the tool's arguments, in order of preference.
+JSON_MEDIA_TYPES = ("application/json", "application/merge-patch+json", "application/json-patch+json")
+
+# Keywords of an allOf part merged into the combined schema.
+_MERGED_KEYWORDS = ("properties", "required")
+
+
+def inline_refs(schema: Any, spec: Dict[str, Any], seen: Tuple[str, ...] = ()) -> Any:
+    """
+    Copy of schema with local $refs replaced by their targets and allOf merged into one
+    schema. A reference back to a schema being expanded becomes a plain object schema.
+    """
+    if isinstance(schema, list):
+        return [inline_refs(item, spec, seen) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    ref = schema.get("$ref")
+    if isinstance(ref, str):
+        if ref in seen:
+            return {"type": "object"}
+        target = resolve_ref(spec, ref)
+        if target is None:
+            return {"type": "object"}
+        resolved = inline_refs(target, spec, seen + (ref,))
+        # Siblings of $ref (OpenAPI 3.1) refine the target, e.g. with a description.
+        siblings = {key: inline_refs(value, spec, seen) for key, value in schema.items() if key != "$ref"}
+        return {**resolved, **siblings} if isinstance(resolved, dict) else resolved
+    result = {key: inline_refs(value, spec, seen) for key, value in schema.items()}
+    if isinstance(result.get("allOf"), list) and all(isinstance(part, dict) for part in result["allOf"]):
+        result = merge_all_of(result)
+    return result
+
+
+def merge_all_of(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Combine the parts of an allOf into the schema itself: properties and required are unioned."""
+    merged = {key: value for key, value in schema.items() if key != "allOf"}
+    properties: Dict[str, Any] = dict(merged.get("properties") or {})
+    required: List[str] = list(merged.get("required") or [])
+    for part in schema["allOf"]:
+        properties.update(part.get("properties") or {})
+        required.extend(name for name in part.get("required") or [] if name not in required)
+        for key, value in part.items():
+            if key not in _MERGED_KEYWORDS:
+                merged.setdefault(key, value)
+    if properties:
+        merged["properties"] = properties
+        merged.setdefault("type", "object")
+    if required:
+        merged["required"] = required
+    return merged
+
+
+def request_body_schema(operation: Dict[str, Any], spec: Dict[str, Any]) -> Tuple[Optional[Any], bool]:
+    """
+    The fully resolved JSON schema of an operation's request body, and whether the body is
+    required. Reads OpenAPI 3 requestBody (itself possibly a $ref) and Swagger 2 "in: body"
+    parameters; the body's description is kept on the schema if it has none of its own.
+    Returns (None, False) if the operation takes no JSON body.
+    """
+    request_body = deref(operation.get("requestBody"), spec)
+    if isinstance(request_body, dict) and isinstance(request_body.get("content"), dict):
+        content = request_body["content"]
+        media = next((content[name] for name in JSON_MEDIA_TYPES if name in content), None)
+        if media is None:
+            media = next((value for name, value in content.items() if name.endswith("+json")), None)
+        if isinstance(media, dict) and "schema" in media:
+            return _described(inline_refs(media["schema"], spec), request_body), bool(request_body.get("required", False))
+        return None, False
+    for parameter in operation.get("parameters") or []:
+        parameter = deref(parameter, spec)
+        if isinstance(parameter, dict) and parameter.get("in") == "body" and "schema" in parameter:
+            return _described(inline_refs(parameter["schema"], spec), parameter), bool(parameter.get("required", False))
+    return None, False
+
+
+def _described(schema: Any, source: Dict[str, Any]) -> Any:
+    if isinstance(schema, dict) and "description" not in schema and isinstance(source.get("description"), str):
+        return {"description": source["description"], **schema}
+    return schema
+
+
+class SchemaInterner:
+    """
+    Keeps one shared instance of each structurally identical schema fragment.
+
+    Fragments are interned bottom-up: a fragment's key is built from its children's small
+    keys, so each fragment is hashed once however deeply it is nested. Interned fragments
+    are shared between tools and must not be modified.
+    """
+
+    def __init__(self) -> None:
+        self._fragments: Dict[Hashable, Tuple[Any, int]] = {}
+        self.shared = 0
+
+    def intern(self, value: Any) -> Any:
+        return self._intern(value)[0]
+
+    def _intern(self, value: Any) -> Tuple[Any, Hashable]:
+        if isinstance(value, dict):
+            children = [(name,) + self._intern(item) for name, item in value.items()]
+            key: Hashable = ("object",) + tuple((name, child_key) for name, _, child_key in children)
+            found = self._fragments.get(key)
+            fragment = found[0] if found else {name: child for name, child, _ in children}
+        elif isinstance(value, list):
+            items = [self._intern(item) for item in value]
+            key = ("array",) + tuple(child_key for _, child_key in items)
+            found = self._fragments.get(key)
+            fragment = found[0] if found else [child for child, _ in items]
+        else:
+            return value, (type(value).__name__, value)
+        if found:
+            self.shared += 1
+            return fragment, ("#", found[1])
+        self._fragments[key] = (fragment, len(self._fragments))
+        return fragment, ("#", len(self._fragments) - 1)
+
+    def __len__(self) -> int:
+        return len(self._fragments)
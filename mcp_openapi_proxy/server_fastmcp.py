@@ -8,14 +8,25 @@ Configuration is controlled via environment variables:
 - OPENAPI_PORT: Port to run the FastMCP server on (default is 8000).
 - IGNORE_SSL_TOOLS: If true, skips SSL verification for tools that require it.
 - API_KEY: Generic token for Bearer header.
+- UPSTREAM_HTTP2: If true, multiplexes concurrent calls over HTTP/2 (needs the 'h2' package).
 """
 
 import os
+import json
 import httpx
 from fastmcp import FastMCP
 from fastmcp.server.openapi import RouteMap, MCPType
 from mcp_openapi_proxy.logging_setup import logger
 from mcp_openapi_proxy.openapi import fetch_openapi_spec
+from mcp_openapi_proxy import metrics
+from mcp_openapi_proxy.metrics import METRICS_URI
+from mcp_openapi_proxy.upstream import (
+    http2_requested,
+    http2_available,
+    httpx_limits,
+    pool_metrics,
+    trace_connections,
+)
 import sys
 
 # Logger is now configured in logging_setup.py, just use it
@@ -46,8 +57,30 @@ def run_simple_server():
     ignore_ssl_tools = os.getenv("IGNORE_SSL_TOOLS", "false").lower() in ("true", "1", "yes")
     api_key = os.environ.get("API_KEY")
     headers = {"Authorization": f"Bearer {api_key}"}
-    client = httpx.AsyncClient(base_url=openapi_endpoint, verify=not ignore_ssl_tools, headers=headers)
-    logger.debug(f"Using OpenAPI endpoint: {openapi_endpoint}")
+    http2 = http2_requested()
+    if http2 and not http2_available():
+        logger.warning("UPSTREAM_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1.")
+        http2 = False
+
+    async def trace_connections_async(event_name: str, info: dict) -> None:
+        trace_connections(event_name, info)
+
+    async def count_request(request: httpx.Request) -> None:
+        metrics.increment("upstream.requests")
+        request.extensions["trace"] = trace_connections_async
+
+    async def count_response(response: httpx.Response) -> None:
+        metrics.increment(f"upstream.requests.{response.http_version}")
+
+    client = httpx.AsyncClient(
+        base_url=openapi_endpoint,
+        verify=not ignore_ssl_tools,
+        headers=headers,
+        http2=http2,
+        limits=httpx_limits(),
+        event_hooks={"request": [count_request], "response": [count_response]},
+    )
+    logger.debug(f"Using OpenAPI endpoint: {openapi_endpoint} (http2={http2})")
     try:
         logger.debug("Starting eCloudTech MCP server (FastMCP version)...")
         # Restore pre-2.8.0 semantic mapping
@@ -97,6 +130,12 @@ def run_simple_server():
             route_maps=semantic_maps,
             name="eCloudTech MCP Gateway"
         )
+
+        @mcp.resource(METRICS_URI, name="proxy_metrics", mime_type="application/json")
+        def proxy_metrics() -> str:
+            """Upstream connection pool and request counters."""
+            return json.dumps(pool_metrics("httpx"), indent=2)
+
         mcp.run(transport="sse", host="0.0.0.0", port=int(openapi_port))
         # mcp.run(transport="stdio")
     except Exception as e:
@@ -5,6 +5,7 @@ This server dynamically registers functions (tools) based on an OpenAPI specific
 directly utilizing the spec for tool definitions and invocation.
 Configuration is controlled via environment variables:
 - OPENAPI_SPEC_URL: URL to the OpenAPI specification.
+- OPENAPI_SPECS_CONFIG: Optional JSON listing several specs to serve at once (see federation.py).
 - TOOL_WHITELIST: Comma-separated list of allowed endpoint paths.
 - SERVER_URL_OVERRIDE: Optional override for the base URL from the OpenAPI spec.
 - API_KEY: Generic token for Bearer header.
@@ -16,33 +17,71 @@ Configuration is controlled via environment variables:
 - ENABLE_TOOLS: Set to "false" to disable tools functionality (default: true).
 - ENABLE_RESOURCES: Set to "true" to enable resources functionality (default: false).
 - ENABLE_PROMPTS: Set to "true" to enable prompts functionality (default: false).
+- ENABLE_BATCH_TOOL: Set to "true" to add the batch_call meta-tool (see batch.py).
+- RESPONSE_TOKEN_BUDGET: Truncate responses to this many tokens and add the continue_result
+  tool (see truncation.py).
+- LIST_PAGE_SIZE: Page tools/list, resources/list and prompts/list with cursors (see listing.py).
 """
 
 import os
 import sys
 import asyncio
-import json
 import requests
 from typing import List, Dict, Any, Optional, cast
 import anyio
 from pydantic import AnyUrl
 
 from mcp import types
-from urllib.parse import unquote
+from urllib.parse import unquote, urlsplit
 from mcp.server.lowlevel import Server
 from mcp.server.models import InitializationOptions
 from mcp.server.stdio import stdio_server
 
+from mcp_openapi_proxy import jsonlib
 from mcp_openapi_proxy.utils import (
     setup_logging,
     normalize_tool_name,
     is_tool_whitelisted,
     fetch_openapi_spec,
-    build_base_url,
+    build_base_urls,
     handle_auth,
     strip_parameters,
     detect_response_type,
-    get_additional_headers
+    get_additional_headers,
+    getenv,
+)
+from mcp_openapi_proxy.rate_limit import RateLimitExceeded
+from mcp_openapi_proxy.upstream import choose_base_url, close_clients, send_request, pool_metrics, UpstreamUnavailable
+from mcp_openapi_proxy import metrics
+from mcp_openapi_proxy.metrics import METRICS_URI
+from mcp_openapi_proxy.hedging import hedged_send
+from mcp_openapi_proxy.warmup import candidate_urls, start_warmup
+from mcp_openapi_proxy.batch import BATCH_TOOL_NAME, batch_enabled, batch_tool, run_batch
+from mcp_openapi_proxy.pagination import pagination_enabled, paginate
+from mcp_openapi_proxy.projection import SELECT_ARGUMENT, ProjectionError, compile_expression, takes_select_argument
+from mcp_openapi_proxy.transform import transform_response
+from mcp_openapi_proxy.schema_filter import filter_fields
+from mcp_openapi_proxy.media import binary_result, body_size, is_binary_media_type, media_type
+from mcp_openapi_proxy.markup import condense_enabled, condense_response, markup_kind
+from mcp_openapi_proxy.offload import run_offloaded
+from mcp_openapi_proxy.streaming import stream_array, stream_enabled, streams_json
+from mcp_openapi_proxy.validation import validate_arguments, validation_enabled
+from mcp_openapi_proxy.listing import paginate_list, request_cursor
+from mcp_openapi_proxy.truncation import (
+    CONTINUE_TOOL_NAME,
+    continue_result,
+    continue_tool,
+    truncate_response,
+    truncation_enabled,
+)
+from mcp_openapi_proxy.spill import is_spill_uri, maybe_spill, read_spill_resource, spill_enabled, spill_resources
+from mcp_openapi_proxy.summarize import summarize_configured
+from mcp_openapi_proxy.openapi import operation_plans
+from mcp_openapi_proxy.federation import (
+    load_specs_config,
+    fetch_specs,
+    register_federated_functions,
+    spec_for_tool,
 )
 
 DEBUG = os.getenv("DEBUG", "").lower() in ("true", "1", "yes")
@@ -70,6 +109,13 @@ if ENABLE_RESOURCES:
             description="The raw OpenAPI specification JSON"
         )
     )
+    resources.append(
+        types.Resource(
+            name="proxy_metrics",
+            uri=AnyUrl(METRICS_URI),
+            description="Upstream connection pool and request counters"
+        )
+    )
 
 if ENABLE_PROMPTS:
     prompts.append(
@@ -87,16 +133,47 @@ openapi_spec_data: Optional[Dict[str, Any]] = None
 
 mcp = Server("OpenApiProxy-LowLevel")
 
+def progress_reporter():
+    """Return a callback sending MCP progress notifications for the current request, if it asked for them."""
+    try:
+        context = mcp.request_context
+    except LookupError:
+        return None
+    token = getattr(context.meta, "progressToken", None) if context.meta else None
+    if token is None:
+        return None
+
+    async def report(progress: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        await context.session.send_progress_notification(token, progress, total, message)
+    return report
+
+
 async def dispatcher_handler(request: types.CallToolRequest) -> types.CallToolResult:
     """
     Dispatcher handler that routes CallToolRequest to the appropriate function (tool).
     """
-    global openapi_spec_data
+    if request.params.name == BATCH_TOOL_NAME and BATCH_TOOL_NAME not in operation_plans \
+            and any(t.name == BATCH_TOOL_NAME for t in tools):
+        return await run_batch(request.params.arguments or {}, dispatcher_handler, {t.name for t in tools})
+    if request.params.name == CONTINUE_TOOL_NAME and CONTINUE_TOOL_NAME not in operation_plans \
+            and any(t.name == CONTINUE_TOOL_NAME for t in tools):
+        return continue_result(request.params.arguments or {})
+    federated = spec_for_tool(request.params.name)
+    if federated is None:
+        return await _dispatch_tool_call(request, openapi_spec_data)
+    with federated.activate():
+        return await _dispatch_tool_call(request, federated.spec_data)
+
+
+async def _dispatch_tool_call(request: types.CallToolRequest, spec_data: Optional[Dict[str, Any]]) -> types.CallToolResult:
+    """
+    Resolve the OpenAPI operation for a tool call against spec_data and forward it upstream.
+    """
     try:
         function_name = request.params.name
         logger.debug(f"Dispatcher received CallToolRequest for function: {function_name}")
-        logger.debug(f"API_KEY: {os.getenv('API_KEY', '<not set>')[:5] + '...' if os.getenv('API_KEY') else '<not set>'}")
-        logger.debug(f"STRIP_PARAM: {os.getenv('STRIP_PARAM', '<not set>')}")
+        logger.debug(f"API_KEY: {getenv('API_KEY', '<not set>')[:5] + '...' if getenv('API_KEY') else '<not set>'}")
+        logger.debug(f"STRIP_PARAM: {getenv('STRIP_PARAM', '<not set>')}")
         tool = next((t for t in tools if t.name == function_name), None)
         if not tool:
             logger.error(f"Unknown function requested: {function_name}")
@@ -104,16 +181,31 @@ async def dispatcher_handler(request: types.CallToolRequest) -> types.CallToolRe
                 content=[types.TextContent(type="text", text="Unknown function requested")],
                 isError=False,
             )
-        arguments = request.params.arguments or {}
+        arguments = dict(request.params.arguments or {})
+        # Only a `_select` the proxy advertised is a projection; otherwise it is left as sent.
+        select = arguments.pop(SELECT_ARGUMENT, None) if takes_select_argument(getattr(tool, "inputSchema", None)) else None
+        if select is not None:
+            try:
+                compile_expression(str(select))
+            except ProjectionError as e:
+                return types.CallToolResult(content=[types.TextContent(type="text", text=str(e))], isError=True)
         logger.debug(f"Raw arguments before processing: {arguments}")
-
-        if openapi_spec_data is None:
+        input_schema = getattr(tool, "inputSchema", None)
+        if validation_enabled() and isinstance(input_schema, dict):
+            problems = validate_arguments(function_name, input_schema, strip_parameters(arguments))
+            if problems is not None:
+                logger.warning(f"Rejected call to {function_name} before sending it upstream: {problems}")
+                return types.CallToolResult(content=[types.TextContent(type="text", text=problems)], isError=True)
+
+        if spec_data is None:
             return types.CallToolResult(
                 content=[types.TextContent(type="text", text="OpenAPI spec not loaded")],
                 isError=True,
             )
-        # Since we've checked openapi_spec_data is not None, cast it to Dict.
-        operation_details = lookup_operation_details(function_name, cast(Dict, openapi_spec_data))
+        # Prefer the call plan built at registration; fall back to scanning the spec.
+        operation_details = operation_plans.get(function_name)
+        if operation_details is None or operation_details.get("spec") is not spec_data:
+            operation_details = lookup_operation_details(function_name, spec_data)
         if not operation_details:
             logger.error(f"Could not find OpenAPI operation for function: {function_name}")
             return types.CallToolResult(
@@ -150,20 +242,19 @@ async def dispatcher_handler(request: types.CallToolRequest) -> types.CallToolRe
                 isError=False,
             )
 
-        base_url = build_base_url(cast(Dict, openapi_spec_data))
-        if not base_url:
+        base_urls = build_base_urls(spec_data)
+        if not base_urls:
             logger.critical("Failed to construct base URL from spec or SERVER_URL_OVERRIDE.")
             return types.CallToolResult(
                 content=[types.TextContent(type="text", text="No base URL defined in spec or SERVER_URL_OVERRIDE")],
                 isError=False,
             )
 
-        api_url = f"{base_url.rstrip('/')}/{path.lstrip('/')}"
         request_params = {}
         request_body = None
         if isinstance(parameters, dict):
             merged_params = []
-            path_item = openapi_spec_data.get("paths", {}).get(operation_details["original_path"], {})
+            path_item = spec_data.get("paths", {}).get(operation_details["original_path"], {})
             if isinstance(path_item, dict) and "parameters" in path_item:
                 merged_params.extend(path_item["parameters"])
             if "parameters" in operation:
@@ -183,39 +274,143 @@ async def dispatcher_handler(request: types.CallToolRequest) -> types.CallToolRe
                     )
             if method == "GET":
                 request_params = parameters
+            elif operation_details.get("body_argument"):
+                # The body is one argument; the others, bar path parameters, go in the query.
+                request_body = parameters.pop(operation_details["body_argument"], None)
+                request_params = {
+                    key: value for key, value in parameters.items()
+                    if "{" + key + "}" not in operation_details["original_path"]
+                }
             else:
                 request_body = parameters
         else:
             logger.debug("No valid parameters provided, proceeding without params/body")
 
+        try:
+            base_url = cast(str, choose_base_url(base_urls))
+        except UpstreamUnavailable as e:
+            logger.warning(f"All upstream circuits open; failing {function_name} fast")
+            return types.CallToolResult(
+                content=[types.TextContent(type="text", text=str(e))],
+                isError=True,
+            )
+
+        api_url = f"{base_url.rstrip('/')}/{path.lstrip('/')}"
         logger.debug(f"API Request - URL: {api_url}, Method: {method}")
         logger.debug(f"Headers: {headers}")
         logger.debug(f"Query Params: {request_params}")
         logger.debug(f"Request Body: {request_body}")
 
         try:
-            ignore_ssl_tools = os.getenv("IGNORE_SSL_TOOLS", "false").lower() in ("true", "1", "yes")
+            ignore_ssl_tools = getenv("IGNORE_SSL_TOOLS", "false").lower() in ("true", "1", "yes")
             verify_ssl_tools = not ignore_ssl_tools
             logger.debug(f"Sending API request with SSL verification: {verify_ssl_tools} (IGNORE_SSL_TOOLS={ignore_ssl_tools})")
-            response = requests.request(
-                method=method,
-                url=api_url,
-                headers=headers,
-                params=request_params if method == "GET" else None,
-                json=request_body if method != "GET" else None,
-                verify=verify_ssl_tools,
-            )
+
+            def send_to(url: str):
+                return send_request(
+                    url,
+                    path,
+                    function_name,
+                    method,
+                    headers,
+                    params=request_params if method == "GET" else (request_params or None),
+                    body=request_body if method != "GET" else None,
+                    verify=verify_ssl_tools,
+                )
+
+            if method == "GET":
+                response = await hedged_send(function_name, base_url, base_urls, send_to)
+            else:
+                response = await send_to(base_url)
             response.raise_for_status()
-            response_text = (response.text or "No response body").strip()
-            content, log_message = detect_response_type(response_text)
-            logger.debug(log_message)
-            # Expect content to be of a type that can be included as is.
-            final_content = [content]
+            if is_binary_media_type(media_type(response)):
+                return await asyncio.to_thread(binary_result, response, api_url, function_name)
+            paginated = None
+            condensed = None
+            streamed = None
+            kind = markup_kind(media_type(response)) if condense_enabled() else None
+            if kind is not None:
+                condensed = await asyncio.to_thread(condense_response, response, kind, function_name)
+            elif streams_json(media_type(response)) and stream_enabled(function_name):
+                streamed = await asyncio.to_thread(
+                    stream_array, response, function_name, operation_details["original_path"], select,
+                    operation_details.get("response_fields"),
+                )
+            elif method == "GET" and pagination_enabled(function_name):
+                async def fetch_page(page_url: str, page_params: Optional[Dict[str, Any]]):
+                    # paginate only hands over URLs under base_url, so every page shares its limiter and breaker.
+                    page = await send_request(
+                        base_url, page_url[len(base_url.rstrip("/")):], function_name, method, headers,
+                        params=page_params, verify=verify_ssl_tools,
+                    )
+                    page.raise_for_status()
+                    return page
+
+                response_fields = operation_details.get("response_fields")
+                paginated = await paginate(
+                    response, api_url, request_params, fetch_page, progress=progress_reporter(),
+                    page_filter=(lambda body: filter_fields(body, response_fields)) if response_fields is not None else None,
+                    base_url=base_url,
+                )
+            def render() -> List[Any]:
+                # Decoding and re-encoding the body is CPU-bound; large bodies are rendered off the loop.
+                if condensed is not None:
+                    response_text = condensed or "No response body"
+                elif paginated is not None:
+                    response_text = paginated
+                elif streamed is not None:
+                    response_text = streamed[0] or "No response body"
+                else:
+                    response_text = (response.text or "No response body").strip()
+                if streamed is not None and streamed[2]:
+                    # The elements went through the response stages as they were read.
+                    truncated = streamed[1]
+                else:
+                    response_text = transform_response(
+                        response_text, function_name, operation_details["original_path"], select,
+                        # Aggregated pages were filtered page by page.
+                        response_fields=operation_details.get("response_fields") if paginated is None else None,
+                    )
+                    response_text, truncated = truncate_response(response_text, function_name)
+                content, log_message = detect_response_type(response_text)
+                logger.debug(log_message)
+                spilled = maybe_spill(content.text, function_name, "application/json" if content.text[:1] in "[{" else "text/plain")
+                if spilled is not None:
+                    content = types.TextContent(type="text", text=jsonlib.dumps(spilled))
+                # Expect content to be of a type that can be included as is.
+                rendered = [content]
+                if truncated is not None:
+                    rendered.append(types.TextContent(type="text", text=jsonlib.dumps(truncated)))
+                return rendered
+
+            # A condensed or streamed body has been consumed; only an unread one is measured.
+            if condensed is not None:
+                render_size = len(condensed)
+            elif paginated is not None:
+                render_size = len(paginated)
+            elif streamed is not None:
+                render_size = len(streamed[0])
+            else:
+                render_size = body_size(response)
+            final_content = await run_offloaded(render, size=render_size)
+            content = final_content[0]
+        except ProjectionError as e:
+            logger.warning(f"Projection failed for {function_name}: {e}")
+            return types.CallToolResult(
+                content=[types.TextContent(type="text", text=str(e))],
+                isError=True,
+            )
+        except RateLimitExceeded as e:
+            logger.warning(f"Rate limit queue exceeded for {function_name}: {e}")
+            return types.CallToolResult(
+                content=[types.TextContent(type="text", text=str(e))],
+                isError=True,
+            )
         except requests.exceptions.RequestException as e:
             logger.error(f"API request failed: {e}")
             return types.CallToolResult(
                 content=[types.TextContent(type="text", text=str(e))],
-                isError=False,
+                isError=True,
             )
         logger.debug(f"Response content type: {content.type}")
         logger.debug(f"Response sent to client: {content.text}")
@@ -224,14 +419,15 @@ async def dispatcher_handler(request: types.CallToolRequest) -> types.CallToolRe
         logger.error(f"Unhandled exception in dispatcher_handler: {e}", exc_info=True)
         return types.CallToolResult(
             content=[types.TextContent(type="text", text=f"Internal error: {str(e)}")],
-            isError=False,
+            isError=True,
         )
 
 
 async def list_tools(request: types.ListToolsRequest) -> types.ListToolsResult:
     logger.debug("Handling list_tools request - start")
     logger.debug(f"Tools list length: {len(tools)}")
-    return types.ListToolsResult(tools=tools)
+    page, next_cursor = paginate_list(tools, request_cursor(request), "tools")
+    return types.ListToolsResult(tools=page, nextCursor=next_cursor)
 
 async def list_resources(request: types.ListResourcesRequest) -> types.ListResourcesResult:
     logger.debug("Handling list_resources request")
@@ -250,16 +446,33 @@ async def list_resources(request: types.ListResourcesRequest) -> types.ListResou
     class ResourcesHolder:
         pass
     result = ResourcesHolder()
-    result.resources = resources
+    listed = resources + spill_resources() if spill_enabled() or summarize_configured() else resources
+    # Spilled responses and summaries come and go with tool calls; only the static resources version the cursor.
+    result.resources, result.nextCursor = paginate_list(listed, request_cursor(request), "resources", stable=len(resources))
     return result
 
 
 async def read_resource(request: types.ReadResourceRequest) -> types.ReadResourceResult:
     logger.debug(f"START read_resource for URI: {request.params.uri}")
+    if is_spill_uri(str(request.params.uri)):
+        return read_spill_resource(str(request.params.uri))
+    if str(request.params.uri) == METRICS_URI:
+        return types.ReadResourceResult(
+            contents=[
+                types.TextResourceContents(
+                    uri=METRICS_URI,
+                    text=jsonlib.dumps({**metrics.snapshot(), **pool_metrics()}, indent=2),
+                    mimeType="application/json"
+                )
+            ]
+        )
     try:
         openapi_url = os.getenv("OPENAPI_SPEC_URL")
         logger.debug(f"Got OPENAPI_SPEC_URL: {openapi_url}")
-        if not openapi_url:
+        if os.getenv("OPENAPI_SPECS_CONFIG") and openapi_spec_data:
+            # Federated: there is no OPENAPI_SPEC_URL; the first spec, loaded at startup, backs the resource.
+            spec_data = openapi_spec_data
+        elif not openapi_url:
             logger.error("OPENAPI_SPEC_URL not set")
             return types.ReadResourceResult(
                 contents=[
@@ -269,9 +482,10 @@ async def read_resource(request: types.ReadResourceRequest) -> types.ReadResourc
                     )
                 ]
             )
-        logger.debug("Fetching spec...")
-        spec_data = fetch_openapi_spec(openapi_url)
-        logger.debug(f"Spec fetched: {spec_data is not None}")
+        else:
+            logger.debug("Fetching spec...")
+            spec_data = await run_offloaded(fetch_openapi_spec, openapi_url, pure=True)
+            logger.debug(f"Spec fetched: {spec_data is not None}")
         if not spec_data:
             logger.error("Failed to fetch OpenAPI spec")
             return types.ReadResourceResult(
@@ -283,7 +497,7 @@ async def read_resource(request: types.ReadResourceRequest) -> types.ReadResourc
                 ]
             )
         logger.debug("Dumping spec to JSON...")
-        spec_json = json.dumps(spec_data, indent=2)
+        spec_json = await run_offloaded(jsonlib.dumps, spec_data, indent=2, pure=True)
         logger.debug(f"Forcing spec JSON return: {spec_json[:50]}...")
         return types.ReadResourceResult(
             contents=[
@@ -309,7 +523,8 @@ async def read_resource(request: types.ReadResourceRequest) -> types.ReadResourc
 async def list_prompts(request: types.ListPromptsRequest) -> types.ListPromptsResult:
     logger.debug("Handling list_prompts request")
     logger.debug(f"Prompts list length: {len(prompts)}")
-    return types.ListPromptsResult(prompts=prompts)
+    page, next_cursor = paginate_list(prompts, request_cursor(request), "prompts")
+    return types.ListPromptsResult(prompts=page, nextCursor=next_cursor)
 
 
 async def get_prompt(request: types.GetPromptRequest) -> types.GetPromptResult:
@@ -382,38 +597,74 @@ async def start_server():
 def run_server():
     global openapi_spec_data
     try:
-        openapi_url = os.getenv('OPENAPI_SPEC_URL')
-        if not openapi_url:
-            logger.critical("OPENAPI_SPEC_URL environment variable is required but not set.")
-            sys.exit(1)
-        openapi_spec_data = fetch_openapi_spec(openapi_url)
-        if not openapi_spec_data:
-            logger.critical("Failed to fetch or parse OpenAPI specification from OPENAPI_SPEC_URL.")
-            sys.exit(1)
-        logger.debug("OpenAPI specification fetched successfully.")
-        if ENABLE_TOOLS:
-            from mcp_openapi_proxy.handlers import register_functions
-            register_functions(openapi_spec_data)
+        specs_config = os.getenv("OPENAPI_SPECS_CONFIG")
+        if specs_config:
+            federated_specs = fetch_specs(load_specs_config(specs_config))
+            if not federated_specs:
+                logger.critical("No spec listed in OPENAPI_SPECS_CONFIG could be fetched or parsed.")
+                sys.exit(1)
+            logger.debug(f"Federated specs fetched: {[spec.name for spec in federated_specs]}")
+            # The first spec backs the spec_file resource.
+            openapi_spec_data = federated_specs[0].spec_data
+            if ENABLE_TOOLS:
+                register_federated_functions(federated_specs)
+        else:
+            openapi_url = os.getenv('OPENAPI_SPEC_URL')
+            if not openapi_url:
+                logger.critical("OPENAPI_SPEC_URL environment variable is required but not set.")
+                sys.exit(1)
+            openapi_spec_data = fetch_openapi_spec(openapi_url)
+            if not openapi_spec_data:
+                logger.critical("Failed to fetch or parse OpenAPI specification from OPENAPI_SPEC_URL.")
+                sys.exit(1)
+            logger.debug("OpenAPI specification fetched successfully.")
+            if ENABLE_TOOLS:
+                from mcp_openapi_proxy.handlers import register_functions
+                register_functions(openapi_spec_data)
         logger.debug(f"Tools after registration: {[tool.name for tool in tools]}")
         if ENABLE_TOOLS and not tools:
             logger.critical("No valid tools registered. Shutting down.")
             sys.exit(1)
+        if ENABLE_TOOLS and batch_enabled():
+            if any(t.name == BATCH_TOOL_NAME for t in tools):
+                logger.warning(f"Not adding the {BATCH_TOOL_NAME} tool: the spec already defines a tool of that name.")
+            else:
+                tools.append(batch_tool())
+        if ENABLE_TOOLS and truncation_enabled():
+            if any(t.name == CONTINUE_TOOL_NAME for t in tools):
+                logger.warning(f"Not adding the {CONTINUE_TOOL_NAME} tool: the spec already defines a tool of that name.")
+            else:
+                tools.append(continue_tool())
         if ENABLE_TOOLS:
             mcp.request_handlers[types.ListToolsRequest] = list_tools
             mcp.request_handlers[types.CallToolRequest] = dispatcher_handler
-        if ENABLE_RESOURCES:
+        if ENABLE_RESOURCES or spill_enabled() or summarize_configured():
             mcp.request_handlers[types.ListResourcesRequest] = list_resources
             mcp.request_handlers[types.ReadResourceRequest] = read_resource
         if ENABLE_PROMPTS:
             mcp.request_handlers[types.ListPromptsRequest] = list_prompts
             mcp.request_handlers[types.GetPromptRequest] = get_prompt
         logger.debug("Handlers registered based on capabilities and enablement envvars.")
+        # Upstreams to warm, grouped by whether their spec verifies TLS.
+        warm_urls: Dict[bool, List[str]] = {}
+        if specs_config:
+            for spec in federated_specs:
+                with spec.activate():
+                    verify = getenv("IGNORE_SSL_TOOLS", "false").lower() not in ("true", "1", "yes")
+                    warm_urls.setdefault(verify, []).extend(candidate_urls(build_base_urls(spec.spec_data)))
+        else:
+            verify = getenv("IGNORE_SSL_TOOLS", "false").lower() not in ("true", "1", "yes")
+            warm_urls[verify] = candidate_urls(build_base_urls(openapi_spec_data))
+        for verify, urls in warm_urls.items():
+            start_warmup(urls, verify=verify)
         asyncio.run(start_server())
     except KeyboardInterrupt:
         logger.debug("MCP server shutdown initiated by user.")
     except Exception as e:
         logger.critical(f"Failed to start MCP server: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        close_clients()
 
 
 if __name__ == "__main__":
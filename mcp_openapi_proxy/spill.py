@@ -0,0 +1,271 @@
+"""
+Large response spilling for mcp-openapi-proxy.
+
+Tool responses larger than a threshold are kept server-side in a bounded LRU store instead of
+being inlined into the tool result. The tool returns a short preview plus a resource URI, and
+the client reads the body in byte ranges through read_resource:
+    proxy://responses/<id>?offset=0&length=65536
+Configuration is controlled via environment variables:
+- SPILL_THRESHOLD_BYTES: Responses larger than this are spilled (default: 0, never spill).
+- SPILL_STORE: "memory" (default) or "file" (temp files read through mmap).
+- SPILL_DIR: Directory for the file store (default: a new temporary directory).
+- SPILL_MAX_BYTES: Total bytes kept before the least recently used entries are evicted
+  (default: 268435456).
+- SPILL_MAX_ENTRIES: Entries kept before eviction (default: 100).
+- SPILL_PREVIEW_BYTES: Size of the inline preview (default: 2000).
+- SPILL_PAGE_BYTES: Range length served when a read gives no length (default: 65536).
+"""
+
+import os
+import mmap
+import uuid
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from mcp import types
+from pydantic import AnyUrl
+
+from . import metrics
+from .logging_setup import logger
+
+SPILL_URI_PREFIX = "proxy://responses/"
+
+
+def _int_env(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw:
+        try:
+            return max(int(raw), 0)
+        except ValueError:
+            logger.warning(f"Invalid {name} env var: {raw}. Ignoring.")
+    return default
+
+
+def _char_start(data, index: int) -> int:
+    """Move index back to the first byte of the UTF-8 character containing it."""
+    while 0 < index < len(data) and (data[index] & 0xC0) == 0x80:
+        index -= 1
+    return index
+
+
+class SpillEntry:
+    def __init__(self, entry_id: str, size: int, mime_type: str, tool_name: str):
+        self.entry_id = entry_id
+        self.size = size
+        self.mime_type = mime_type
+        self.tool_name = tool_name
+
+    @property
+    def uri(self) -> str:
+        return f"{SPILL_URI_PREFIX}{self.entry_id}"
+
+
+class SpillStore:
+    """
+    Bounded LRU store of response bodies, in memory or as files in a temp directory.
+
+    Ranges are byte offsets into the UTF-8 body. Both ends of a range are moved back to a
+    character boundary, so consecutive ranges never split or repeat a character.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024, max_entries: int = 100,
+                 directory: Optional[str] = None, owns_directory: bool = False):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.directory = directory
+        self.owns_directory = owns_directory
+        self._entries: "OrderedDict[str, SpillEntry]" = OrderedDict()
+        self._data: Dict[str, bytes] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SpillStore":
+        directory = None
+        owns_directory = False
+        if os.getenv("SPILL_STORE", "memory").lower() == "file":
+            directory = os.getenv("SPILL_DIR")
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            else:
+                directory = tempfile.mkdtemp(prefix="mcp-openapi-proxy-spill-")
+                owns_directory = True
+        return cls(
+            max_bytes=_int_env("SPILL_MAX_BYTES", 256 * 1024 * 1024),
+            max_entries=max(_int_env("SPILL_MAX_ENTRIES", 100), 1),
+            directory=directory,
+            owns_directory=owns_directory,
+        )
+
+    def _path(self, entry_id: str) -> str:
+        return os.path.join(self.directory or "", f"{entry_id}.body")
+
+    def put(self, data: bytes, mime_type: str = "application/json", tool_name: str = "") -> SpillEntry:
+        entry = SpillEntry(uuid.uuid4().hex, len(data), mime_type, tool_name)
+        if self.directory:
+            with open(self._path(entry.entry_id), "wb") as f:
+                f.write(data)
+        with self._lock:
+            if not self.directory:
+                self._data[entry.entry_id] = data
+            self._entries[entry.entry_id] = entry
+            self._bytes += entry.size
+            self._evict()
+        metrics.increment("spill.entries_stored")
+        metrics.increment("spill.bytes_stored", entry.size)
+        return entry
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            if len(self._entries) == 1:
+                break
+            entry_id, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self._data.pop(entry_id, None)
+            self._remove_file(entry_id)
+            metrics.increment("spill.entries_evicted")
+            logger.debug(f"Evicted spilled response {entry_id} ({entry.size} bytes)")
+
+    def _remove_file(self, entry_id: str) -> None:
+        if self.directory:
+            try:
+                os.remove(self._path(entry_id))
+            except OSError:
+                pass
+
+    def get(self, entry_id: str) -> Optional[SpillEntry]:
+        with self._lock:
+            entry = self._entries.get(entry_id)
+            if entry is not None:
+                self._entries.move_to_end(entry_id)
+            return entry
+
+    def read(self, entry_id: str, offset: int = 0, length: Optional[int] = None) -> Optional[Tuple[bytes, SpillEntry]]:
+        """Return the bytes of [offset, offset + length) of an entry, or None if it is gone."""
+        entry = self.get(entry_id)
+        if entry is None:
+            return None
+        end = entry.size if length is None else min(offset + length, entry.size)
+        if self.directory:
+            try:
+                with open(self._path(entry_id), "rb") as f:
+                    if entry.size == 0:
+                        return b"", entry
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                        return view[_char_start(view, offset):_char_start(view, end)], entry
+            except OSError as e:
+                logger.error(f"Could not read spilled response {entry_id}: {e}")
+                return None
+        with self._lock:
+            data = self._data.get(entry_id)
+        if data is None:
+            return None
+        return data[_char_start(data, offset):_char_start(data, end)], entry
+
+    def entries(self) -> List[SpillEntry]:
+        with self._lock:
+            return list(self._entries.values())
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry_id in self._entries:
+                self._remove_file(entry_id)
+            self._entries.clear()
+            self._data.clear()
+            self._bytes = 0
+        if self.directory and self.owns_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+
+_store: Optional[SpillStore] = None
+
+
+def spill_threshold() -> int:
+    return _int_env("SPILL_THRESHOLD_BYTES", 0)
+
+
+def spill_enabled() -> bool:
+    return spill_threshold() > 0
+
+
+def get_spill_store() -> SpillStore:
+    global _store
+    if _store is None:
+        _store = SpillStore.from_env()
+    return _store
+
+
+def reset_spill_store() -> None:
+    global _store
+    if _store is not None:
+        _store.clear()
+    _store = None
+
+
+def maybe_spill(text: str, tool_name: str, mime_type: str = "application/json") -> Optional[Dict[str, object]]:
+    """
+    Spill text if it exceeds SPILL_THRESHOLD_BYTES.
+    Returns the handle to send to the client instead of the body, or None to inline it.
+    """
+    threshold = spill_threshold()
+    if threshold <= 0 or len(text) <= threshold // 4:
+        return None
+    data = text.encode("utf-8")
+    if len(data) <= threshold:
+        return None
+    entry = get_spill_store().put(data, mime_type, tool_name)
+    preview_bytes = _int_env("SPILL_PREVIEW_BYTES", 2000)
+    preview = data[:_char_start(data, preview_bytes)].decode("utf-8")
+    logger.debug(f"Spilled {entry.size} byte response of {tool_name} to {entry.uri}")
+    return {
+        "resource": entry.uri,
+        "size": entry.size,
+        "mimeType": mime_type,
+        "preview": preview,
+        "truncated": True,
+        "hint": f"Read the full body with read_resource, in byte ranges: {entry.uri}?offset=0&length="
+                f"{_int_env('SPILL_PAGE_BYTES', 65536)}",
+    }
+
+
+def is_spill_uri(uri: str) -> bool:
+    return uri.startswith(SPILL_URI_PREFIX)
+
+
+def read_spill_resource(uri: str) -> types.ReadResourceResult:
+    """Serve a byte range of a spilled response."""
+    parts = urlsplit(uri)
+    entry_id = parts.path.strip("/")
+    query = parse_qs(parts.query)
+    try:
+        offset = max(int(query.get("offset", ["0"])[0]), 0)
+        length = max(int(query.get("length", [str(_int_env("SPILL_PAGE_BYTES", 65536))])[0]), 0)
+    except ValueError:
+        return types.ReadResourceResult(contents=[types.TextResourceContents(
+            uri=AnyUrl(uri), text="Invalid offset or length", mimeType="text/plain")])
+    result = get_spill_store().read(entry_id, offset, length)
+    if result is None:
+        return types.ReadResourceResult(contents=[types.TextResourceContents(
+            uri=AnyUrl(uri), text=f"Spilled response {entry_id} not found or evicted", mimeType="text/plain")])
+    chunk, entry = result
+    metrics.increment("spill.bytes_read", len(chunk))
+    return types.ReadResourceResult(contents=[types.TextResourceContents(
+        uri=AnyUrl(uri), text=bytes(chunk).decode("utf-8", errors="replace"), mimeType=entry.mime_type)])
+
+
+def spill_resources() -> List[types.Resource]:
+    """Resource descriptors of the responses currently held."""
+    return [
+        types.Resource(
+            name=f"response_{entry.entry_id}",
+            uri=AnyUrl(entry.uri),
+            description=f"Spilled response of {entry.tool_name} ({entry.size} bytes)",
+            mimeType=entry.mime_type,
+            size=entry.size,
+        )
+        for entry in get_spill_store().entries()
+    ]
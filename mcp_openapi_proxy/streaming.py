@@ -0,0 +1,245 @@
+"""
+Streaming array responses for mcp-openapi-proxy.
+
+For opted-in tools, a JSON response whose body is one top-level array is parsed element by
+element as it arrives instead of being read and decoded whole. Each element goes through
+schema filtering, projection and compaction on its own, and reading stops, closing the
+upstream connection, as soon as the token budget (RESPONSE_TOKEN_BUDGET) or
+RESPONSE_STREAM_MAX_ITEMS is reached. Memory then depends on the largest element and on the
+budget, not on the size of the upstream response. The result carries a note with the
+number of elements returned; as the rest was never read, it has no continuation token.
+Bodies that are not an array, and projections that do not apply element by element (e.g.
+"[*].id | [0]"), are read whole and take the usual path.
+Configuration is controlled via environment variables:
+- RESPONSE_STREAM_TOOLS: Comma-separated tool name patterns whose array responses are
+  streamed, e.g. "list_*,get_events". Tools with pagination or summarization are not.
+- RESPONSE_STREAM_MAX_ITEMS: Most elements returned from a streamed array (default: 0, no
+  limit).
+"""
+
+import re
+import codecs
+import json
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from . import jsonlib, metrics
+from .logging_setup import logger
+from .compaction import Compactor, compaction_enabled
+from .media import iter_body
+from .pagination import pagination_enabled
+from .projection import compile_expression, projection_expressions
+from .schema_filter import filter_fields
+from .summarize import summarize_enabled
+from .tabular import TabularEncoder, tabular_mode
+from .truncation import get_tokenizer, token_budget
+from .utils import getenv
+
+CHUNK_SIZE = 65536
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_MISSING = object()
+
+
+def stream_enabled(tool_name: str) -> bool:
+    patterns = [p.strip() for p in (getenv("RESPONSE_STREAM_TOOLS") or "").split(",") if p.strip()]
+    if not any(fnmatchcase(tool_name, pattern) for pattern in patterns):
+        return False
+    # Both need every element of the response.
+    return not pagination_enabled(tool_name) and not summarize_enabled(tool_name)
+
+
+def streams_json(mime_type: str) -> bool:
+    return mime_type == "application/json" or mime_type.endswith("+json")
+
+
+def max_items() -> int:
+    raw = getenv("RESPONSE_STREAM_MAX_ITEMS")
+    if raw:
+        try:
+            return max(int(raw), 0)
+        except ValueError:
+            logger.warning(f"Invalid RESPONSE_STREAM_MAX_ITEMS env var: {raw}. Ignoring.")
+    return 0
+
+
+def _element_wise(expression: str) -> bool:
+    """True if expression maps an array element by element, as "[*].id" or "[?x].{a: a}" do."""
+    node = compile_expression(expression).parsed
+    if node["type"] not in ("projection", "filter_projection"):
+        return False
+    left = node["children"][0]
+    if left["type"] == "flatten":
+        left = left["children"][0]
+    return left["type"] == "identity"
+
+
+class ArrayScanner:
+    """
+    Incremental reader of a top-level JSON array from a stream of byte chunks.
+
+    Elements are decoded one at a time with the standard library's raw_decode. An element
+    cut off at the end of the buffer is retried once at least twice as much text is pending,
+    so each byte is decoded a bounded number of times.
+    """
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")("replace")
+        self._decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def _read(self) -> bool:
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.eof = True
+            text = self._text.decode(b"", final=True)
+        else:
+            text = self._text.decode(chunk)
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def _peek(self) -> str:
+        """The next non-whitespace character, or "" at the end of the body."""
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._read():
+                return ""
+
+    def start(self) -> bool:
+        """Consume the opening bracket. False if the body is not an array."""
+        if self._peek() != "[":
+            return False
+        self.pos += 1
+        return True
+
+    def close(self) -> None:
+        """Stop reading, releasing the upstream connection."""
+        close = getattr(self._chunks, "close", None)
+        if close is not None:
+            close()
+
+    def rest(self) -> str:
+        """Everything not consumed yet, read to the end."""
+        while self._read():
+            pass
+        return self.buffer[self.pos:]
+
+    def _element(self) -> Any:
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                value = _MISSING
+            # A number at the end of the buffer may continue in the next chunk.
+            if value is not _MISSING and (end < len(self.buffer) or self.eof):
+                self.pos = end
+                return value
+            if self.eof:
+                raise ValueError(f"Invalid JSON array element at offset {self.pos}")
+            pending = len(self.buffer) - self.pos
+            while self._read() and len(self.buffer) - self.pos < 2 * pending:
+                pass
+
+    def items(self) -> Iterator[Any]:
+        """Yield the array's elements in order. Raises ValueError for malformed JSON."""
+        if self._peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            if not self._peek():
+                break
+            yield self._element()
+            char = self._peek()
+            if char == "]":
+                self.pos += 1
+                return
+            if char != ",":
+                break
+            self.pos += 1
+        raise ValueError(f"Invalid JSON array at offset {self.pos}")
+
+
+def stream_array(response: Any, tool_name: str, path: str, select: Optional[str] = None,
+                 response_fields: Optional[Dict[str, Any]] = None) -> Tuple[str, Optional[Dict[str, Any]], bool]:
+    """
+    Read a JSON array response element by element, applying the response stages to each.
+    Returns the body to send, a note if reading stopped early, and whether the body was
+    streamed; when it was not, the body is the raw text, for the usual stages to process.
+    Raises ProjectionError if `select` is not a valid expression.
+    """
+    expressions = projection_expressions(tool_name, path, select)
+    scanner = ArrayScanner(iter_body(response, CHUNK_SIZE))
+    if not all(_element_wise(e) for e in expressions) or not scanner.start():
+        text = scanner.rest()
+        scanner.close()
+        return text.strip(), None, False
+    compactor = Compactor.from_env() if compaction_enabled() else None
+    tabular = tabular_mode(tool_name, path)
+    budget = token_budget()
+    limit = max_items()
+    count = get_tokenizer()
+    # Room for the note, and for the brackets and separators.
+    available = max(budget - count(jsonlib.dumps(_note(0, "max_items"))), 1) if budget > 0 else 0
+    out: List[Any] = []
+    used = 2
+    stopped_by = None
+    read = 0
+    try:
+        for element in scanner.items():
+            read += 1
+            if response_fields is not None:
+                element = filter_fields(element, response_fields)
+            items = [element]
+            for expression in expressions:
+                items = compile_expression(expression).search(items)
+            for item in items:
+                if compactor is not None and isinstance(item, (dict, list)):
+                    item = compactor.compact(item, 1)
+                if limit and len(out) >= limit:
+                    stopped_by = "max_items"
+                    break
+                if available:
+                    size = count(jsonlib.dumps(item)) + 1
+                    if used + size > available and out:
+                        stopped_by = "budget"
+                        break
+                    used += size
+                out.append(item)
+            if stopped_by is not None:
+                break
+    except ValueError as e:
+        logger.warning(f"Stopped streaming {tool_name} response: {e}")
+        stopped_by = "invalid_json"
+    finally:
+        # Abandons the download if the array was not read to the end.
+        scanner.close()
+    data: Any = out
+    encoder = TabularEncoder.from_env(tabular) if tabular != "off" else None
+    if encoder is not None:
+        data = encoder.encode(data)
+        encoder.record()
+    if compactor is not None:
+        compactor.record()
+    metrics.increment("streaming.responses")
+    metrics.increment("streaming.elements_read", read)
+    if stopped_by is None:
+        return jsonlib.dumps(data), None, True
+    metrics.increment(f"streaming.stopped_by.{stopped_by}")
+    logger.debug(f"Stopped reading {tool_name} response after {read} elements ({stopped_by})")
+    return jsonlib.dumps(data), _note(len(out), stopped_by), True
+
+
+def _note(returned: int, stopped_by: str) -> Dict[str, Any]:
+    return {
+        "truncated": True,
+        "returned": returned,
+        "stopped_by": stopped_by,
+        "hint": "The rest of the upstream response was not read; narrow the request to see other items.",
+    }
@@ -0,0 +1,181 @@
+"""
+Statistical summarization for mcp-openapi-proxy.
+
+For opted-in tools, long arrays of numbers, and long arrays of records with numeric fields,
+are replaced by their statistics (count, min, max, mean, standard deviation, percentiles)
+and a short downsampled series. The statistics are computed with NumPy when it is installed
+and in pure Python otherwise. Each summarized array is kept whole in the spill store, and
+its summary names the resource through which read_resource serves it (see spill.py).
+Configuration is controlled via environment variables:
+- SUMMARIZE_TOOLS: Comma-separated tool name patterns to summarize, e.g. "get_metrics*".
+- SUMMARIZE_MIN_POINTS: Shortest array summarized (default: 1000).
+- SUMMARIZE_SERIES_POINTS: Points in the downsampled series, or records in the sample
+  (default: 50).
+- SUMMARIZE_PERCENTILES: Comma-separated percentiles reported (default: "5,25,50,75,95").
+"""
+
+import math
+import statistics
+from fnmatch import fnmatchcase
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from . import metrics
+from .logging_setup import logger
+from .utils import getenv
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised when numpy is not installed
+    np = None
+
+# Keeps a summarized array whole and returns the URI it can be read back from, if any.
+StoreRaw = Callable[[List[Any]], Optional[str]]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def summarize_enabled(tool_name: str) -> bool:
+    patterns = [p.strip() for p in (getenv("SUMMARIZE_TOOLS") or "").split(",") if p.strip()]
+    return any(fnmatchcase(tool_name, pattern) for pattern in patterns)
+
+
+def summarize_configured() -> bool:
+    """True if any tool is summarized, so the raw data resources must be served."""
+    return bool((getenv("SUMMARIZE_TOOLS") or "").strip())
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    """Linear interpolation between closest ranks, as numpy.percentile does by default."""
+    position = (len(ordered) - 1) * q / 100
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def numeric_stats(values: Sequence[float], percentiles: Sequence[float], points: int) -> Dict[str, Any]:
+    """
+    Statistics of a non-empty sequence of numbers, with a series of up to `points` bucket
+    means unless points is 0.
+    """
+    count = len(values)
+    buckets = min(points, count)
+    if np is not None:
+        array = np.asarray(values, dtype=float)
+        stats = {
+            "count": count,
+            "min": float(array.min()),
+            "max": float(array.max()),
+            "mean": float(array.mean()),
+            "stdev": float(array.std()),
+            "percentiles": dict(zip((f"p{q:g}" for q in percentiles), (float(v) for v in np.percentile(array, percentiles)))),
+        }
+        if buckets:
+            starts = np.arange(buckets) * count // buckets
+            sizes = np.diff(np.append(starts, count))
+            stats["series"] = (np.add.reduceat(array, starts) / sizes).tolist()
+    else:
+        ordered = sorted(values)
+        stats = {
+            "count": count,
+            "min": float(ordered[0]),
+            "max": float(ordered[-1]),
+            "mean": math.fsum(values) / count,
+            "stdev": statistics.pstdev(values) if count > 1 else 0.0,
+            "percentiles": {f"p{q:g}": float(_percentile(ordered, q)) for q in percentiles},
+        }
+        if buckets:
+            bounds = [i * count // buckets for i in range(buckets)] + [count]
+            stats["series"] = [math.fsum(values[a:b]) / (b - a) for a, b in zip(bounds, bounds[1:])]
+    if buckets:
+        stats["series_bucket"] = count / buckets
+    return stats
+
+
+class Summarizer:
+    """Replaces long numeric arrays in decoded JSON by their statistics."""
+
+    def __init__(self, min_points: int = 1000, points: int = 50,
+                 percentiles: Sequence[float] = (5, 25, 50, 75, 95),
+                 store_raw: Optional[StoreRaw] = None):
+        self.min_points = min_points
+        self.points = points
+        self.percentiles = tuple(percentiles)
+        self.store_raw = store_raw
+        self.arrays = 0
+        self.points_summarized = 0
+
+    @classmethod
+    def from_env(cls, store_raw: Optional[StoreRaw] = None) -> "Summarizer":
+        def int_env(name: str, default: int) -> int:
+            raw = getenv(name)
+            if raw:
+                try:
+                    return max(int(raw), 1)
+                except ValueError:
+                    logger.warning(f"Invalid {name} env var: {raw}. Ignoring.")
+            return default
+
+        percentiles = (5.0, 25.0, 50.0, 75.0, 95.0)
+        raw = getenv("SUMMARIZE_PERCENTILES")
+        if raw:
+            try:
+                percentiles = tuple(float(q) for q in raw.split(",") if q.strip())
+                if not all(0 <= q <= 100 for q in percentiles):
+                    raise ValueError(raw)
+            except ValueError:
+                logger.warning(f"Invalid SUMMARIZE_PERCENTILES env var: {raw}. Ignoring.")
+                percentiles = (5.0, 25.0, 50.0, 75.0, 95.0)
+        return cls(int_env("SUMMARIZE_MIN_POINTS", 1000), int_env("SUMMARIZE_SERIES_POINTS", 50), percentiles, store_raw)
+
+    def _summary(self, items: List[Any]) -> Optional[Dict[str, Any]]:
+        if all(_is_number(item) for item in items):
+            summary: Dict[str, Any] = {"summarized": True, **numeric_stats(items, self.percentiles, self.points)}
+        elif all(isinstance(item, dict) for item in items):
+            columns: Dict[str, List[float]] = {}
+            excluded = set()
+            for record in items:
+                for key, value in record.items():
+                    if _is_number(value):
+                        columns.setdefault(key, []).append(value)
+                    elif value is not None:
+                        excluded.add(key)
+            fields = {
+                key: numeric_stats(values, self.percentiles, 0)
+                for key, values in columns.items() if key not in excluded
+            }
+            if not fields:
+                return None
+            step = len(items) / min(self.points, len(items))
+            summary = {
+                "summarized": True,
+                "count": len(items),
+                "fields": fields,
+                "sample": [items[int(i * step)] for i in range(min(self.points, len(items)))],
+            }
+        else:
+            return None
+        raw = self.store_raw(items) if self.store_raw is not None else None
+        if raw:
+            summary["raw"] = raw
+        self.arrays += 1
+        self.points_summarized += len(items)
+        return summary
+
+    def summarize(self, value: Any) -> Any:
+        """Return value with every long numeric array replaced by its summary."""
+        if isinstance(value, dict):
+            return {key: self.summarize(item) for key, item in value.items()}
+        if not isinstance(value, list):
+            return value
+        if len(value) >= self.min_points:
+            summary = self._summary(value)
+            if summary is not None:
+                return summary
+        return [self.summarize(item) for item in value]
+
+    def record(self) -> None:
+        """Add this summarization's counts to the process-wide counters."""
+        metrics.increment("summarize.arrays", self.arrays)
+        metrics.increment("summarize.points", self.points_summarized)
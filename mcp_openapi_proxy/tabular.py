@@ -0,0 +1,129 @@
+"""
+Tabular encoding for mcp-openapi-proxy.
+
+Arrays of objects repeat every key in every element. This stage rewrites such arrays, at any
+depth of a JSON response, as a header plus value rows:
+    {"columns": ["id", "name"], "rows": [[1, "sw1"], [2, "sw2"]]}
+or, in the columnar format, as {"columns": {"id": [1, 2], "name": ["sw1", "sw2"]}}.
+Keys missing from an element become null. In "auto" mode an array is only rewritten when
+that makes it smaller by at least RESPONSE_TABULAR_MIN_SAVINGS.
+Configuration is controlled via environment variables:
+- RESPONSE_TABULAR: "off" (default), "auto", or "always" (rewrite every eligible array).
+- RESPONSE_TABULAR_OVERRIDES: JSON object mapping tool name patterns, or path patterns
+  starting with "/", to a mode, e.g. {"get_dcim_*": "always", "/status": "off"}.
+- RESPONSE_TABULAR_FORMAT: "rows" (default) or "columns".
+- RESPONSE_TABULAR_MIN_ROWS: Shortest array rewritten (default: 3).
+- RESPONSE_TABULAR_MIN_SAVINGS: Smallest size reduction, as a fraction, for "auto" mode to
+  rewrite an array (default: 0.2).
+"""
+
+import json
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from typing import Any, Dict, List, Tuple
+
+from . import jsonlib, metrics
+from .logging_setup import logger
+from .utils import getenv
+
+MODES = ("off", "auto", "always")
+
+
+@lru_cache(maxsize=16)
+def _parse_overrides(raw: str) -> Tuple[Tuple[str, str], ...]:
+    try:
+        config = json.loads(raw)
+    except ValueError:
+        logger.warning(f"Invalid RESPONSE_TABULAR_OVERRIDES env var: {raw}. Ignoring.")
+        return ()
+    if not isinstance(config, dict):
+        logger.warning("RESPONSE_TABULAR_OVERRIDES must be a JSON object. Ignoring.")
+        return ()
+    overrides = []
+    for pattern, mode in config.items():
+        if str(mode).lower() not in MODES:
+            logger.warning(f"Skipping RESPONSE_TABULAR_OVERRIDES entry '{pattern}': unknown mode {mode}")
+            continue
+        overrides.append((str(pattern), str(mode).lower()))
+    return tuple(overrides)
+
+
+def tabular_mode(tool_name: str, path: str) -> str:
+    """The encoding mode for a tool: its override if one matches, else RESPONSE_TABULAR."""
+    raw = getenv("RESPONSE_TABULAR_OVERRIDES")
+    if raw:
+        for pattern, mode in _parse_overrides(raw):
+            target = path if pattern.startswith("/") else tool_name
+            if fnmatchcase(target, pattern):
+                return mode
+    mode = (getenv("RESPONSE_TABULAR") or "off").lower()
+    if mode not in MODES:
+        logger.warning(f"Invalid RESPONSE_TABULAR env var: {mode}. Ignoring.")
+        return "off"
+    return mode
+
+
+class TabularEncoder:
+    """Rewrites arrays of objects as tables, innermost arrays first."""
+
+    def __init__(self, mode: str = "auto", layout: str = "rows", min_rows: int = 3, min_savings: float = 0.2):
+        self.mode = mode
+        self.layout = layout
+        self.min_rows = min_rows
+        self.min_savings = min_savings
+        self.arrays = 0
+        self.bytes_saved = 0
+
+    @classmethod
+    def from_env(cls, mode: str) -> "TabularEncoder":
+        layout = (getenv("RESPONSE_TABULAR_FORMAT") or "rows").lower()
+        if layout not in ("rows", "columns"):
+            logger.warning(f"Invalid RESPONSE_TABULAR_FORMAT env var: {layout}. Ignoring.")
+            layout = "rows"
+        min_rows = 3
+        raw = getenv("RESPONSE_TABULAR_MIN_ROWS")
+        if raw:
+            try:
+                min_rows = max(int(raw), 1)
+            except ValueError:
+                logger.warning(f"Invalid RESPONSE_TABULAR_MIN_ROWS env var: {raw}. Ignoring.")
+        min_savings = 0.2
+        raw = getenv("RESPONSE_TABULAR_MIN_SAVINGS")
+        if raw:
+            try:
+                min_savings = float(raw)
+            except ValueError:
+                logger.warning(f"Invalid RESPONSE_TABULAR_MIN_SAVINGS env var: {raw}. Ignoring.")
+        return cls(mode, layout, min_rows, min_savings)
+
+    def table(self, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        columns: Dict[str, None] = {}
+        for record in records:
+            columns.update(dict.fromkeys(record))
+        names = list(columns)
+        if self.layout == "columns":
+            return {"columns": {name: [record.get(name) for record in records] for name in names}}
+        return {"columns": names, "rows": [[record.get(name) for name in names] for record in records]}
+
+    def encode(self, value: Any) -> Any:
+        """Return value with every eligible array of objects rewritten as a table."""
+        if isinstance(value, dict):
+            return {key: self.encode(item) for key, item in value.items()}
+        if not isinstance(value, list):
+            return value
+        value = [self.encode(item) for item in value]
+        if len(value) < self.min_rows or not all(isinstance(item, dict) and item for item in value):
+            return value
+        table = self.table(value)
+        before = len(jsonlib.dumps(value))
+        saved = before - len(jsonlib.dumps(table))
+        if self.mode == "auto" and saved < before * self.min_savings:
+            return value
+        self.arrays += 1
+        self.bytes_saved += saved
+        return table
+
+    def record(self) -> None:
+        """Add this encoding's counts to the process-wide counters."""
+        metrics.increment("tabular.arrays", self.arrays)
+        metrics.increment("tabular.bytes_saved", self.bytes_saved)
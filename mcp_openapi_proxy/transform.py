@@ -0,0 +1,67 @@
+"""
+Response transformation for mcp-openapi-proxy.
+
+Runs the JSON-rewriting stages on a tool response with a single decode and a single encode:
+schema filtering (schema_filter.py), projection (projection.py), summarization
+(summarize.py), compaction (compaction.py), then tabular encoding (tabular.py). Bodies that are not JSON, and
+responses for which no stage is active, pass through untouched. The characters saved are
+counted as transform.bytes_saved in the proxy_metrics resource.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from . import jsonlib, metrics
+from .logging_setup import logger
+from .projection import projection_expressions, project
+from .compaction import Compactor, compaction_enabled
+from .schema_filter import filter_fields
+from .tabular import TabularEncoder, tabular_mode
+from .summarize import Summarizer, summarize_enabled
+from .spill import get_spill_store
+
+
+def transform_response(response_text: str, tool_name: str, path: str, select: Optional[str] = None,
+                       response_fields: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Apply the active response stages for tool_name to a response body.
+    response_fields is the operation's compiled schema whitelist, if schema filtering is on.
+    """
+    expressions = projection_expressions(tool_name, path, select)
+    compact = compaction_enabled()
+    tabular = tabular_mode(tool_name, path)
+    summarize = summarize_enabled(tool_name)
+    if not expressions and not compact and not summarize and tabular == "off" and response_fields is None:
+        return response_text
+    try:
+        data = jsonlib.loads(response_text)
+    except ValueError:
+        return response_text
+    if response_fields is not None:
+        data = filter_fields(data, response_fields)
+    if expressions:
+        data = project(data, expressions)
+    summarizer = None
+    if summarize:
+        def store_raw(items: List[Any]) -> str:
+            return get_spill_store().put(jsonlib.dumps(items).encode("utf-8"), "application/json", tool_name).uri
+
+        summarizer = Summarizer.from_env(store_raw)
+        data = summarizer.summarize(data)
+    compactor = Compactor.from_env() if compact else None
+    if compactor is not None:
+        data = compactor.compact(data)
+    encoder = TabularEncoder.from_env(tabular) if tabular != "off" else None
+    if encoder is not None:
+        data = encoder.encode(data)
+    transformed = jsonlib.dumps(data)
+    if summarizer is not None:
+        summarizer.record()
+    if compactor is not None:
+        compactor.record()
+    if encoder is not None:
+        encoder.record()
+    metrics.increment("transform.responses")
+    metrics.increment("transform.bytes_in", len(response_text))
+    metrics.increment("transform.bytes_saved", max(len(response_text) - len(transformed), 0))
+    logger.debug(f"Transformed {tool_name} response: {len(response_text)} -> {len(transformed)} chars")
+    return transformed
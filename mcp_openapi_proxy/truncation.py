@@ -0,0 +1,297 @@
+"""
+Token-budget truncation for mcp-openapi-proxy.
+
+Tool responses estimated above a token budget are cut down to fit it. JSON is cut at element
+boundaries only: the elements of a top-level array, of the longest array in a top-level
+object, or else the members of the object itself. Text is cut at line boundaries. The
+remainder stays in a bounded server-side cache, and the result carries a continuation token
+that the continue_result tool exchanges for the next slice, without calling the upstream API
+again. Tokens name a position, so retrying a continuation returns the same slice.
+Configuration is controlled via environment variables:
+- RESPONSE_TOKEN_BUDGET: Largest response, in estimated tokens, returned by one call
+  (default: 0, no budget).
+- RESPONSE_TOKENIZER: How tokens are counted: "bytes" (default) divides the length by
+  RESPONSE_BYTES_PER_TOKEN; "tiktoken" or "tiktoken:<encoding>" uses the optional tiktoken
+  package; "<module>:<function>" calls a local function taking text and returning a count.
+- RESPONSE_BYTES_PER_TOKEN: Bytes per token for the "bytes" estimate (default: 4).
+- CONTINUATION_MAX_ENTRIES: Truncated responses whose remainder is kept (default: 100).
+- CONTINUATION_MAX_BYTES: Total remainder bytes kept before the least recently used are
+  evicted (default: 67108864).
+"""
+
+import math
+import uuid
+import importlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from mcp import types
+
+from . import jsonlib, metrics
+from .logging_setup import logger
+from .utils import getenv
+
+CONTINUE_TOOL_NAME = "continue_result"
+
+Tokenizer = Callable[[str], int]
+
+# Assembly of a slice of parts: array elements, object members or lines of text.
+_ENCLOSURES = {"array": ("[", ", ", "]"), "object": ("{", ", ", "}"), "text": ("", "", "")}
+
+
+def _int_env(name: str, default: int) -> int:
+    raw = getenv(name)
+    if raw:
+        try:
+            return max(int(raw), 0)
+        except ValueError:
+            logger.warning(f"Invalid {name} env var: {raw}. Ignoring.")
+    return default
+
+
+def token_budget() -> int:
+    return _int_env("RESPONSE_TOKEN_BUDGET", 0)
+
+
+def truncation_enabled() -> bool:
+    return token_budget() > 0
+
+
+def budget_chars() -> int:
+    """The token budget as a length, using RESPONSE_BYTES_PER_TOKEN; 0 without a budget."""
+    return token_budget() * max(_int_env("RESPONSE_BYTES_PER_TOKEN", 4), 1)
+
+
+def _byte_estimate(bytes_per_token: int) -> Tokenizer:
+    return lambda text: math.ceil(len(text) / bytes_per_token)
+
+
+@lru_cache(maxsize=8)
+def _load_tokenizer(spec: str, bytes_per_token: int) -> Tokenizer:
+    fallback = _byte_estimate(bytes_per_token)
+    if spec in ("", "bytes"):
+        return fallback
+    if spec == "tiktoken" or spec.startswith("tiktoken:"):
+        try:
+            import tiktoken  # type: ignore
+        except ImportError:
+            logger.warning("RESPONSE_TOKENIZER is tiktoken but the tiktoken package is not installed. Estimating from bytes.")
+            return fallback
+        encoding = tiktoken.get_encoding(spec.partition(":")[2] or "cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    module_name, _, function_name = spec.partition(":")
+    try:
+        tokenizer = getattr(importlib.import_module(module_name), function_name)
+    except (ImportError, AttributeError, ValueError) as e:
+        logger.warning(f"Invalid RESPONSE_TOKENIZER env var: {spec} ({e}). Estimating from bytes.")
+        return fallback
+    return tokenizer
+
+
+def get_tokenizer() -> Tokenizer:
+    """The configured token counter."""
+    return _load_tokenizer(getenv("RESPONSE_TOKENIZER") or "bytes", max(_int_env("RESPONSE_BYTES_PER_TOKEN", 4), 1))
+
+
+class Remainder:
+    """The parts of a truncated response, held for continuation."""
+
+    def __init__(self, kind: str, parts: List[str], tool_name: str, budget: int, path: Optional[str]):
+        self.entry_id = uuid.uuid4().hex
+        self.kind = kind
+        self.parts = parts
+        self.tool_name = tool_name
+        self.budget = budget
+        self.path = path
+        self.size = sum(len(part) for part in parts)
+
+
+class ContinuationCache:
+    """Bounded LRU cache of truncated response remainders."""
+
+    def __init__(self, max_entries: int = 100, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Remainder]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ContinuationCache":
+        return cls(
+            max_entries=max(_int_env("CONTINUATION_MAX_ENTRIES", 100), 1),
+            max_bytes=_int_env("CONTINUATION_MAX_BYTES", 64 * 1024 * 1024),
+        )
+
+    def put(self, remainder: Remainder) -> None:
+        with self._lock:
+            self._entries[remainder.entry_id] = remainder
+            self._bytes += remainder.size
+            while len(self._entries) > 1 and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.size
+                metrics.increment("continuation.evicted")
+
+    def get(self, entry_id: str) -> Optional[Remainder]:
+        with self._lock:
+            remainder = self._entries.get(entry_id)
+            if remainder is not None:
+                self._entries.move_to_end(entry_id)
+            return remainder
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+_cache: Optional[ContinuationCache] = None
+
+
+def get_continuation_cache() -> ContinuationCache:
+    global _cache
+    if _cache is None:
+        _cache = ContinuationCache.from_env()
+    return _cache
+
+
+def reset_continuation_cache() -> None:
+    global _cache
+    if _cache is not None:
+        _cache.clear()
+    _cache = None
+
+
+def _text_parts(text: str, max_chars: int) -> List[str]:
+    """Lines of text, with lines longer than max_chars split into pieces of that size."""
+    parts: List[str] = []
+    for line in text.splitlines(keepends=True):
+        parts.extend(line[i:i + max_chars] for i in range(0, len(line), max_chars))
+    return parts
+
+
+def _split(text: str, max_chars: int) -> Tuple[str, List[str], Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Split a response into parts that may be cut between. Returns the kind of parts, the
+    parts, the key of the array cut inside a top-level object, and that object.
+    """
+    try:
+        data = jsonlib.loads(text)
+    except ValueError:
+        return "text", _text_parts(text, max_chars), None, None
+    if isinstance(data, list):
+        return "array", [jsonlib.dumps(item) for item in data], None, None
+    if isinstance(data, dict):
+        arrays = [key for key, value in data.items() if isinstance(value, list) and value]
+        if arrays:
+            key = max(arrays, key=lambda k: len(data[k]))
+            return "array", [jsonlib.dumps(item) for item in data[key]], key, data
+        return "object", [jsonlib.dumps({key: value})[1:-1] for key, value in data.items()], None, None
+    return "text", _text_parts(text, max_chars), None, None
+
+
+def _fit(parts: List[str], start: int, budget: int, count: Tokenizer) -> int:
+    """Index after the last part from start that fits budget. Always takes at least one part."""
+    used = 0
+    end = start
+    while end < len(parts):
+        used += count(parts[end]) + 1
+        if used > budget and end > start:
+            break
+        end += 1
+    return end
+
+
+def _note(remainder: Remainder, offset: int) -> Dict[str, Any]:
+    remaining = len(remainder.parts) - offset
+    note: Dict[str, Any] = {
+        "truncated": True,
+        "remaining": remaining,
+        "continuation_token": f"{remainder.entry_id}.{offset}",
+        "hint": f"Call {CONTINUE_TOOL_NAME} with this continuation_token for the next slice.",
+    }
+    if remainder.path:
+        note["path"] = remainder.path
+    return note
+
+
+def _assemble(kind: str, parts: List[str]) -> str:
+    opening, separator, closing = _ENCLOSURES[kind]
+    return opening + separator.join(parts) + closing
+
+
+def truncate_response(text: str, tool_name: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Fit a response body into the token budget. Returns the body to send and, if it was cut,
+    a note carrying the continuation token; otherwise the body unchanged and None.
+    """
+    budget = token_budget()
+    if budget <= 0 or len(text) <= budget:
+        return text, None
+    count = get_tokenizer()
+    if count(text) <= budget:
+        return text, None
+    kind, parts, path, document = _split(text, budget_chars())
+    # Room for the envelope and the note that tells the caller how to continue.
+    reserve = count(jsonlib.dumps({**document, path: []})) if document is not None else 0
+    reserve += count(jsonlib.dumps(_note(Remainder(kind, [], tool_name, budget, path), len(parts))))
+    end = _fit(parts, 0, max(budget - reserve, 1), count)
+    if end >= len(parts):
+        return text, None
+    remainder = Remainder(kind, parts, tool_name, budget, path)
+    get_continuation_cache().put(remainder)
+    if document is not None:
+        head = jsonlib.dumps({**document, path: document[path][:end]})
+    else:
+        head = _assemble(kind, parts[:end])
+    metrics.increment("truncation.responses")
+    metrics.increment("truncation.parts_deferred", len(parts) - end)
+    logger.debug(f"Truncated {tool_name} response to {end} of {len(parts)} {kind} parts for a budget of {budget} tokens")
+    return head, {"returned": end, **_note(remainder, end)}
+
+
+def continue_tool() -> types.Tool:
+    """The continue_result tool definition."""
+    return types.Tool(
+        name=CONTINUE_TOOL_NAME,
+        description=(
+            "Fetch the next slice of a response that was truncated to fit the token budget. "
+            "Pass the continuation_token from the truncated result; the upstream API is not called again."
+        ),
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "continuation_token": {"type": "string", "description": "Token from a truncated result."},
+            },
+            "required": ["continuation_token"],
+        },
+    )
+
+
+def continue_result(arguments: Dict[str, Any]) -> types.CallToolResult:
+    """Serve the slice named by a continuation token."""
+    token = str(arguments.get("continuation_token") or "")
+    entry_id, _, raw_offset = token.partition(".")
+    remainder = get_continuation_cache().get(entry_id)
+    try:
+        offset = int(raw_offset)
+    except ValueError:
+        remainder = None
+    if remainder is None or not 0 <= offset < len(remainder.parts):
+        metrics.increment("continuation.misses")
+        return types.CallToolResult(
+            content=[types.TextContent(type="text", text=f"Unknown or expired continuation token: {token}")],
+            isError=True,
+        )
+    count = get_tokenizer()
+    reserve = count(jsonlib.dumps(_note(remainder, len(remainder.parts))))
+    end = _fit(remainder.parts, offset, max(remainder.budget - reserve, 1), count)
+    metrics.increment("continuation.hits")
+    content = [types.TextContent(type="text", text=_assemble(remainder.kind, remainder.parts[offset:end]))]
+    if end < len(remainder.parts):
+        note = {"returned": end - offset, **_note(remainder, end)}
+        content.append(types.TextContent(type="text", text=jsonlib.dumps(note)))
+    logger.debug(f"Continued {remainder.tool_name} response with parts {offset}-{end} of {len(remainder.parts)}")
+    return types.CallToolResult(content=content, isError=False)
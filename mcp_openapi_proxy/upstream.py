@@ -0,0 +1,311 @@
+"""
+Upstream request execution for mcp-openapi-proxy.
+
+Wraps the HTTP call made for each tool invocation with the client-side rate limiter,
+the load balancer's endpoint bookkeeping and the per-upstream circuit breaker.
+Configuration is controlled via environment variables:
+- UPSTREAM_CLIENT: "requests" (default) or "httpx" (shared, pooled client).
+- UPSTREAM_HTTP2: Set to "true" to negotiate HTTP/2 so concurrent calls to one host share a
+  multiplexed connection. Implies UPSTREAM_CLIENT=httpx and needs the 'h2' package.
+- UPSTREAM_MAX_CONNECTIONS: Connection limit of the httpx pool (default: 100).
+- UPSTREAM_MAX_KEEPALIVE: Idle connections kept by the httpx pool (default: 20).
+"""
+
+import os
+import time
+import asyncio
+import functools
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import httpx
+import requests
+
+from . import jsonlib, metrics
+from .logging_setup import logger
+from .rate_limit import get_rate_limiter
+from .circuit_breaker import get_circuit_breakers
+from .load_balancer import get_load_balancer
+from .compression import accept_encoding, get_request_compression
+from .media import is_binary_media_type, media_type
+from .markup import streams_markup
+from .streaming import stream_enabled, streams_json
+
+
+class HttpxResponse:
+    """Presents an httpx response through the parts of the requests.Response API the proxy uses."""
+
+    def __init__(self, response: httpx.Response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.http_version = response.http_version
+
+    def read(self) -> bytes:
+        try:
+            return self._response.read()
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def iter_content(self, chunk_size: int = 65536) -> Iterator[bytes]:
+        try:
+            yield from self._response.iter_bytes(chunk_size)
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    @property
+    def content(self) -> bytes:
+        return self.read()
+
+    @property
+    def text(self) -> str:
+        self.read()
+        return self._response.text
+
+    @property
+    def reason(self) -> str:
+        return self._response.reason_phrase
+
+    def json(self) -> Any:
+        self.read()
+        return self._response.json()
+
+    def raise_for_status(self) -> None:
+        try:
+            self._response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            raise requests.exceptions.HTTPError(str(e), response=self) from e  # type: ignore[arg-type]
+
+    def close(self) -> None:
+        self._response.close()
+
+
+_httpx_clients: Dict[bool, httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+
+def _int_env(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw:
+        try:
+            return int(raw)
+        except ValueError:
+            logger.warning(f"Invalid {name} env var: {raw}. Ignoring.")
+    return default
+
+
+def http2_requested() -> bool:
+    return os.getenv("UPSTREAM_HTTP2", "false").lower() in ("true", "1", "yes")
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def use_httpx() -> bool:
+    return http2_requested() or os.getenv("UPSTREAM_CLIENT", "requests").lower() == "httpx"
+
+
+def httpx_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=_int_env("UPSTREAM_MAX_CONNECTIONS", 100),
+        max_keepalive_connections=_int_env("UPSTREAM_MAX_KEEPALIVE", 20),
+    )
+
+
+def get_httpx_client(verify: bool = True) -> httpx.Client:
+    """Return the shared pooled httpx client for the given SSL verification setting."""
+    with _clients_lock:
+        client = _httpx_clients.get(verify)
+        if client is None:
+            http2 = http2_requested()
+            if http2 and not http2_available():
+                logger.warning("UPSTREAM_HTTP2 is set but the 'h2' package is not installed; using HTTP/1.1.")
+                http2 = False
+            # No timeout, matching requests' default behaviour.
+            client = httpx.Client(http2=http2, verify=verify, limits=httpx_limits(), timeout=None)
+            _httpx_clients[verify] = client
+            logger.debug(f"Created upstream httpx client (http2={http2}, verify={verify})")
+        return client
+
+
+def close_clients() -> None:
+    """Close and forget the shared upstream clients."""
+    with _clients_lock:
+        for client in _httpx_clients.values():
+            client.close()
+        _httpx_clients.clear()
+
+
+def trace_connections(event_name: str, info: Dict[str, Any]) -> None:
+    """httpcore trace hook counting newly opened upstream connections."""
+    if event_name == "connection.connect_tcp.complete":
+        metrics.increment("upstream.connections_opened")
+
+
+def _streams_body(mime_type: str, stream_json: bool = False) -> bool:
+    return is_binary_media_type(mime_type) or streams_markup(mime_type) or (stream_json and streams_json(mime_type))
+
+
+def _send_blocking(method: str, url: str, headers: Dict[str, str], params: Optional[Dict[str, Any]],
+                   body: Optional[Any], verify: bool, data: Optional[bytes] = None, stream_json: bool = False) -> Any:
+    if not any(name.lower() == "accept-encoding" for name in headers):
+        headers = {**headers, "Accept-Encoding": accept_encoding()}
+    # A pre-encoded (compressed) body replaces the JSON one. With JSON_COMPACT the body is
+    # encoded by the proxy's JSON backend; otherwise by the HTTP client, as it always was.
+    if data is None and body is not None and jsonlib.COMPACT:
+        data = jsonlib.dumps_bytes(body)
+        if not any(name.lower() == "content-type" for name in headers):
+            headers = {**headers, "Content-Type": "application/json"}
+    # Bodies are streamed: textual ones are read here as before, binary ones are left for
+    # media.binary_result to read as bytes under its size cap, markup that is condensed
+    # for markup.condense_response to parse as it arrives, and JSON of streamed tools for
+    # streaming.stream_array to read element by element.
+    if not use_httpx():
+        payload: Dict[str, Any] = {"data": data} if data is not None else {"json": body}
+        response = requests.request(
+            method=method,
+            url=url,
+            headers=headers,
+            params=params,
+            verify=verify,
+            stream=True,
+            **payload,
+        )
+        # requests.request uses a throwaway session, so every call opens its own connection.
+        metrics.increment("upstream.connections_opened")
+        metrics.increment("upstream.requests.HTTP/1.1")
+        if isinstance(response, requests.Response) and (not _streams_body(media_type(response), stream_json) or not response.ok):
+            response.content  # Reads and caches the body, releasing the connection.
+        return response
+    try:
+        payload = {"content": data} if data is not None else {"json": body}
+        client = get_httpx_client(verify)
+        request = client.build_request(
+            method,
+            url,
+            headers=headers,
+            params=params,
+            extensions={"trace": trace_connections},
+            **payload,
+        )
+        raw_response = client.send(request, stream=True)
+    except httpx.TimeoutException as e:
+        raise requests.exceptions.Timeout(str(e)) from e
+    except httpx.TransportError as e:
+        raise requests.exceptions.ConnectionError(str(e)) from e
+    metrics.increment(f"upstream.requests.{raw_response.http_version}")
+    response = HttpxResponse(raw_response)
+    if not _streams_body(media_type(response), stream_json) or raw_response.is_error:
+        response.read()
+    return response
+
+
+def pool_metrics(client_name: Optional[str] = None) -> Dict[str, Any]:
+    """Upstream request and connection counters, for comparing HTTP/1.1 against HTTP/2."""
+    stats: Dict[str, Any] = dict(metrics.snapshot("upstream."))
+    requests_sent = stats.get("upstream.requests", 0)
+    if requests_sent:
+        stats["upstream.requests_per_connection"] = requests_sent / max(stats.get("upstream.connections_opened", 0), 1)
+        stats["upstream.mean_latency_seconds"] = stats.get("upstream.latency_seconds_total", 0) / requests_sent
+    stats["upstream.client"] = client_name or ("httpx" if use_httpx() else "requests")
+    stats["upstream.http2"] = http2_requested() and http2_available()
+    return stats
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when every candidate base URL has an open circuit."""
+
+    def __init__(self, base_url: str, retry_in: float):
+        super().__init__(f"Upstream unavailable: circuit open for {base_url}; retry in {retry_in:.0f}s")
+        self.base_url = base_url
+        self.retry_in = retry_in
+
+
+def choose_base_url(base_urls: List[str], exclude: Iterable[str] = ()) -> Optional[str]:
+    """
+    Pick the base URL for the next call, skipping endpoints whose circuit is open.
+    Returns None when no candidate remains; raises UpstreamUnavailable when all are open.
+    """
+    balancer = get_load_balancer()
+    breakers = get_circuit_breakers()
+    tried = list(exclude)
+    open_breaker = None
+    while True:
+        candidate = balancer.choose(base_urls, exclude=tried)
+        if candidate is None:
+            break
+        breaker = breakers.get(candidate)
+        if breaker is None or breaker.allow():
+            return candidate
+        tried.append(candidate)
+        open_breaker = breaker
+    if open_breaker is not None:
+        raise UpstreamUnavailable(open_breaker.name, open_breaker.retry_in())
+    return None
+
+
+async def send_request(
+    base_url: str,
+    path: str,
+    tool_name: str,
+    method: str,
+    headers: Dict[str, str],
+    params: Optional[Dict[str, Any]] = None,
+    body: Optional[Any] = None,
+    verify: bool = True,
+) -> Any:
+    """
+    Send one upstream request to base_url + path and return the response.
+
+    Waits on the rate limiter first and retries once when the upstream answers 429 with a
+    short Retry-After. Connection errors, timeouts and 5xx responses count as failures for
+    both the load balancer and the circuit breaker. HTTP errors are left to the caller.
+    """
+    limiter = get_rate_limiter()
+    balancer = get_load_balancer()
+    breaker = get_circuit_breakers().get(base_url)
+    api_url = f"{base_url.rstrip('/')}/{path.lstrip('/')}"
+    headers, data = get_request_compression().encode(tool_name, headers, body)
+    stream_json = stream_enabled(tool_name)
+    ok: Optional[bool] = None
+    started = time.monotonic()
+    balancer.start(base_url)
+    try:
+        for attempt in range(2):
+            await limiter.acquire(base_url, tool_name)
+            started = time.monotonic()
+            metrics.increment("upstream.requests")
+            metrics.track_peak("upstream.in_flight_peak", metrics.increment("upstream.in_flight"))
+            try:
+                # The clients are blocking; run them off the event loop so concurrent calls overlap.
+                response = await asyncio.to_thread(functools.partial(
+                    _send_blocking, method, api_url, headers, params, body, verify, data, stream_json
+                ))
+            finally:
+                metrics.increment("upstream.in_flight", -1)
+                metrics.increment("upstream.latency_seconds_total", time.monotonic() - started)
+            retry_after = limiter.observe(
+                base_url, tool_name, getattr(response, "status_code", None), getattr(response, "headers", None)
+            )
+            if retry_after is None or attempt > 0:
+                break
+            logger.warning(f"Upstream returned 429 for {tool_name}; retrying after {retry_after:.1f}s")
+        status_code = getattr(response, "status_code", None)
+        ok = status_code is None or status_code < 500
+        return response
+    except requests.exceptions.RequestException:
+        ok = False
+        raise
+    finally:
+        balancer.finish(base_url, time.monotonic() - started, ok)
+        if breaker and ok is not None:
+            if ok:
+                breaker.record_success()
+            else:
+                breaker.record_failure()
@@ -8,12 +8,38 @@ import sys
 import json
 import requests
 import yaml
-from typing import Dict, Optional, Tuple, List, Union
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional, Tuple, List, Union
 from mcp import types
 
 # Import the configured logger
+from . import jsonlib
 from .logging_setup import logger
 
+# Setting overrides for the spec currently being served (see federation.py).
+_spec_settings: ContextVar[Optional[Dict[str, str]]] = ContextVar("spec_settings", default=None)
+
+def getenv(name: str, default: Optional[str] = None) -> Optional[str]:
+    """
+    Read a setting, preferring the active spec's overrides over the process environment.
+    """
+    overrides = _spec_settings.get()
+    if overrides is not None and name in overrides:
+        return overrides[name]
+    return os.getenv(name, default)
+
+@contextmanager
+def spec_settings(settings: Optional[Dict[str, str]]) -> Iterator[None]:
+    """
+    Apply per-spec setting overrides for the duration of the block (and tasks it spawns).
+    """
+    token = _spec_settings.set(settings)
+    try:
+        yield
+    finally:
+        _spec_settings.reset(token)
+
 def setup_logging(debug: bool = False):
     """
     Configure logging for the application.
@@ -61,14 +87,14 @@ def normalize_tool_name(raw_name: str, max_length: Optional[int] = None) -> str:
         tool_name = re.sub(r"_+", "_", tool_name).strip("_")
 
         # Apply TOOL_NAME_PREFIX if set
-        tool_name_prefix = os.getenv("TOOL_NAME_PREFIX", "")
+        tool_name_prefix = getenv("TOOL_NAME_PREFIX", "")
         if tool_name_prefix:
             tool_name = f"{tool_name_prefix}{tool_name}"
 
         # Determine the effective custom max length based on env var and argument
         effective_max_length: Optional[int] = max_length
         if effective_max_length is None:
-            max_length_env = os.getenv("TOOL_NAME_MAX_LENGTH")
+            max_length_env = getenv("TOOL_NAME_MAX_LENGTH")
             if max_length_env:
                 try:
                     parsed_max_length = int(max_length_env)
@@ -123,7 +149,7 @@ def fetch_openapi_spec(url: str, retries: int = 3) -> Optional[Dict]:
             if url.startswith("file://"):
                 with open(url[7:], "r") as f:
                     content = f.read()
-                spec_format = os.getenv("OPENAPI_SPEC_FORMAT", "json").lower()
+                spec_format = getenv("OPENAPI_SPEC_FORMAT", "json").lower()
                 logger.debug(f"Using {spec_format.upper()} parser based on OPENAPI_SPEC_FORMAT env var")
                 if spec_format == "yaml":
                     try:
@@ -134,14 +160,14 @@ def fetch_openapi_spec(url: str, retries: int = 3) -> Optional[Dict]:
                         return None
                 else:
                     try:
-                        spec = json.loads(content)
+                        spec = jsonlib.loads(content)
                         logger.debug(f"Parsed as JSON from {url}")
                     except json.JSONDecodeError as je:
                         logger.error(f"JSON parsing failed: {je}. Raw content: {content[:500]}...")
                         return None
             else:
                 # Check IGNORE_SSL_SPEC env var
-                ignore_ssl_spec = os.getenv("IGNORE_SSL_SPEC", "false").lower() in ("true", "1", "yes")
+                ignore_ssl_spec = getenv("IGNORE_SSL_SPEC", "false").lower() in ("true", "1", "yes")
                 verify_ssl_spec = not ignore_ssl_spec
                 logger.debug(f"Fetching spec with SSL verification: {verify_ssl_spec} (IGNORE_SSL_SPEC={ignore_ssl_spec})")
                 response = requests.get(url, timeout=10, verify=verify_ssl_spec)
@@ -149,7 +175,7 @@ def fetch_openapi_spec(url: str, retries: int = 3) -> Optional[Dict]:
                 content = response.text
                 logger.debug(f"Fetched content length: {len(content)} bytes")
                 try:
-                    spec = json.loads(content)
+                    spec = jsonlib.loads(content)
                     logger.debug(f"Parsed as JSON from {url}")
                 except json.JSONDecodeError:
                     try:
@@ -181,26 +207,33 @@ def build_base_url(spec: Dict) -> Optional[str]:
     """
     Construct the base URL from the OpenAPI spec or override.
     """
-    override = os.getenv("SERVER_URL_OVERRIDE")
+    urls = build_base_urls(spec)
+    return urls[0] if urls else None
+
+
+def build_base_urls(spec: Dict) -> List[str]:
+    """
+    Collect every candidate base URL, in order, from SERVER_URL_OVERRIDE or the spec.
+    """
+    override = getenv("SERVER_URL_OVERRIDE")
     if override:
         urls = [url.strip() for url in override.split(",")]
-        for url in urls:
-            if url.startswith("http://") or url.startswith("https://"):
-                logger.debug(f"SERVER_URL_OVERRIDE set, using first valid URL: {url}")
-                return url
+        valid_urls = [url for url in urls if url.startswith("http://") or url.startswith("https://")]
+        if valid_urls:
+            logger.debug(f"SERVER_URL_OVERRIDE set, using valid URLs: {valid_urls}")
+            return valid_urls
         logger.error(f"No valid URLs found in SERVER_URL_OVERRIDE: {override}")
-        return None
+        return []
     if "servers" in spec and spec["servers"]:
-        # Ensure servers is a list and has items before accessing index 0
-        if isinstance(spec["servers"], list) and len(spec["servers"]) > 0 and isinstance(spec["servers"][0], dict):
-             server_url = spec["servers"][0].get("url")
-             if server_url:
-                 logger.debug(f"Using first server URL from spec: {server_url}")
-                 return server_url
-             else:
-                 logger.warning("First server entry in spec missing 'url' key.")
+        # Ensure servers is a list of dictionaries before reading urls
+        if isinstance(spec["servers"], list) and isinstance(spec["servers"][0], dict):
+            server_urls = [server.get("url") for server in spec["servers"] if isinstance(server, dict) and server.get("url")]
+            if server_urls:
+                logger.debug(f"Using server URLs from spec: {server_urls}")
+                return server_urls
+            logger.warning("Server entries in spec are missing 'url' keys.")
         else:
-             logger.warning("Spec 'servers' key is not a non-empty list of dictionaries.")
+            logger.warning("Spec 'servers' key is not a non-empty list of dictionaries.")
 
     # Fallback for OpenAPI v2 (Swagger)
     if "host" in spec and "schemes" in spec:
@@ -210,12 +243,12 @@ def build_base_url(spec: Dict) -> Optional[str]:
         if host:
             v2_url = f"{scheme}://{host}{base_path}"
             logger.debug(f"Using OpenAPI v2 host/schemes/basePath: {v2_url}")
-            return v2_url
+            return [v2_url]
         else:
             logger.warning("OpenAPI v2 spec missing 'host'.")
 
     logger.error("Could not determine base URL from spec (servers/host/schemes) or SERVER_URL_OVERRIDE.")
-    return None
+    return []
 
 
 def handle_auth(operation: Dict) -> Dict[str, str]:
@@ -223,8 +256,8 @@ def handle_auth(operation: Dict) -> Dict[str, str]:
     Handle authentication based on environment variables and operation security.
     """
     headers = {}
-    api_key = os.getenv("API_KEY")
-    auth_type = os.getenv("API_AUTH_TYPE", "Bearer").lower()
+    api_key = getenv("API_KEY")
+    auth_type = getenv("API_AUTH_TYPE", "Bearer").lower()
     if api_key:
         if auth_type == "bearer":
             logger.debug(f"Using API_KEY as Bearer token.") # Avoid logging key prefix
@@ -233,7 +266,7 @@ def handle_auth(operation: Dict) -> Dict[str, str]:
             logger.warning("API_AUTH_TYPE is Basic, but Basic Auth is not fully implemented yet.")
             # Potentially add basic auth implementation here if needed
         elif auth_type == "api-key":
-            key_name = os.getenv("API_AUTH_HEADER", "Authorization")
+            key_name = getenv("API_AUTH_HEADER", "Authorization")
             headers[key_name] = api_key
             logger.debug(f"Using API_KEY as API-Key in header '{key_name}'.") # Avoid logging key prefix
         else:
@@ -246,7 +279,7 @@ def strip_parameters(parameters: Dict) -> Dict:
     """
     Strip specified parameters from the input based on STRIP_PARAM.
     """
-    strip_param = os.getenv("STRIP_PARAM")
+    strip_param = getenv("STRIP_PARAM")
     if not strip_param or not isinstance(parameters, dict):
         return parameters
     logger.debug(f"Raw parameters before stripping '{strip_param}': {parameters}")
@@ -265,7 +298,7 @@ def detect_response_type(response_text: str) -> Tuple[types.TextContent, str]:
     """
     try:
         # Attempt to parse as JSON
-        decoded_json = json.loads(response_text)
+        decoded_json = jsonlib.loads(response_text)
 
         # Check if it's already in MCP TextContent format (e.g., from another MCP component)
         if isinstance(decoded_json, dict) and decoded_json.get("type") == "text" and "text" in decoded_json:
@@ -281,7 +314,7 @@ def detect_response_type(response_text: str) -> Tuple[types.TextContent, str]:
 
         # If parsing succeeded and it's not TextContent, return as TextContent with stringified JSON
         logger.debug("Response parsed as JSON, returning as stringified TextContent.")
-        return types.TextContent(type="text", text=json.dumps(decoded_json)), "JSON response (stringified)"
+        return types.TextContent(type="text", text=jsonlib.dumps(decoded_json)), "JSON response (stringified)"
 
     except json.JSONDecodeError:
         # If JSON parsing fails, treat as plain text
@@ -298,7 +331,7 @@ def get_additional_headers() -> Dict[str, str]:
     Parse additional headers from EXTRA_HEADERS environment variable.
     """
     headers = {}
-    extra_headers = os.getenv("EXTRA_HEADERS")
+    extra_headers = getenv("EXTRA_HEADERS")
     if extra_headers:
         logger.debug(f"Parsing EXTRA_HEADERS: {extra_headers}")
         for line in extra_headers.splitlines():
@@ -320,7 +353,7 @@ def is_tool_whitelist_set() -> bool:
     """
     Check if TOOL_WHITELIST environment variable is set and not empty.
     """
-    return bool(os.getenv("TOOL_WHITELIST", "").strip())
+    return bool(getenv("TOOL_WHITELIST", "").strip())
 
 def is_tool_whitelisted(endpoint: str) -> bool:
     """
@@ -328,7 +361,7 @@ def is_tool_whitelisted(endpoint: str) -> bool:
     Allows all if TOOL_WHITELIST is not set or empty.
     Handles simple prefix matching and basic regex for path parameters.
     """
-    whitelist_str = os.getenv("TOOL_WHITELIST", "").strip()
+    whitelist_str = getenv("TOOL_WHITELIST", "").strip()
     # logger.debug(f"Checking whitelist - endpoint: '{endpoint}', TOOL_WHITELIST: '{whitelist_str}'") # Too verbose for every check
 
     if not whitelist_str:
@@ -0,0 +1,183 @@
+"""
+Tool argument validation for mcp-openapi-proxy.
+
+Arguments are checked against the tool's inputSchema in the dispatcher, before any request
+is sent, so malformed calls (wrong types, missing required fields, unknown arguments) are
+answered at once with every problem found instead of costing an upstream round trip. Each
+schema is compiled once per tool: with fastjsonschema, when installed, into generated
+Python code; otherwise into a reusable jsonschema validator. OpenAPI 3.0 schemas are first
+turned into JSON Schema (nullable becomes a "null" type, boolean exclusive bounds become
+numeric ones, OpenAPI-only keywords are dropped). Formats are annotations only, as OpenAPI
+defines many (int32, int64, byte, ...) that JSON Schema validators do not know.
+Configuration is controlled via environment variables:
+- VALIDATE_ARGUMENTS: "true" to validate tool arguments before calling upstream
+  (default: false).
+- VALIDATION_BACKEND: "auto" (default: fastjsonschema, then jsonschema), "fastjsonschema"
+  or "jsonschema".
+"""
+
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import jsonschema
+
+from . import metrics
+from .logging_setup import logger
+from .utils import getenv
+
+try:
+    import fastjsonschema
+except ImportError:  # pragma: no cover - exercised when fastjsonschema is not installed
+    fastjsonschema = None
+
+# A compiled validator returns the problems found, empty when the arguments are valid.
+Validator = Callable[[Dict[str, Any]], List[str]]
+
+# Errors reported per call; further ones are counted.
+MAX_ERRORS = 10
+
+# OpenAPI keywords with no JSON Schema meaning.
+OPENAPI_ONLY_KEYWORDS = ("nullable", "discriminator", "xml", "externalDocs", "example")
+
+# Keywords whose value is a schema, and those whose value is a list or map of schemas.
+_SCHEMA_KEYWORDS = ("items", "additionalProperties", "not", "additionalItems", "contains", "propertyNames")
+_SCHEMA_LIST_KEYWORDS = ("allOf", "anyOf", "oneOf", "prefixItems")
+_SCHEMA_MAP_KEYWORDS = ("properties", "patternProperties", "$defs", "definitions")
+
+
+def validation_enabled() -> bool:
+    return (getenv("VALIDATE_ARGUMENTS") or "false").lower() in ("true", "1", "yes")
+
+
+def to_json_schema(schema: Any) -> Any:
+    """A copy of an OpenAPI 3.0 schema as the equivalent JSON Schema."""
+    if not isinstance(schema, dict):
+        return schema
+    converted: Dict[str, Any] = {}
+    for key, value in schema.items():
+        if key in OPENAPI_ONLY_KEYWORDS or key == "format" or key.startswith("x-"):
+            continue
+        if key in _SCHEMA_KEYWORDS:
+            converted[key] = to_json_schema(value)
+        elif key in _SCHEMA_LIST_KEYWORDS and isinstance(value, list):
+            converted[key] = [to_json_schema(item) for item in value]
+        elif key in _SCHEMA_MAP_KEYWORDS and isinstance(value, dict):
+            converted[key] = {name: to_json_schema(item) for name, item in value.items()}
+        else:
+            converted[key] = value
+    for bound, exclusive in (("minimum", "exclusiveMinimum"), ("maximum", "exclusiveMaximum")):
+        if isinstance(converted.get(exclusive), bool):
+            if converted.pop(exclusive) and bound in converted:
+                converted[exclusive] = converted.pop(bound)
+    if schema.get("nullable") is True:
+        if "enum" in converted and None not in converted["enum"]:
+            converted["enum"] = [*converted["enum"], None]
+        if isinstance(converted.get("type"), str):
+            converted["type"] = [converted["type"], "null"]
+        elif isinstance(converted.get("type"), list) and "null" not in converted["type"]:
+            converted["type"] = [*converted["type"], "null"]
+        elif "type" not in converted and any(key in converted for key in _SCHEMA_LIST_KEYWORDS + ("$ref",)):
+            converted = {"anyOf": [converted, {"type": "null"}]}
+    return converted
+
+
+def _location(path: Any) -> str:
+    location = "".join(f"[{part}]" if isinstance(part, int) else f".{part}" for part in path)
+    return location.lstrip(".") or "arguments"
+
+
+def _compile_jsonschema(schema: Dict[str, Any]) -> Validator:
+    cls = jsonschema.validators.validator_for(schema, default=jsonschema.Draft202012Validator)
+    cls.check_schema(schema)
+    validator = cls(schema)
+
+    def validate(arguments: Dict[str, Any]) -> List[str]:
+        errors = sorted(validator.iter_errors(arguments), key=lambda e: list(e.absolute_path))
+        return [f"{_location(e.absolute_path)}: {e.message}" for e in errors]
+
+    return validate
+
+
+def _compile_fastjsonschema(schema: Dict[str, Any]) -> Validator:
+    compiled = fastjsonschema.compile(schema)
+
+    def validate(arguments: Dict[str, Any]) -> List[str]:
+        try:
+            compiled(arguments)
+        except fastjsonschema.JsonSchemaValueException as e:
+            # Generated code stops at the first problem.
+            return [f"{_location(e.path[1:])}: {e.message}"]
+        return []
+
+    return validate
+
+
+def _backend(name: str) -> Tuple[str, Callable[[Dict[str, Any]], Validator]]:
+    if name in ("auto", "fastjsonschema") and fastjsonschema is not None:
+        return "fastjsonschema", _compile_fastjsonschema
+    if name not in ("auto", "jsonschema"):
+        logger.warning(f"VALIDATION_BACKEND {name} is not installed; using jsonschema.")
+    return "jsonschema", _compile_jsonschema
+
+
+BACKEND, _compile = _backend(os.getenv("VALIDATION_BACKEND", "auto").lower())
+
+
+class ValidatorCache:
+    """Compiled validators by tool name, recompiled when the tool's schema object changes."""
+
+    def __init__(self, compile_schema: Callable[[Dict[str, Any]], Validator] = _compile):
+        self.compile_schema = compile_schema
+        self._validators: Dict[str, Tuple[Dict[str, Any], Optional[Validator]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tool_name: str, schema: Dict[str, Any]) -> Optional[Validator]:
+        """The validator for a tool, or None if its schema cannot be compiled."""
+        entry = self._validators.get(tool_name)
+        if entry is not None and entry[0] is schema:
+            return entry[1]
+        try:
+            validator: Optional[Validator] = self.compile_schema(to_json_schema(schema))
+        except Exception as e:
+            # A spec with a broken schema must not make the tool unusable.
+            logger.warning(f"Cannot compile input schema of {tool_name}; its arguments are not validated: {e}")
+            validator = None
+        with self._lock:
+            self._validators[tool_name] = (schema, validator)
+        metrics.increment("validation.compiled")
+        return validator
+
+    def clear(self) -> None:
+        with self._lock:
+            self._validators.clear()
+
+
+_cache: Optional[ValidatorCache] = None
+
+
+def get_validator_cache() -> ValidatorCache:
+    global _cache
+    if _cache is None:
+        _cache = ValidatorCache()
+    return _cache
+
+
+def reset_validator_cache() -> None:
+    global _cache
+    _cache = None
+
+
+def validate_arguments(tool_name: str, schema: Dict[str, Any], arguments: Dict[str, Any]) -> Optional[str]:
+    """Check arguments against a tool's input schema. Returns a message listing the problems, or None."""
+    validator = get_validator_cache().get(tool_name, schema)
+    if validator is None:
+        return None
+    errors = validator(arguments)
+    if not errors:
+        return None
+    metrics.increment("validation.rejected")
+    shown = errors[:MAX_ERRORS]
+    if len(errors) > MAX_ERRORS:
+        shown.append(f"... and {len(errors) - MAX_ERRORS} more")
+    return f"Invalid arguments for {tool_name}:\n" + "\n".join(f"- {error}" for error in shown)
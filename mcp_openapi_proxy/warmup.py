@@ -0,0 +1,230 @@
+"""
+Upstream connection warm-up for mcp-openapi-proxy.
+
+Moves DNS resolution and connection setup off the first tool call: at startup the upstream
+hosts are resolved and a number of pooled connections are opened in the background, and
+idle connections can be kept warm with a periodic lightweight request. Only the base URLs
+calls can be sent to are warmed: with LOAD_BALANCER_STRATEGY "first" that is the first one,
+unless circuit breaking or hedging fail over to the others.
+Configuration is controlled via environment variables:
+- DNS_CACHE_TTL: Seconds to cache DNS lookups process-wide (default: 0, no caching).
+- UPSTREAM_PREWARM_CONNECTIONS: Connections to open per upstream at startup (default: 0).
+  Only the pooled httpx client (UPSTREAM_CLIENT=httpx) keeps them; with the default
+  requests client only DNS is warmed.
+- UPSTREAM_KEEPALIVE_PATH: Path requested with HEAD on every upstream to keep connections warm
+  (default: unset, no keepalive requests).
+- UPSTREAM_KEEPALIVE_INTERVAL: Seconds between keepalive requests (default: 30).
+"""
+
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+
+from . import metrics
+from .circuit_breaker import get_circuit_breakers
+from .hedging import get_hedger
+from .load_balancer import get_load_balancer
+from .logging_setup import logger
+from .upstream import get_httpx_client, trace_connections, use_httpx
+
+_original_getaddrinfo = socket.getaddrinfo
+
+
+def _float_env(name: str, default: float) -> float:
+    raw = os.getenv(name)
+    if raw:
+        try:
+            return float(raw)
+        except ValueError:
+            logger.warning(f"Invalid {name} env var: {raw}. Ignoring.")
+    return default
+
+
+class DnsCache:
+    """
+    TTL cache in front of socket.getaddrinfo.
+
+    Once installed, every client in the process (requests, httpx) resolves through it.
+    When a refresh fails, the expired answer is served rather than failing the call.
+    """
+
+    def __init__(self, ttl: float, resolver: Callable[..., List[Any]] = _original_getaddrinfo):
+        self.ttl = ttl
+        self._resolver = resolver
+        self._entries: Dict[Tuple[Any, ...], Tuple[float, List[Any]]] = {}
+        self._lock = threading.Lock()
+
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] > now:
+            metrics.increment("dns.cache_hits")
+            return list(entry[1])
+        metrics.increment("dns.cache_misses")
+        try:
+            result = self._resolver(host, port, family, type, proto, flags)
+        except OSError:
+            if entry:
+                logger.warning(f"DNS refresh for {host} failed; serving expired answer")
+                return list(entry[1])
+            raise
+        with self._lock:
+            self._entries[key] = (now + self.ttl, list(result))
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def install(self) -> None:
+        socket.getaddrinfo = self.getaddrinfo  # type: ignore[assignment]
+
+    @staticmethod
+    def uninstall() -> None:
+        socket.getaddrinfo = _original_getaddrinfo
+
+
+_dns_cache: Optional[DnsCache] = None
+
+
+def install_dns_cache() -> Optional[DnsCache]:
+    """Install the process-wide DNS cache if DNS_CACHE_TTL is set. Idempotent."""
+    global _dns_cache
+    ttl = _float_env("DNS_CACHE_TTL", 0.0)
+    if ttl <= 0:
+        return None
+    if _dns_cache is None:
+        _dns_cache = DnsCache(ttl)
+        _dns_cache.install()
+        logger.debug(f"DNS cache installed with TTL {ttl}s")
+    return _dns_cache
+
+
+def reset_dns_cache() -> None:
+    global _dns_cache
+    DnsCache.uninstall()
+    _dns_cache = None
+
+
+def resolve(base_url: str) -> bool:
+    """Resolve base_url's host so the answer lands in the DNS cache."""
+    parsed = urlparse(base_url)
+    if not parsed.hostname:
+        return False
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    try:
+        socket.getaddrinfo(parsed.hostname, port, 0, socket.SOCK_STREAM)
+    except OSError as e:
+        logger.warning(f"Could not resolve upstream host {parsed.hostname}: {e}")
+        return False
+    return True
+
+
+def candidate_urls(base_urls: List[str]) -> List[str]:
+    """The base URLs the load balancer, circuit breakers or hedging can send calls to."""
+    if get_load_balancer().strategy != "first" or get_circuit_breakers().enabled or get_hedger().enabled:
+        return base_urls
+    return base_urls[:1]
+
+
+def _touch(url: str, verify: bool) -> bool:
+    """Send one HEAD request to url; any HTTP answer counts, only the connection matters."""
+    try:
+        if use_httpx():
+            get_httpx_client(verify).head(url, extensions={"trace": trace_connections})
+        else:
+            requests.head(url, verify=verify)
+            metrics.increment("upstream.connections_opened")
+    except Exception as e:
+        logger.debug(f"Warm-up request to {url} failed: {e}")
+        return False
+    return True
+
+
+def prewarm(base_url: str, connections: int, verify: bool = True) -> int:
+    """
+    Resolve base_url and open up to `connections` pooled connections to it.
+    Returns the number of warm-up requests that got an answer.
+    """
+    if not resolve(base_url):
+        return 0
+    if connections <= 0 or not use_httpx():
+        return 0
+    # Concurrent requests force the pool to open one connection each (HTTP/2 shares one anyway).
+    with ThreadPoolExecutor(max_workers=connections, thread_name_prefix="prewarm") as pool:
+        warmed = sum(pool.map(lambda _: _touch(base_url, verify), range(connections)))
+    metrics.increment("upstream.prewarmed_connections", warmed)
+    logger.debug(f"Pre-warmed {warmed}/{connections} connections to {base_url}")
+    return warmed
+
+
+class Warmer:
+    """Background thread that pre-warms upstreams once and then sends keepalive requests."""
+
+    def __init__(self, base_urls: List[str], verify: bool = True, connections: int = 0,
+                 keepalive_path: Optional[str] = None, keepalive_interval: float = 30.0):
+        self.base_urls = list(dict.fromkeys(base_urls))
+        self.verify = verify
+        self.connections = connections
+        self.keepalive_path = keepalive_path
+        self.keepalive_interval = keepalive_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, base_urls: List[str], verify: bool = True) -> "Warmer":
+        return cls(
+            base_urls,
+            verify=verify,
+            connections=max(int(_float_env("UPSTREAM_PREWARM_CONNECTIONS", 0)), 0),
+            keepalive_path=os.getenv("UPSTREAM_KEEPALIVE_PATH") or None,
+            keepalive_interval=max(_float_env("UPSTREAM_KEEPALIVE_INTERVAL", 30.0), 1.0),
+        )
+
+    def keepalive_once(self) -> int:
+        """Send one keepalive request to every upstream. Returns how many were answered."""
+        if not self.keepalive_path:
+            return 0
+        answered = 0
+        for base_url in self.base_urls:
+            url = f"{base_url.rstrip('/')}/{self.keepalive_path.lstrip('/')}"
+            if _touch(url, self.verify):
+                answered += 1
+        metrics.increment("upstream.keepalive_requests", answered)
+        return answered
+
+    def _run(self) -> None:
+        for base_url in self.base_urls:
+            if self._stop.is_set():
+                return
+            prewarm(base_url, self.connections, self.verify)
+        while self.keepalive_path and not self._stop.wait(self.keepalive_interval):
+            self.keepalive_once()
+
+    def start(self) -> "Warmer":
+        self._thread = threading.Thread(target=self._run, name="upstream-warmer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+
+def start_warmup(base_urls: List[str], verify: bool = True) -> Optional[Warmer]:
+    """Install the DNS cache and start background warm-up for base_urls, as configured."""
+    dns_cache = install_dns_cache()
+    warmer = Warmer.from_env(base_urls, verify)
+    if not base_urls or not (dns_cache or warmer.connections or warmer.keepalive_path):
+        return None
+    logger.debug(f"Warming upstreams {warmer.base_urls} in the background")
+    return warmer.start()
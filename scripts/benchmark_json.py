@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of the proxy's JSON backend against the standard library.
+
+Times decoding, compact encoding (the JSON_COMPACT format) and indented encoding (as served
+by the spec resource) of the example specs. Run from the repository root:
+    python scripts/benchmark_json.py [--repeat N] [spec.json ...]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mcp_openapi_proxy import jsonlib  # noqa: E402
+
+DEFAULT_SPECS = [
+    "examples/getzep.swagger.json",
+    "tests/fixtures/sample_openapi_specs/petstore_openapi_v3.json",
+]
+
+
+def best_of(func, repeat):
+    """Best time per call in microseconds."""
+    number = 20
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def bench(path, repeat):
+    with open(path, "rb") as f:
+        raw = f.read()
+    text = raw.decode("utf-8")
+    data = json.loads(text)
+    cases = [
+        ("loads", lambda: json.loads(text), lambda: jsonlib.loads(text)),
+        ("dumps", lambda: json.dumps(data), lambda: jsonlib._dumps(data, None)),
+        ("dumps indent=2", lambda: json.dumps(data, indent=2), lambda: jsonlib._dumps(data, 2)),
+    ]
+    print(f"{path} ({len(raw)} bytes), backend: {jsonlib.BACKEND}")
+    for name, stdlib_call, backend_call in cases:
+        stdlib_us = best_of(stdlib_call, repeat)
+        backend_us = best_of(backend_call, repeat)
+        print(f"  {name:<15} stdlib {stdlib_us:9.1f} us   {jsonlib.BACKEND} {backend_us:9.1f} us   x{stdlib_us / backend_us:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("specs", nargs="*", default=DEFAULT_SPECS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for path in args.specs:
+        bench(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
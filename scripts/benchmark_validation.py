@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of tool argument validation.
+
+Registers the tools of the example specs, builds valid arguments for each from its input
+schema, and times one validation per call with the compiled validators against
+jsonschema.validate, which checks and builds a validator on every call. Run from the
+repository root:
+    python scripts/benchmark_validation.py [--repeat N] [spec.json ...]
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+import jsonschema
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mcp_openapi_proxy import validation  # noqa: E402
+from mcp_openapi_proxy.openapi import register_functions  # noqa: E402
+
+DEFAULT_SPECS = [
+    "examples/getzep.swagger.json",
+    "tests/fixtures/sample_openapi_specs/petstore_openapi_v3.json",
+]
+
+SAMPLES = {"string": "x", "integer": 1, "number": 1.5, "boolean": True, "array": [], "object": {}}
+
+
+def sample(schema):
+    """A value valid for simple schemas: every property filled in, enums take their first value."""
+    if not isinstance(schema, dict):
+        return None
+    if schema.get("enum"):
+        return schema["enum"][0]
+    for key in ("oneOf", "anyOf"):
+        if schema.get(key):
+            return sample(schema[key][0])
+    if "properties" in schema:
+        return {name: sample(prop) for name, prop in schema["properties"].items()}
+    if schema.get("type") == "array":
+        return [sample(schema.get("items", {}))]
+    return SAMPLES.get(schema.get("type", "string"), "x")
+
+
+def best_of(func, repeat, number):
+    """Best time per call in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def bench(path, repeat):
+    with open(path) as f:
+        spec = json.load(f)
+    cases = []
+    for tool in register_functions(spec):
+        arguments = sample(tool.inputSchema)
+        arguments.pop("_select", None)
+        cases.append((tool.name, tool.inputSchema, arguments))
+    cache = validation.ValidatorCache()
+    invalid = sum(bool(cache.get(name, schema)(arguments)) for name, schema, arguments in cases)
+    number = max(2000 // max(len(cases), 1), 1)
+
+    def compiled():
+        for name, schema, arguments in cases:
+            cache.get(name, schema)(arguments)
+
+    def uncompiled():
+        for _, schema, arguments in cases:
+            try:
+                jsonschema.validate(arguments, schema)
+            except jsonschema.ValidationError:
+                pass
+
+    compiled_us = best_of(compiled, repeat, number) / len(cases)
+    uncompiled_us = best_of(uncompiled, repeat, number) / len(cases)
+    print(f"{path}: {len(cases)} tools ({invalid} sample arguments rejected), backend: {validation.BACKEND}")
+    print(f"  per call  compiled {compiled_us:8.1f} us   jsonschema.validate {uncompiled_us:8.1f} us   x{uncompiled_us / compiled_us:5.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("specs", nargs="*", default=DEFAULT_SPECS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for path in args.specs:
+        bench(path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -29,3 +29,10 @@ def reset_env_and_module(request):
     # Restore original env
     os.environ.clear()
     os.environ.update(original_env)
+
+@pytest.fixture(autouse=True)
+def close_upstream_clients():
+    # Pooled httpx clients are process-wide; do not let one test's clients leak into the next.
+    yield
+    from mcp_openapi_proxy.upstream import close_clients
+    close_clients()
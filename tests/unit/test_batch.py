@@ -0,0 +1,99 @@
+"""
+Unit tests for the batch_call meta-tool.
+"""
+import asyncio
+import json
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import requests
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy.batch import BATCH_TOOL_NAME, batch_tool, run_batch
+
+SPEC = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "https://api.example.com"}],
+    "paths": {
+        "/items/{id}": {"get": {"summary": "Get item", "parameters": [
+            {"name": "id", "in": "path", "required": True, "schema": {"type": "string"}}
+        ], "responses": {"200": {"description": "OK"}}}},
+    },
+}
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    monkeypatch.delenv("TOOL_NAME_PREFIX", raising=False)
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", SPEC)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_items_by_id"), batch_tool()])
+    return lowlevel
+
+def fake_request(method, url, **kwargs):
+    item_id = url.rsplit("/", 1)[1]
+    if item_id == "down":
+        raise requests.exceptions.ConnectionError("refused")
+    time.sleep(0.05)
+    return SimpleNamespace(text=json.dumps({"id": item_id}), status_code=200, headers={}, raise_for_status=lambda: None)
+
+def call_batch(server, calls):
+    request = SimpleNamespace(params=SimpleNamespace(name=BATCH_TOOL_NAME, arguments={"calls": calls}))
+    with patch("requests.request", side_effect=fake_request):
+        return asyncio.run(server.dispatcher_handler(request))
+
+def test_batch_runs_calls_concurrently(server):
+    calls = [{"tool": "get_items_by_id", "arguments": {"id": str(i)}} for i in range(5)]
+    started = time.monotonic()
+    result = call_batch(server, calls)
+    elapsed = time.monotonic() - started
+    summary = json.loads(result.content[0].text)
+    assert not result.isError
+    assert summary["succeeded"] == 5
+    assert [item["result"] for item in summary["results"]] == [{"id": str(i)} for i in range(5)]
+    assert elapsed < 0.25
+
+def test_batch_reports_partial_failures(server):
+    result = call_batch(server, [
+        {"tool": "get_items_by_id", "arguments": {"id": "1"}},
+        {"tool": "no_such_tool", "arguments": {}},
+        {"tool": BATCH_TOOL_NAME, "arguments": {"calls": []}},
+        {"arguments": {}},
+    ])
+    summary = json.loads(result.content[0].text)
+    assert not result.isError
+    assert summary["succeeded"] == 1 and summary["failed"] == 3
+    assert summary["results"][2]["error"] == "batch_call cannot be nested."
+
+def test_batch_counts_upstream_failures(server):
+    result = call_batch(server, [
+        {"tool": "get_items_by_id", "arguments": {"id": "1"}},
+        {"tool": "get_items_by_id", "arguments": {"id": "down"}},
+    ])
+    summary = json.loads(result.content[0].text)
+    assert summary["succeeded"] == 1 and summary["failed"] == 1
+    assert summary["results"][1]["isError"] and "refused" in summary["results"][1]["result"]
+    result = call_batch(server, [{"tool": "get_items_by_id", "arguments": {"id": "down"}}])
+    assert result.isError
+
+def test_batch_limits_concurrency(monkeypatch):
+    monkeypatch.setenv("BATCH_MAX_CONCURRENCY", "2")
+    in_flight, peak = [0], [0]
+
+    async def dispatch(request):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return SimpleNamespace(content=[], isError=False)
+
+    calls = [{"tool": "t", "arguments": {}} for _ in range(6)]
+    asyncio.run(run_batch({"calls": calls}, dispatch))
+    assert peak[0] == 2
+
+def test_batch_rejects_oversized_or_empty(monkeypatch):
+    monkeypatch.setenv("BATCH_MAX_CALLS", "2")
+    result = asyncio.run(run_batch({"calls": [{"tool": "t"}] * 3}, None))
+    assert result.isError and "at most 2" in result.content[0].text
+    assert asyncio.run(run_batch({}, None)).isError
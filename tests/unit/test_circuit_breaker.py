@@ -0,0 +1,83 @@
+"""
+Unit tests for the per-upstream circuit breaker.
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import requests
+
+from mcp_openapi_proxy.circuit_breaker import (
+    CircuitBreaker,
+    CLOSED,
+    OPEN,
+    HALF_OPEN,
+    get_circuit_breakers,
+    reset_circuit_breakers,
+)
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker("https://api.example.com", failure_threshold=3, min_calls=100)
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+def test_opens_on_error_rate():
+    breaker = CircuitBreaker("https://api.example.com", failure_threshold=100, error_rate=0.5, window=4, min_calls=4)
+    for ok in (True, False, True, False):
+        breaker.record_success() if ok else breaker.record_failure()
+    assert breaker.state == OPEN
+
+def test_half_open_probe_closes_on_success():
+    breaker = CircuitBreaker("https://api.example.com", failure_threshold=1, probe_interval=0)
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+def test_half_open_admits_single_probe_and_reopens_on_failure():
+    breaker = CircuitBreaker("https://api.example.com", failure_threshold=1, probe_interval=60)
+    breaker.record_failure()
+    breaker.opened_at -= 60
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+
+def test_registry_disabled_by_default(monkeypatch):
+    monkeypatch.delenv("CIRCUIT_BREAKER_ENABLED", raising=False)
+    reset_circuit_breakers()
+    try:
+        assert get_circuit_breakers().get("https://api.example.com") is None
+    finally:
+        reset_circuit_breakers()
+
+def test_dispatcher_fails_fast_while_open(monkeypatch):
+    import mcp_openapi_proxy.server_lowlevel as lowlevel
+    monkeypatch.setenv("CIRCUIT_BREAKER_ENABLED", "true")
+    monkeypatch.setenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", "1")
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    reset_circuit_breakers()
+    spec = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://down.example.com"}],
+        "paths": {"/status": {"get": {"summary": "Status", "responses": {"200": {"description": "OK"}}}}},
+    }
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", spec)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_status")])
+    request = SimpleNamespace(params=SimpleNamespace(name="get_status", arguments={}))
+    try:
+        with patch("requests.request", side_effect=requests.exceptions.ConnectionError("refused")) as mock_request:
+            first = asyncio.run(lowlevel.dispatcher_handler(request))
+            second = asyncio.run(lowlevel.dispatcher_handler(request))
+        assert "refused" in first.content[0].text
+        assert second.isError
+        assert "Upstream unavailable" in second.content[0].text
+        assert mock_request.call_count == 1
+    finally:
+        reset_circuit_breakers()
@@ -0,0 +1,68 @@
+"""
+Unit tests for response compaction.
+"""
+import json
+
+import pytest
+
+from mcp_openapi_proxy import metrics
+from mcp_openapi_proxy.compaction import Compactor
+from mcp_openapi_proxy.transform import transform_response
+
+RECORD = {
+    "id": 1,
+    "name": "sw1",
+    "description": None,
+    "tags": [],
+    "custom_fields": {},
+    "count": 0,
+    "enabled": False,
+    "_links": {"self": {"href": "/devices/1"}},
+    "url": "https://netbox/api/dcim/devices/1/",
+    "site_url": "https://netbox/api/dcim/sites/7/",
+    "site": {"id": 7, "name": "syd", "region": {"id": 2, "parent": {"id": 1, "name": "apac"}}},
+    "interfaces": [None, {"name": "eth0", "mac": None}],
+}
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def test_drops_nulls_empties_and_keys():
+    compacted = Compactor(("_links", "*url")).compact(RECORD)
+    assert compacted == {
+        "id": 1,
+        "name": "sw1",
+        "count": 0,
+        "enabled": False,
+        "site": {"id": 7, "name": "syd", "region": {"id": 2, "parent": {"id": 1, "name": "apac"}}},
+        "interfaces": [None, {"name": "eth0"}],
+    }
+
+def test_elides_structures_beyond_max_depth():
+    compacted = Compactor(max_depth=2).compact(RECORD)
+    assert compacted["site"]["region"] == "{2 keys}"
+    assert compacted["interfaces"] == [None, "{2 keys}"]
+    assert compacted["site"]["name"] == "syd"
+
+def test_objects_emptied_by_compaction_are_dropped():
+    assert Compactor(("href",)).compact({"a": {"b": {"href": "x"}}, "c": 1}) == {"c": 1}
+
+def test_transform_compacts_and_counts_savings(monkeypatch):
+    monkeypatch.setenv("RESPONSE_COMPACT", "true")
+    monkeypatch.setenv("RESPONSE_COMPACT_DROP_KEYS", "_links,url")
+    monkeypatch.delenv("RESPONSE_PROJECTIONS", raising=False)
+    body = json.dumps([RECORD] * 3)
+    compacted = transform_response(body, "get_devices", "/devices")
+    assert "_links" not in compacted and "null" not in compacted.replace("[null", "")
+    assert metrics.get("transform.bytes_saved") == len(body) - len(compacted)
+    assert metrics.get("compaction.keys_dropped") == 6
+    assert transform_response("not json", "get_devices", "/devices") == "not json"
+
+def test_transform_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.delenv("RESPONSE_COMPACT", raising=False)
+    monkeypatch.delenv("RESPONSE_PROJECTIONS", raising=False)
+    body = json.dumps(RECORD, indent=2)
+    assert transform_response(body, "get_devices", "/devices") is body
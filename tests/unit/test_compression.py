@@ -0,0 +1,77 @@
+"""
+Unit tests for Accept-Encoding negotiation and gzip request bodies.
+"""
+import asyncio
+import gzip
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from mcp_openapi_proxy import compression, upstream
+from mcp_openapi_proxy.compression import RequestCompression, accept_encoding
+from mcp_openapi_proxy.upstream import send_request
+
+BIG_BODY = {"items": [{"id": i, "name": f"item-{i}"} for i in range(200)]}
+
+@pytest.fixture(autouse=True)
+def reset(monkeypatch):
+    monkeypatch.delenv("UPSTREAM_CLIENT", raising=False)
+    monkeypatch.delenv("UPSTREAM_HTTP2", raising=False)
+    compression.reset_request_compression()
+    yield
+    compression.reset_request_compression()
+
+def capture_requests(captured):
+    def fake_request(method, url, **kwargs):
+        captured.update(kwargs)
+        return SimpleNamespace(text="{}", status_code=200, headers={})
+    return patch("requests.request", side_effect=fake_request)
+
+def test_accept_encoding_lists_decodable_codings():
+    codings = accept_encoding().split(", ")
+    assert codings[:2] == ["gzip", "deflate"]
+    assert set(codings) <= {"gzip", "deflate", "br", "zstd"}
+
+def test_accept_encoding_sent_unless_overridden():
+    captured = {}
+    with capture_requests(captured):
+        asyncio.run(send_request("https://api.example.com", "/items", "get_items", "GET", {}))
+    assert captured["headers"]["Accept-Encoding"] == accept_encoding()
+    with capture_requests(captured):
+        asyncio.run(send_request("https://api.example.com", "/items", "get_items", "GET", {"accept-encoding": "identity"}))
+    assert "Accept-Encoding" not in captured["headers"]
+
+def test_large_body_is_gzipped_for_configured_tool(monkeypatch):
+    monkeypatch.setenv("REQUEST_COMPRESSION_TOOLS", "bulk_*")
+    captured = {}
+    with capture_requests(captured):
+        asyncio.run(send_request("https://api.example.com", "/bulk", "bulk_create", "POST", {}, body=BIG_BODY))
+    assert captured["headers"]["Content-Encoding"] == "gzip"
+    assert "json" not in captured
+    assert json.loads(gzip.decompress(captured["data"])) == BIG_BODY
+
+def test_body_left_alone_for_other_tools_and_small_bodies(monkeypatch):
+    monkeypatch.setenv("REQUEST_COMPRESSION_TOOLS", "bulk_*")
+    captured = {}
+    with capture_requests(captured):
+        asyncio.run(send_request("https://api.example.com", "/items", "create_item", "POST", {}, body=BIG_BODY))
+    assert captured["json"] == BIG_BODY
+    headers, data = RequestCompression(["*"], min_bytes=1024).encode("bulk_create", {}, {"a": 1})
+    assert data is None and headers == {}
+
+def test_gzip_response_decoded_by_pooled_client(monkeypatch):
+    monkeypatch.setenv("UPSTREAM_CLIENT", "httpx")
+    payload = json.dumps(BIG_BODY).encode()
+
+    def handler(request):
+        assert "gzip" in request.headers["Accept-Encoding"]
+        return httpx.Response(200, content=gzip.compress(payload), headers={"Content-Encoding": "gzip"})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(upstream._httpx_clients, True, client)
+    response = asyncio.run(send_request("https://api.example.com", "/items", "get_items", "GET", {}))
+    assert response.json() == BIG_BODY
+    client.close()
@@ -0,0 +1,98 @@
+"""
+Unit tests for serving several OpenAPI specs from one proxy process.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy import federation
+from mcp_openapi_proxy.federation import load_specs_config, fetch_specs, register_federated_functions
+from mcp_openapi_proxy.utils import getenv, spec_settings
+
+def make_spec(host, path):
+    return {
+        "openapi": "3.0.0",
+        "servers": [{"url": f"https://{host}"}],
+        "paths": {path: {"get": {"summary": f"List {path}", "responses": {"200": {"description": "OK"}}}}},
+    }
+
+@pytest.fixture
+def specs_config(tmp_path, monkeypatch):
+    monkeypatch.delenv("TOOL_NAME_PREFIX", raising=False)
+    monkeypatch.delenv("TOOL_WHITELIST", raising=False)
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    monkeypatch.setenv("SLACK_TOKEN", "xoxb-test")
+    slack = tmp_path / "slack.json"
+    slack.write_text(json.dumps(make_spec("slack.example.com", "/conversations")))
+    notion = tmp_path / "notion.json"
+    notion.write_text(json.dumps(make_spec("notion.example.com", "/pages")))
+    config = {
+        "specs": [
+            {"name": "slack", "spec_url": f"file://{slack}", "env": {"API_KEY": "${SLACK_TOKEN}"}},
+            {"name": "notion", "spec_url": f"file://{notion}",
+             "env": {"API_KEY": "secret_notion", "EXTRA_HEADERS": "Notion-Version: 2022-06-28"}},
+        ]
+    }
+    path = tmp_path / "specs.json"
+    path.write_text(json.dumps(config))
+    yield str(path)
+    federation.tool_specs.clear()
+    lowlevel.tools.clear()
+
+def test_spec_settings_overlay(monkeypatch):
+    monkeypatch.setenv("API_KEY", "process")
+    with spec_settings({"API_KEY": "overlay"}):
+        assert getenv("API_KEY") == "overlay"
+        assert getenv("TOOL_WHITELIST", "unset") == "unset"
+    assert getenv("API_KEY") == "process"
+
+def test_load_specs_config_inline_and_duplicates():
+    specs = load_specs_config('[{"name": "a", "spec_url": "file:///a.json"}, {"name": "b"}]')
+    assert [spec.name for spec in specs] == ["a"]
+    assert specs[0].env["TOOL_NAME_PREFIX"] == "a_"
+    with pytest.raises(ValueError):
+        load_specs_config('[{"name": "a", "spec_url": "x"}, {"name": "a", "spec_url": "y"}]')
+
+def test_federated_tools_are_namespaced(specs_config):
+    specs = fetch_specs(load_specs_config(specs_config))
+    tools = register_federated_functions(specs)
+    assert sorted(tool.name for tool in tools) == ["notion_get_pages", "slack_get_conversations"]
+    assert sorted(tool.name for tool in lowlevel.tools) == sorted(tool.name for tool in tools)
+
+def test_federated_dispatch_uses_each_specs_settings(specs_config, monkeypatch):
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", None)
+    register_federated_functions(fetch_specs(load_specs_config(specs_config)))
+    captured = {}
+
+    def fake_request(method, url, **kwargs):
+        captured[url] = kwargs["headers"]
+        return SimpleNamespace(text='{"ok": true}', status_code=200, headers={}, raise_for_status=lambda: None)
+
+    async def call_both():
+        return await asyncio.gather(*[
+            lowlevel.dispatcher_handler(SimpleNamespace(params=SimpleNamespace(name=name, arguments={})))
+            for name in ("slack_get_conversations", "notion_get_pages")
+        ])
+
+    with patch("requests.request", side_effect=fake_request):
+        results = asyncio.run(call_both())
+    assert all(result.content[0].text == '{"ok": true}' for result in results)
+    slack_headers = captured["https://slack.example.com/conversations"]
+    notion_headers = captured["https://notion.example.com/pages"]
+    assert slack_headers["Authorization"] == "Bearer xoxb-test"
+    assert "Notion-Version" not in slack_headers
+    assert notion_headers["Authorization"] == "Bearer secret_notion"
+    assert notion_headers["Notion-Version"] == "2022-06-28"
+
+def test_federated_spec_file_resource_serves_the_first_spec(specs_config, monkeypatch):
+    monkeypatch.delenv("OPENAPI_SPEC_URL", raising=False)
+    monkeypatch.setenv("OPENAPI_SPECS_CONFIG", specs_config)
+    specs = fetch_specs(load_specs_config(specs_config))
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", specs[0].spec_data)
+    request = SimpleNamespace(params=SimpleNamespace(uri="file:///openapi_spec.json"))
+    result = asyncio.run(lowlevel.read_resource(request))
+    assert json.loads(result.contents[0].text) == make_spec("slack.example.com", "/conversations")
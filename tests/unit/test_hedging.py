@@ -0,0 +1,99 @@
+"""
+Unit tests for hedged GET requests.
+"""
+import asyncio
+
+import pytest
+
+import mcp_openapi_proxy.hedging as hedging
+from mcp_openapi_proxy.hedging import Hedger, LatencyTracker, hedged_send
+
+URLS = ["https://a.example.com", "https://b.example.com"]
+
+@pytest.fixture
+def hedger(monkeypatch):
+    hedger = Hedger(enabled=True, delay=0.02, max_ratio=1.0)
+    monkeypatch.setattr(hedging, "_hedger", hedger)
+    return hedger
+
+def make_sender(latencies, calls, cancelled):
+    async def send_to(url):
+        calls.append(url)
+        try:
+            await asyncio.sleep(latencies[url])
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+        return url
+    return send_to
+
+def test_latency_percentile():
+    tracker = LatencyTracker()
+    for i in range(1, 101):
+        tracker.record("get_items", i / 100)
+    assert tracker.percentile("get_items", 95) == pytest.approx(0.95, abs=0.01)
+    assert tracker.percentile("get_items", 95, min_samples=200) is None
+
+def test_fast_primary_is_not_hedged(hedger):
+    calls, cancelled = [], []
+    sender = make_sender({URLS[0]: 0, URLS[1]: 0}, calls, cancelled)
+    assert asyncio.run(hedged_send("get_items", URLS[0], URLS, sender)) == URLS[0]
+    assert calls == [URLS[0]]
+    assert hedger.hedged == 0
+
+def test_slow_primary_is_hedged_to_other_replica(hedger):
+    calls, cancelled = [], []
+    sender = make_sender({URLS[0]: 1.0, URLS[1]: 0}, calls, cancelled)
+    assert asyncio.run(hedged_send("get_items", URLS[0], URLS, sender)) == URLS[1]
+    assert calls == URLS
+    assert cancelled == [URLS[0]]
+
+def test_hedge_ratio_cap(hedger):
+    hedger.max_ratio = 0.0
+    calls, cancelled = [], []
+    sender = make_sender({URLS[0]: 0.05, URLS[1]: 0}, calls, cancelled)
+    assert asyncio.run(hedged_send("get_items", URLS[0], URLS, sender)) == URLS[0]
+    assert calls == [URLS[0]]
+
+def test_failed_primary_falls_back_to_hedge(hedger):
+    async def send_to(url):
+        if url == URLS[0]:
+            await asyncio.sleep(0.05)
+            raise ConnectionError("boom")
+        await asyncio.sleep(0.1)
+        return url
+    assert asyncio.run(hedged_send("get_items", URLS[0], URLS, send_to)) == URLS[1]
+
+def test_disabled_hedger_passes_through(monkeypatch):
+    monkeypatch.setattr(hedging, "_hedger", Hedger(enabled=False))
+    calls, cancelled = [], []
+    sender = make_sender({URLS[0]: 0}, calls, cancelled)
+    assert asyncio.run(hedged_send("get_items", URLS[0], URLS, sender)) == URLS[0]
+    assert calls == [URLS[0]]
+
+class Response:
+    def __init__(self, url):
+        self.url = url
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+def test_loser_response_is_closed_and_primary_latency_recorded(hedger):
+    responses = {}
+
+    async def send_to(url):
+        await asyncio.sleep(0.1 if url == URLS[0] else 0)
+        responses[url] = Response(url)
+        return responses[url]
+
+    async def call_and_wait():
+        winner = await hedged_send("get_items", URLS[0], URLS, send_to)
+        await asyncio.sleep(0.15)
+        return winner
+
+    winner = asyncio.run(call_and_wait())
+    assert winner.url == URLS[1] and not winner.closed
+    assert responses[URLS[0]].closed
+    # Only the slow primary is sampled, not the hedge that beat it.
+    assert hedger.latencies.percentile("get_items", 50) >= 0.1
@@ -0,0 +1,50 @@
+"""
+Unit tests for the JSON backend facade.
+"""
+import json
+
+import pytest
+
+from mcp_openapi_proxy import jsonlib
+
+SPEC = {"openapi": "3.0.0", "paths": {"/pets": {"get": {"responses": {200: {"description": "ok"}}}}}, "title": "Pets ü"}
+ODD = {"nan": float("nan"), "inf": float("-inf"), "big": 1e16, "tiny": 1e-7, "name": "ü/€"}
+
+@pytest.fixture
+def compact(monkeypatch):
+    monkeypatch.setattr(jsonlib, "COMPACT", True)
+
+def test_output_is_that_of_json_dumps_by_default():
+    for value in (SPEC, ODD, [1.5, None, True]):
+        assert jsonlib.dumps(value) == json.dumps(value)
+        assert jsonlib.dumps(value, indent=2) == json.dumps(value, indent=2)
+        assert jsonlib.dumps_bytes(value) == json.dumps(value).encode("utf-8")
+
+def test_loads_matches_stdlib():
+    text = json.dumps(SPEC)
+    assert jsonlib.loads(text) == jsonlib.loads(text.encode("utf-8")) == json.loads(text)
+
+def test_values_outside_fast_backends_fall_back():
+    big = 2 ** 70
+    assert jsonlib.loads(jsonlib.dumps({"n": big})) == {"n": big}
+    assert jsonlib.loads('{"x": NaN}')["x"] != jsonlib.loads('{"x": NaN}')["x"]
+    with pytest.raises(json.JSONDecodeError):
+        jsonlib.loads("not json")
+
+@pytest.mark.parametrize("backend", ["stdlib", "orjson", "ujson"])
+def test_compact_format_is_the_same_on_every_backend(compact, monkeypatch, backend):
+    name, _, dumps = jsonlib._backend_functions(backend)
+    monkeypatch.setattr(jsonlib, "BACKEND", name)
+    monkeypatch.setattr(jsonlib, "_dumps", dumps)
+    assert jsonlib.dumps(ODD) == '{"nan":null,"inf":null,"big":1e+16,"tiny":1e-07,"name":"ü/€"}'.replace(
+        "1e+16", json.dumps(1e16) if name == "stdlib" else jsonlib.dumps(1e16)).replace(
+        "1e-07", json.dumps(1e-7) if name == "stdlib" else jsonlib.dumps(1e-7))
+    assert json.loads(jsonlib.dumps(SPEC)) == json.loads(json.dumps(SPEC))
+    assert "\n  " in jsonlib.dumps({"a": [1, 2]}, indent=2)
+    assert json.loads(jsonlib.dumps_bytes({"name": "x", "tags": [1]})) == {"name": "x", "tags": [1]}
+
+def test_stdlib_compact_encoder():
+    backend, loads, dumps = jsonlib._backend_functions("stdlib")
+    assert backend == "stdlib"
+    assert dumps({"a": [1, 2], "b": float("nan")}, None) == '{"a":[1,2],"b":null}'
+    assert loads('{"a": 1}') == {"a": 1}
@@ -0,0 +1,81 @@
+"""
+Unit tests for cursor pagination of the list requests.
+"""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from mcp import types
+from mcp.shared.exceptions import McpError
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy import spill
+from mcp_openapi_proxy.listing import encode_cursor, paginate_list, registry_version
+
+TOOLS = [types.Tool(name=f"tool_{i}", description="", inputSchema={"type": "object"}) for i in range(25)]
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    monkeypatch.delenv("LIST_PAGE_SIZE", raising=False)
+    spill.reset_spill_store()
+    yield
+    spill.reset_spill_store()
+
+def list_request(cursor=None):
+    return types.ListToolsRequest(method="tools/list", params=types.PaginatedRequestParams(cursor=cursor) if cursor else None)
+
+def test_everything_in_one_page_by_default():
+    assert paginate_list(TOOLS, None, "tools") == (TOOLS, None)
+
+def test_pages_cover_the_list_once(monkeypatch):
+    monkeypatch.setenv("LIST_PAGE_SIZE", "10")
+    monkeypatch.setattr(lowlevel, "tools", list(TOOLS))
+    seen, cursor, pages = [], None, 0
+    while True:
+        result = asyncio.run(lowlevel.list_tools(list_request(cursor)))
+        seen.extend(tool.name for tool in result.tools)
+        pages += 1
+        cursor = result.nextCursor
+        if cursor is None:
+            break
+    assert pages == 3 and seen == [tool.name for tool in TOOLS]
+
+def test_cursors_are_stable_within_a_version(monkeypatch):
+    monkeypatch.setenv("LIST_PAGE_SIZE", "10")
+    _, cursor = paginate_list(TOOLS, None, "tools")
+    assert paginate_list(TOOLS, cursor, "tools") == paginate_list(list(TOOLS), cursor, "tools")
+    assert cursor == encode_cursor("tools", registry_version(TOOLS), 10)
+
+def test_stale_and_foreign_cursors_are_rejected(monkeypatch):
+    monkeypatch.setenv("LIST_PAGE_SIZE", "10")
+    _, cursor = paginate_list(TOOLS, None, "tools")
+    for items, kind, bad in ((TOOLS[1:], "tools", cursor), (TOOLS, "prompts", cursor), (TOOLS, "tools", "%%%")):
+        with pytest.raises(McpError) as excinfo:
+            paginate_list(items, bad, kind)
+        assert excinfo.value.error.code == types.INVALID_PARAMS
+
+def test_resources_and_prompts_are_paged(monkeypatch):
+    monkeypatch.setenv("LIST_PAGE_SIZE", "1")
+    monkeypatch.setattr(lowlevel, "prompts", [types.Prompt(name="a"), types.Prompt(name="b")])
+    result = asyncio.run(lowlevel.list_prompts(SimpleNamespace(params=None)))
+    assert [p.name for p in result.prompts] == ["a"] and result.nextCursor
+    result = asyncio.run(lowlevel.list_prompts(SimpleNamespace(params=SimpleNamespace(cursor=result.nextCursor))))
+    assert [p.name for p in result.prompts] == ["b"] and result.nextCursor is None
+    result = asyncio.run(lowlevel.list_resources(SimpleNamespace(params=SimpleNamespace())))
+    assert len(result.resources) == 1 and result.nextCursor is None
+
+def test_resource_cursors_survive_a_spill(monkeypatch):
+    monkeypatch.setenv("LIST_PAGE_SIZE", "2")
+    monkeypatch.setenv("SPILL_THRESHOLD_BYTES", "10")
+    static = [types.Resource(name=f"r{i}", uri=f"file:///r{i}.json") for i in range(3)]
+    monkeypatch.setattr(lowlevel, "resources", static)
+    spill.maybe_spill("x" * 100, "get_items")
+    first = asyncio.run(lowlevel.list_resources(SimpleNamespace(params=None)))
+    assert [r.name for r in first.resources] == ["r0", "r1"]
+    spill.maybe_spill("y" * 100, "get_items")
+    second = asyncio.run(lowlevel.list_resources(SimpleNamespace(params=SimpleNamespace(cursor=first.nextCursor))))
+    assert [r.name for r in second.resources][0] == "r2" and len(second.resources) == 2
+    third = asyncio.run(lowlevel.list_resources(SimpleNamespace(params=SimpleNamespace(cursor=second.nextCursor))))
+    assert len(third.resources) == 1 and third.nextCursor is None
+    names = [r.name for r in first.resources + second.resources + third.resources]
+    assert len(set(names)) == 5 and all(name.startswith("response_") for name in names[3:])
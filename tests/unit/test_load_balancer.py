@@ -0,0 +1,64 @@
+"""
+Unit tests for load balancing across multiple upstream base URLs.
+"""
+from mcp_openapi_proxy.load_balancer import LoadBalancer, get_load_balancer, reset_load_balancer
+from mcp_openapi_proxy.utils import build_base_urls
+
+URLS = ["https://a.example.com", "https://b.example.com", "https://c.example.com"]
+
+def test_build_base_urls_override(monkeypatch):
+    monkeypatch.setenv("SERVER_URL_OVERRIDE", "https://a.example.com, not_a_url ,https://b.example.com")
+    assert build_base_urls({}) == ["https://a.example.com", "https://b.example.com"]
+
+def test_build_base_urls_all_spec_servers(monkeypatch):
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    spec = {"servers": [{"url": "https://a.example.com"}, {"description": "no url"}, {"url": "https://b.example.com"}]}
+    assert build_base_urls(spec) == ["https://a.example.com", "https://b.example.com"]
+
+def test_first_strategy_keeps_first_url():
+    balancer = LoadBalancer("first")
+    assert {balancer.choose(URLS) for _ in range(5)} == {URLS[0]}
+
+def test_round_robin_cycles():
+    balancer = LoadBalancer("round_robin")
+    assert {balancer.choose(URLS) for _ in range(3)} == set(URLS)
+
+def test_least_outstanding_prefers_idle_endpoint():
+    balancer = LoadBalancer("least_outstanding")
+    balancer.start(URLS[0])
+    balancer.start(URLS[1])
+    assert balancer.choose(URLS) == URLS[2]
+
+def test_ewma_prefers_fast_endpoint():
+    balancer = LoadBalancer("ewma")
+    for url, latency in zip(URLS, (0.5, 0.05, 0.9)):
+        balancer.start(url)
+        balancer.finish(url, latency, True)
+    assert balancer.choose(URLS) == URLS[1]
+
+def test_failing_endpoint_is_ejected():
+    balancer = LoadBalancer("least_outstanding", eject_failures=2, eject_seconds=60)
+    for _ in range(2):
+        balancer.start(URLS[0])
+        balancer.finish(URLS[0], 0.1, False)
+    assert URLS[0] not in {balancer.choose(URLS) for _ in range(5)}
+
+def test_all_ejected_fails_open():
+    balancer = LoadBalancer("round_robin", eject_failures=1, eject_seconds=60)
+    for url in URLS[:2]:
+        balancer.start(url)
+        balancer.finish(url, 0.1, False)
+    assert balancer.choose(URLS[:2]) in URLS[:2]
+
+def test_choose_respects_exclude():
+    balancer = LoadBalancer("round_robin")
+    assert balancer.choose(URLS, exclude=URLS[:2]) == URLS[2]
+    assert balancer.choose(URLS, exclude=URLS) is None
+
+def test_unknown_strategy_falls_back(monkeypatch):
+    monkeypatch.setenv("LOAD_BALANCER_STRATEGY", "random")
+    reset_load_balancer()
+    try:
+        assert get_load_balancer().strategy == "first"
+    finally:
+        reset_load_balancer()
@@ -0,0 +1,94 @@
+"""
+Unit tests for condensing XML and HTML responses.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy.markup import condense_html, condense_response, condense_xml, markup_kind
+
+XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<queryresult success="true" xmlns="http://example.com/ns">
+  <pod title="Result" id="Result">
+    <subpod><plaintext>42</plaintext></subpod>
+    <subpod><plaintext>forty-two</plaintext></subpod>
+  </pod>
+  <pod title="Empty"/>
+</queryresult>"""
+
+HTML = b"""<html><head><title>Status</title><style>body { color: red }</style>
+<script>var tracking = 1;</script></head>
+<body><h1>All systems   operational</h1><p>Updated <b>today</b>.</p>
+<ul><li>API</li><li>Web</li></ul><noscript>Enable JS</noscript></body></html>"""
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in ("RESPONSE_CONDENSE_MARKUP", "RESPONSE_CONDENSE_MAX_CHARS", "RESPONSE_TOKEN_BUDGET"):
+        monkeypatch.delenv(name, raising=False)
+
+def chunked(data, size=7):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+def test_markup_kinds():
+    assert markup_kind("text/html") == "html"
+    assert markup_kind("application/xhtml+xml") == "html"
+    assert markup_kind("application/soap+xml") == "xml"
+    assert markup_kind("application/json") is None
+
+def test_xml_becomes_json_incrementally():
+    condensed = condense_xml(chunked(XML))
+    pod = condensed["queryresult"]["pod"]
+    assert condensed["queryresult"]["@success"] == "true"
+    assert pod[0]["@title"] == "Result"
+    assert [sub["plaintext"] for sub in pod[0]["subpod"]] == ["42", "forty-two"]
+    assert pod[1] == {"@title": "Empty"}
+
+def test_xml_stops_at_budget():
+    body = b"<rows>" + b"".join(b"<row><v>%d</v></row>" % i for i in range(1000)) + b"</rows>"
+    consumed = []
+
+    def chunks():
+        for chunk in chunked(body, 100):
+            consumed.append(chunk)
+            yield chunk
+
+    condensed = condense_xml(chunks(), limit=200)
+    assert condensed["_truncated"] is True
+    assert 0 < len(condensed["rows"]["row"]) < 1000
+    assert sum(len(c) for c in consumed) < len(body)
+
+def test_html_keeps_readable_text_only():
+    text = condense_html(chunked(HTML))
+    assert text.splitlines()[:2] == ["Status", ""]
+    assert "All systems operational" in text
+    assert "Updated today." in text
+    assert "- API\n- Web" in text
+    for dropped in ("color: red", "tracking", "Enable JS", "<"):
+        assert dropped not in text
+
+def test_malformed_xml_falls_back_to_text():
+    response = SimpleNamespace(text="<a><b>one</a> two", headers={"Content-Type": "application/xml"})
+    assert condense_response(response, "xml", "get_legacy") == "one two"
+
+def test_dispatcher_condenses_markup(monkeypatch):
+    monkeypatch.setenv("RESPONSE_CONDENSE_MARKUP", "true")
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    spec = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": {"/query": {"get": {"summary": "Query", "responses": {"200": {"description": "OK"}}}}},
+    }
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", spec)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_query")])
+    response = SimpleNamespace(
+        text=XML.decode(), status_code=200, headers={"Content-Type": "text/xml; charset=utf-8"},
+        raise_for_status=lambda: None,
+    )
+    request = SimpleNamespace(params=SimpleNamespace(name="get_query", arguments={}))
+    with patch("requests.request", return_value=response):
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    assert json.loads(result.content[0].text)["queryresult"]["pod"][0]["@id"] == "Result"
@@ -0,0 +1,105 @@
+"""
+Unit tests for binary and media responses.
+"""
+import asyncio
+import base64
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+from mcp import types
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy import upstream
+from mcp_openapi_proxy.media import binary_result, is_binary_media_type, read_capped
+
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+SPEC = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "https://media.example.com"}],
+    "paths": {"/files/{id}": {"get": {"summary": "Download file", "parameters": [
+        {"name": "id", "in": "path", "required": True, "schema": {"type": "string"}}
+    ], "responses": {"200": {"description": "OK"}}}}},
+}
+
+class StreamedResponse:
+    def __init__(self, data, content_type):
+        self.data = data
+        self.headers = {"Content-Type": content_type}
+        self.status_code = 200
+        self.closed = False
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.data), chunk_size):
+            yield self.data[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        pass
+
+    @property
+    def text(self):
+        raise AssertionError("binary body decoded as text")
+
+def test_media_type_classification():
+    assert is_binary_media_type("image/png")
+    assert is_binary_media_type("application/pdf")
+    assert is_binary_media_type("application/octet-stream")
+    for textual in ("", "text/html", "application/json", "application/vnd.api+json", "application/xml"):
+        assert not is_binary_media_type(textual)
+
+def test_read_capped_stops_early():
+    response = StreamedResponse(b"x" * 200000, "application/octet-stream")
+    data, too_large = read_capped(response, 100000)
+    assert too_large and data == b""
+    assert response.closed
+
+def test_image_becomes_image_content():
+    result = binary_result(StreamedResponse(PNG, "image/png"), "https://media.example.com/files/1", "get_files")
+    content = result.content[0]
+    assert isinstance(content, types.ImageContent)
+    assert base64.b64decode(content.data) == PNG
+
+def test_other_binary_becomes_embedded_blob():
+    result = binary_result(StreamedResponse(b"%PDF-1.7", "application/pdf"), "https://media.example.com/files/1", "get_files")
+    content = result.content[0]
+    assert isinstance(content, types.EmbeddedResource)
+    assert content.resource.mimeType == "application/pdf"
+    assert base64.b64decode(content.resource.blob) == b"%PDF-1.7"
+
+def test_binary_spilled_to_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("BINARY_SPILL_DIR", str(tmp_path))
+    result = binary_result(StreamedResponse(b"%PDF-1.7", "application/pdf"), "https://media.example.com/files/1", "get_files")
+    summary = json.loads(result.content[0].text)
+    assert summary["size"] == 8 and summary["path"].endswith(".pdf")
+    with open(summary["path"], "rb") as f:
+        assert f.read() == b"%PDF-1.7"
+
+def test_oversized_binary_is_an_error(monkeypatch):
+    monkeypatch.setenv("BINARY_MAX_BYTES", "10")
+    result = binary_result(StreamedResponse(PNG, "image/png"), "https://media.example.com/files/1", "get_files")
+    assert result.isError
+
+def test_dispatcher_returns_image_without_decoding(monkeypatch):
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", SPEC)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_files_by_id")])
+    request = SimpleNamespace(params=SimpleNamespace(name="get_files_by_id", arguments={"id": "1"}))
+    with patch("requests.request", return_value=StreamedResponse(PNG, "image/png")):
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    assert isinstance(result.content[0], types.ImageContent)
+
+def test_pooled_client_streams_binary_bodies(monkeypatch):
+    monkeypatch.setenv("UPSTREAM_CLIENT", "httpx")
+    client = httpx.Client(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, content=PNG, headers={"Content-Type": "image/png"})
+    ))
+    monkeypatch.setitem(upstream._httpx_clients, True, client)
+    response = asyncio.run(upstream.send_request("https://media.example.com", "/files/1", "get_files", "GET", {}))
+    assert read_capped(response, 1 << 20) == (PNG, False)
+    client.close()
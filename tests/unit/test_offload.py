@@ -0,0 +1,129 @@
+"""
+Unit tests for offloading CPU-heavy stages from the event loop.
+"""
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy import metrics, offload
+from mcp_openapi_proxy.offload import run_offloaded
+from mcp_openapi_proxy.utils import getenv, spec_settings
+
+@pytest.fixture(autouse=True)
+def clean_pools(monkeypatch):
+    for name in ("OFFLOAD_THRESHOLD_BYTES", "OFFLOAD_EXECUTOR", "OFFLOAD_WORKERS"):
+        monkeypatch.delenv(name, raising=False)
+    metrics.reset()
+    offload.reset_executors()
+    yield
+    offload.reset_executors()
+
+def current_thread_name():
+    return threading.current_thread().name
+
+def test_small_payloads_run_inline(monkeypatch):
+    monkeypatch.setenv("OFFLOAD_THRESHOLD_BYTES", "1000")
+    assert asyncio.run(run_offloaded(current_thread_name, size=999)) == threading.current_thread().name
+    assert metrics.get("offload.thread_calls") == 0
+
+def test_large_payloads_run_in_threads_with_spec_settings(monkeypatch):
+    monkeypatch.setenv("OFFLOAD_THRESHOLD_BYTES", "1000")
+
+    async def call():
+        with spec_settings({"API_KEY": "spec-key"}):
+            return await run_offloaded(lambda: (current_thread_name(), getenv("API_KEY")), size=1000)
+
+    name, key = asyncio.run(call())
+    assert name.startswith("mcp-openapi-proxy-offload") and key == "spec-key"
+    assert metrics.get("offload.thread_calls") == 1
+
+def test_process_pool_only_for_pure_calls(monkeypatch):
+    monkeypatch.setenv("OFFLOAD_EXECUTOR", "process")
+    monkeypatch.setenv("OFFLOAD_WORKERS", "1")
+    data = {"paths": {f"/items/{i}": {"get": {}} for i in range(100)}}
+    assert asyncio.run(run_offloaded(json.dumps, data, indent=2, pure=True)) == json.dumps(data, indent=2)
+    assert metrics.get("offload.process_calls") == 1
+    asyncio.run(run_offloaded(current_thread_name))
+    assert metrics.get("offload.thread_calls") == 1
+
+def test_read_resource_dumps_spec_off_the_loop(monkeypatch):
+    spec = {"openapi": "3.0.0", "paths": {}}
+    monkeypatch.setenv("OPENAPI_SPEC_URL", "https://example.com/spec.json")
+    monkeypatch.setattr(lowlevel, "fetch_openapi_spec", lambda url: spec)
+    request = SimpleNamespace(params=SimpleNamespace(uri="file:///openapi_spec.json"))
+    result = asyncio.run(lowlevel.read_resource(request))
+    assert json.loads(result.contents[0].text) == spec
+    assert metrics.get("offload.thread_calls") == 2
+
+def test_dispatcher_renders_large_bodies_off_the_loop(monkeypatch):
+    monkeypatch.setenv("OFFLOAD_THRESHOLD_BYTES", "1000")
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    spec = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": {"/items": {"get": {"summary": "List items", "responses": {"200": {"description": "OK"}}}}},
+    }
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", spec)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_items")])
+    request = SimpleNamespace(params=SimpleNamespace(name="get_items", arguments={}))
+    for count, offloaded in ((5, 0), (500, 1)):
+        body = json.dumps([{"id": i} for i in range(count)])
+        response = SimpleNamespace(text=body, status_code=200, headers={}, raise_for_status=lambda: None)
+        with patch("requests.request", return_value=response):
+            result = asyncio.run(lowlevel.dispatcher_handler(request))
+        assert json.loads(result.content[0].text) == json.loads(body)
+        assert metrics.get("offload.thread_calls") == offloaded
+
+class ConsumedStream:
+    """A streamed response whose body, once iterated, cannot be read again (as with requests)."""
+
+    def __init__(self, body, content_type):
+        self.body = body
+        self.status_code = 200
+        self.headers = {"Content-Type": content_type}
+        self.consumed = False
+
+    def iter_content(self, chunk_size):
+        self.consumed = True
+        yield self.body
+
+    @property
+    def content(self):
+        if self.consumed:
+            raise RuntimeError("The content for this response was already consumed")
+        return self.body
+
+    @property
+    def text(self):
+        return self.content.decode()
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        pass
+
+@pytest.mark.parametrize("env, body, content_type, expected", [
+    ({"RESPONSE_CONDENSE_MARKUP": "true"}, b"<html><script>var x = 1;</script></html>", "text/html", "No response body"),
+    ({"RESPONSE_STREAM_TOOLS": "get_items"}, b"", "application/json", "No response body"),
+])
+def test_consumed_bodies_are_not_measured_again(monkeypatch, env, body, content_type, expected):
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    spec = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": {"/items": {"get": {"summary": "List items", "responses": {"200": {"description": "OK"}}}}},
+    }
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", spec)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_items")])
+    request = SimpleNamespace(params=SimpleNamespace(name="get_items", arguments={}))
+    with patch("requests.request", return_value=ConsumedStream(body, content_type)):
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    assert result.content[0].text == expected
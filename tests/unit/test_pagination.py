@@ -0,0 +1,149 @@
+"""
+Unit tests for automatic pagination following.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy.pagination import PaginationConfig, paginate
+
+def page(body, headers=None):
+    return SimpleNamespace(text=json.dumps(body), status_code=200, headers=headers or {}, raise_for_status=lambda: None)
+
+def run(first, fetch, url="https://api.example.com/items", params=None, config=None, progress=None):
+    result = asyncio.run(paginate(first, url, params, fetch, config or PaginationConfig(), progress))
+    return json.loads(result) if result is not None else None
+
+def test_link_header_pages_are_aggregated():
+    pages = {
+        "https://api.example.com/items?page=2": page([3, 4], {"Link": '</items?page=3>; rel="next"'}),
+        "https://api.example.com/items?page=3": page([5]),
+    }
+    fetched = []
+
+    async def fetch(url, params):
+        fetched.append(url)
+        return pages[url]
+
+    first = page([1, 2], {"Link": '<https://api.example.com/items?page=2>; rel="next"'})
+    result = run(first, fetch)
+    assert result["items"] == [1, 2, 3, 4, 5]
+    assert result["pagination"]["style"] == "link"
+    assert result["pagination"]["complete"]
+    assert fetched == list(pages)
+
+def test_cursor_pages_stop_at_item_cap():
+    async def fetch(url, params):
+        n = int(params["cursor"])
+        return page({"data": [n, n + 1], "response_metadata": {"next_cursor": str(n + 2)}})
+
+    first = page({"data": [0, 1], "response_metadata": {"next_cursor": "2"}})
+    result = run(first, fetch, config=PaginationConfig(max_items=5))
+    assert result["items"] == [0, 1, 2, 3, 4]
+    assert result["pagination"]["stopped_by"] == "max_items"
+    assert not result["pagination"]["complete"]
+    assert result["pagination"]["next"] == "6"
+
+def test_offset_pages_are_pipelined():
+    in_flight, peak = [0], [0]
+
+    async def fetch(url, params):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        offset = params["offset"]
+        return page({"results": list(range(offset, min(offset + 3, 8)))})
+
+    config = PaginationConfig(offset_param="offset", pipeline_depth=3)
+    result = run(page({"results": [0, 1, 2]}), fetch, params={"offset": 0}, config=config)
+    assert result["items"] == list(range(8))
+    assert result["pagination"]["complete"]
+    assert peak[0] == 3
+
+def test_single_page_is_left_alone():
+    async def fetch(url, params):
+        raise AssertionError("no further page expected")
+    assert run(page({"data": [1, 2]}), fetch) is None
+    assert run(page({"id": 1}), fetch) is None
+
+def test_progress_is_reported_per_page():
+    reports = []
+
+    async def progress(done, total, message):
+        reports.append((done, total))
+
+    async def fetch(url, params):
+        return page({"items": [2], "next_cursor": ""})
+
+    run(page({"items": [1], "next_cursor": "a"}), fetch, config=PaginationConfig(max_pages=4), progress=progress)
+    assert reports == [(1, 4), (2, 4)]
+
+def test_dispatcher_follows_pages_for_opted_in_tools(monkeypatch):
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    monkeypatch.setenv("PAGINATION_TOOLS", "get_items")
+    spec = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": {"/items": {"get": {"summary": "List items", "responses": {"200": {"description": "OK"}}}}},
+    }
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", spec)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_items")])
+
+    def fake_request(method, url, params=None, **kwargs):
+        if (params or {}).get("cursor") == "c2":
+            return page({"items": [3]})
+        return page({"items": [1, 2], "next_cursor": "c2"})
+
+    request = SimpleNamespace(params=SimpleNamespace(name="get_items", arguments={}))
+    with patch("requests.request", side_effect=fake_request) as mock_request:
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    assert json.loads(result.content[0].text)["items"] == [1, 2, 3]
+    assert mock_request.call_count == 2
+
+def test_next_links_outside_the_base_url_are_not_followed():
+    fetched = []
+
+    async def fetch(url, params):
+        fetched.append(url)
+        return page([9])
+
+    first = page({"items": [1, 2], "next": "https://evil.example.net/steal?page=2"})
+    result = run(first, fetch)
+    assert fetched == []
+    assert result["items"] == [1, 2]
+    assert result["pagination"]["next"] == "https://evil.example.net/steal?page=2"
+    assert result["pagination"]["stopped_by"] == "foreign_url" and not result["pagination"]["complete"]
+    for next_url in ("https://mirror.example.com/v1/items?page=2", "https://api.example.com/v2/items?page=2",
+                     "https://api.example.com/v1evil/items"):
+        other = page([1], {"Link": f'<{next_url}>; rel="next"'})
+        result = asyncio.run(paginate(other, "https://api.example.com/v1/items", None, fetch, PaginationConfig(),
+                                      base_url="https://api.example.com/v1"))
+        assert json.loads(result)["pagination"]["stopped_by"] == "foreign_url"
+    assert fetched == []
+    same = page([1], {"Link": '<https://API.example.com/v1/items?page=2>; rel="next"'})
+    result = asyncio.run(paginate(same, "https://api.example.com/v1/items", None, fetch, PaginationConfig(),
+                                  base_url="https://api.example.com/v1/"))
+    assert fetched == ["https://API.example.com/v1/items?page=2"] and json.loads(result)["items"] == [1, 9]
+
+def test_dispatcher_keeps_credentials_on_the_api_host(monkeypatch):
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    monkeypatch.setenv("PAGINATION_TOOLS", "get_items")
+    monkeypatch.setenv("API_KEY", "secret")
+    spec = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": {"/items": {"get": {"summary": "List items", "responses": {"200": {"description": "OK"}}}}},
+    }
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", spec)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_items")])
+    first = page({"items": [1]}, {"Link": '<https://attacker.example.org/collect>; rel="next"'})
+    request = SimpleNamespace(params=SimpleNamespace(name="get_items", arguments={}))
+    with patch("requests.request", return_value=first) as mock_request:
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    assert [call.kwargs["url"] for call in mock_request.call_args_list] == ["https://api.example.com/items"]
+    assert json.loads(result.content[0].text)["pagination"]["next"] == "https://attacker.example.org/collect"
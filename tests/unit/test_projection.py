@@ -0,0 +1,105 @@
+"""
+Unit tests for JMESPath response projection.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy.openapi import register_functions
+from mcp_openapi_proxy.projection import SELECT_SCHEMA, ProjectionError, projection_for
+from mcp_openapi_proxy.transform import transform_response
+
+DEVICES = {
+    "count": 2,
+    "results": [
+        {"id": 1, "name": "sw1", "site": {"id": 7, "name": "syd", "url": "https://netbox/api/dcim/sites/7/"},
+         "url": "https://netbox/api/dcim/devices/1/"},
+        {"id": 2, "name": "sw2", "site": {"id": 8, "name": "mel", "url": "https://netbox/api/dcim/sites/8/"},
+         "url": "https://netbox/api/dcim/devices/2/"},
+    ],
+}
+
+SPEC = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "https://netbox.example.com"}],
+    "paths": {"/api/dcim/devices/": {"get": {"summary": "List devices", "responses": {"200": {"description": "OK"}}}}},
+}
+
+def test_projection_by_tool_and_path_pattern(monkeypatch):
+    monkeypatch.setenv("RESPONSE_PROJECTIONS", json.dumps({
+        "get_api_dcim_*": "results[].name",
+        "/api/ipam/*": "results[].address",
+    }))
+    assert projection_for("get_api_dcim_devices", "/api/dcim/devices/") == "results[].name"
+    assert projection_for("list_ips", "/api/ipam/ip-addresses/") == "results[].address"
+    assert projection_for("get_status", "/status") is None
+    projected = transform_response(json.dumps(DEVICES), "get_api_dcim_devices", "/api/dcim/devices/")
+    assert json.loads(projected) == ["sw1", "sw2"]
+
+def test_select_applies_after_configured_projection(monkeypatch):
+    monkeypatch.setenv("RESPONSE_PROJECTIONS", json.dumps({"get_devices": "results"}))
+    projected = transform_response(json.dumps(DEVICES), "get_devices", "/devices", "[].{id: id, site: site.name}")
+    assert json.loads(projected) == [{"id": 1, "site": "syd"}, {"id": 2, "site": "mel"}]
+
+def test_non_json_and_invalid_expressions(monkeypatch):
+    monkeypatch.delenv("RESPONSE_PROJECTIONS", raising=False)
+    assert transform_response("plain text", "get_devices", "/devices", "a.b") == "plain text"
+    with pytest.raises(ProjectionError):
+        transform_response("{}", "get_devices", "/devices", "results[")
+
+def test_select_argument_is_advertised_and_not_sent_upstream(monkeypatch):
+    monkeypatch.setenv("RESPONSE_SELECT_ARGUMENT", "true")
+    monkeypatch.delenv("TOOL_WHITELIST", raising=False)
+    monkeypatch.delenv("TOOL_NAME_PREFIX", raising=False)
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    tools = register_functions(SPEC)
+    assert "_select" in tools[0].inputSchema["properties"]
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", SPEC)
+    response = SimpleNamespace(text=json.dumps(DEVICES), status_code=200, headers={}, raise_for_status=lambda: None)
+    request = SimpleNamespace(params=SimpleNamespace(name=tools[0].name, arguments={"_select": "results[].id"}))
+    with patch("requests.request", return_value=response) as mock_request:
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    assert json.loads(result.content[0].text) == [1, 2]
+    assert "_select" not in (mock_request.call_args.kwargs.get("params") or {})
+    lowlevel.tools.clear()
+
+def test_invalid_select_fails_before_any_request(monkeypatch):
+    monkeypatch.setenv("RESPONSE_SELECT_ARGUMENT", "true")
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", SPEC)
+    schema = {"type": "object", "properties": {"_select": dict(SELECT_SCHEMA)}}
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_devices", inputSchema=schema)])
+    request = SimpleNamespace(params=SimpleNamespace(name="get_devices", arguments={"_select": "results["}))
+    with patch("requests.request") as mock_request:
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    assert result.isError
+    mock_request.assert_not_called()
+
+def test_select_is_ignored_unless_advertised(monkeypatch):
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    monkeypatch.delenv("TOOL_WHITELIST", raising=False)
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", SPEC)
+    response = SimpleNamespace(text=json.dumps(DEVICES), status_code=200, headers={}, raise_for_status=lambda: None)
+    # Disabled: no ad-hoc projection, and the argument goes upstream like any other.
+    monkeypatch.delenv("RESPONSE_SELECT_ARGUMENT", raising=False)
+    tools = register_functions(SPEC)
+    request = SimpleNamespace(params=SimpleNamespace(name=tools[0].name, arguments={"_select": "count"}))
+    with patch("requests.request", return_value=response) as mock_request:
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    assert json.loads(result.content[0].text) == DEVICES
+    assert mock_request.call_args.kwargs["params"] == {"_select": "count"}
+    # Enabled, but the operation has its own `_select` parameter: it stays a parameter.
+    monkeypatch.setenv("RESPONSE_SELECT_ARGUMENT", "true")
+    spec = json.loads(json.dumps(SPEC))
+    spec["paths"]["/api/dcim/devices/"]["get"]["parameters"] = [{"name": "_select", "in": "query", "schema": {"type": "string"}}]
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", spec)
+    tools = register_functions(spec)
+    assert tools[0].inputSchema["properties"]["_select"] != SELECT_SCHEMA
+    with patch("requests.request", return_value=response) as mock_request:
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    assert json.loads(result.content[0].text) == DEVICES
+    assert mock_request.call_args.kwargs["params"] == {"_select": "count"}
+    lowlevel.tools.clear()
@@ -0,0 +1,104 @@
+"""
+Unit tests for the client-side rate limiter.
+"""
+import asyncio
+import pytest
+
+from mcp_openapi_proxy.rate_limit import (
+    RateLimiter,
+    RateLimitExceeded,
+    TokenBucket,
+    parse_rate,
+    parse_rate_limit_headers,
+    get_rate_limiter,
+    reset_rate_limiter,
+)
+
+def test_parse_rate():
+    assert parse_rate("10/s") == (10.0, 10.0)
+    assert parse_rate("120/min") == (2.0, 120.0)
+    assert parse_rate("30/10s") == (3.0, 30.0)
+    assert parse_rate("bogus") is None
+
+def test_token_bucket_queues_when_empty():
+    bucket = TokenBucket(rate=2.0, capacity=1)
+    assert bucket.reserve(now=bucket.updated) == 0
+    # Second token is reserved against the refill: 1 token at 2/s is half a second away
+    assert bucket.reserve(now=bucket.updated) == pytest.approx(0.5)
+
+def test_parse_x_ratelimit_headers():
+    remaining, reset, retry_after = parse_rate_limit_headers(
+        {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1000000030"}, now_epoch=1000000000
+    )
+    assert remaining == 0
+    assert reset == pytest.approx(30)
+    assert retry_after is None
+
+def test_parse_structured_ratelimit_header():
+    remaining, reset, _ = parse_rate_limit_headers({"RateLimit": "limit=100, remaining=7, reset=12"})
+    assert (remaining, reset) == (7, 12)
+
+def test_acquire_raises_when_wait_exceeds_max():
+    limiter = RateLimiter(default_rate=parse_rate("1/min"), max_wait=0.5)
+    asyncio.run(limiter.acquire("https://api.example.com", "get_users"))
+    with pytest.raises(RateLimitExceeded) as excinfo:
+        asyncio.run(limiter.acquire("https://api.example.com", "get_users"))
+    assert excinfo.value.retry_after > 0.5
+
+def test_tool_group_bucket_is_separate():
+    limiter = RateLimiter(tool_groups=[("slack_chat_*", parse_rate("1/min"))], max_wait=0.5)
+    asyncio.run(limiter.acquire("https://slack.com/api", "slack_chat_postmessage"))
+    # Other tools are not limited by the chat group
+    asyncio.run(limiter.acquire("https://slack.com/api", "slack_users_list"))
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(limiter.acquire("https://slack.com/api", "slack_chat_update"))
+
+def test_observe_adapts_to_upstream_headers():
+    limiter = RateLimiter(max_wait=0.5)
+    limiter.observe("https://api.example.com", "get_users", 200,
+                    {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "60"})
+    with pytest.raises(RateLimitExceeded):
+        asyncio.run(limiter.acquire("https://api.example.com", "get_users"))
+
+def test_observe_429_suggests_retry_within_max_wait():
+    limiter = RateLimiter(max_wait=5)
+    assert limiter.observe("https://api.example.com", "get_users", 429, {"Retry-After": "2"}) == 2
+    assert limiter.observe("https://api.example.com", "get_users", 429, {"Retry-After": "60"}) is None
+
+def test_observe_429_slows_down_every_tool_group():
+    limiter = RateLimiter(
+        tool_groups=[("slack_chat_*", parse_rate("100/s")), ("slack_users_*", parse_rate("100/s"))], max_wait=0.5
+    )
+    limiter.observe("https://slack.com/api", "slack_chat_postmessage", 429, {"Retry-After": "30"})
+    for tool_name in ("slack_users_list", "slack_files_list"):
+        with pytest.raises(RateLimitExceeded):
+            asyncio.run(limiter.acquire("https://slack.com/api", tool_name))
+    # Other upstreams are not affected
+    asyncio.run(limiter.acquire("https://api.example.com", "slack_users_list"))
+
+def test_get_rate_limiter_from_env(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT", "5/s")
+    monkeypatch.setenv("RATE_LIMIT_TOOL_GROUPS", "slack_chat_*=1/s, bad_entry")
+    reset_rate_limiter()
+    try:
+        limiter = get_rate_limiter()
+        assert limiter.default_rate == (5.0, 5.0)
+        assert limiter.tool_groups == [("slack_chat_*", (1.0, 1.0))]
+    finally:
+        reset_rate_limiter()
+
+def test_upstreams_get_their_own_limits(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT", "100/s")
+    monkeypatch.setenv("RATE_LIMIT_UPSTREAMS", "slack.com=1/min, https://api.notion.com/v1/=2/min")
+    monkeypatch.setenv("RATE_LIMIT_MAX_WAIT", "0.5")
+    reset_rate_limiter()
+    try:
+        limiter = get_rate_limiter()
+        for base_url, allowed in (("https://slack.com/api", 1), ("https://api.notion.com/v1", 2), ("https://api.example.com", 5)):
+            for _ in range(allowed):
+                asyncio.run(limiter.acquire(base_url, "any_tool"))
+            if allowed < 5:
+                with pytest.raises(RateLimitExceeded):
+                    asyncio.run(limiter.acquire(base_url, "any_tool"))
+    finally:
+        reset_rate_limiter()
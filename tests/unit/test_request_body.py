@@ -0,0 +1,99 @@
+"""
+Unit tests for request body schemas and shared schema fragments.
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy.openapi import operation_plans, register_functions
+from mcp_openapi_proxy.schemas import SchemaInterner, inline_refs, request_body_schema
+
+COMPONENTS = {
+    "schemas": {
+        "Error": {"type": "object", "properties": {"code": {"type": "integer"}, "message": {"type": "string"}}},
+        "Named": {"type": "object", "properties": {"name": {"type": "string"}}, "required": ["name"]},
+        "Device": {
+            "allOf": [
+                {"$ref": "#/components/schemas/Named"},
+                {"type": "object", "properties": {"site": {"type": "string"}, "parent": {"$ref": "#/components/schemas/Device"}}},
+            ]
+        },
+    },
+    "requestBodies": {
+        "Devices": {"required": True, "description": "Devices to create",
+                    "content": {"application/json": {"schema": {"type": "array", "items": {"$ref": "#/components/schemas/Device"}}}}},
+    },
+}
+
+def json_body(schema):
+    return {"content": {"application/json": {"schema": schema}}}
+
+SPEC = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "https://api.example.com"}],
+    "components": COMPONENTS,
+    "paths": {
+        "/devices": {"post": {"requestBody": {"$ref": "#/components/requestBodies/Devices"}, "responses": {}}},
+        "/devices/{id}": {"put": {
+            "parameters": [{"name": "id", "in": "path", "required": True, "schema": {"type": "string"}},
+                           {"name": "dry_run", "in": "query", "schema": {"type": "boolean"}}],
+            "requestBody": json_body({"$ref": "#/components/schemas/Device"}), "responses": {},
+        }},
+        "/alerts": {"post": {"requestBody": json_body({"oneOf": [{"$ref": "#/components/schemas/Error"}, {"type": "string"}]}),
+                             "responses": {}}},
+        "/errors": {"post": {"requestBody": json_body({"$ref": "#/components/schemas/Error"}), "responses": {}}},
+        "/faults": {"post": {"requestBody": json_body({"$ref": "#/components/schemas/Error"}), "responses": {}}},
+    },
+}
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in ("TOOL_WHITELIST", "RESPONSE_SELECT_ARGUMENT", "SCHEMA_FILTER_RESPONSES"):
+        monkeypatch.delenv(name, raising=False)
+
+def test_all_of_is_merged_and_recursion_stops():
+    device = inline_refs({"$ref": "#/components/schemas/Device"}, SPEC)
+    assert set(device["properties"]) == {"name", "site", "parent"}
+    assert device["required"] == ["name"]
+    assert device["properties"]["parent"] == {"type": "object"}
+
+def test_request_body_refs_and_swagger_body_parameters():
+    schema, required = request_body_schema(SPEC["paths"]["/devices"]["post"], SPEC)
+    assert required and schema["type"] == "array" and schema["description"] == "Devices to create"
+    swagger = {"parameters": [{"name": "pet", "in": "body", "required": True, "schema": {"type": "array", "items": {"type": "string"}}}]}
+    assert request_body_schema(swagger, SPEC) == ({"type": "array", "items": {"type": "string"}}, True)
+    assert request_body_schema({"requestBody": {"content": {"text/plain": {"schema": {}}}}}, SPEC) == (None, False)
+
+def test_tools_expose_every_body_shape():
+    tools = {tool.name: tool.inputSchema for tool in register_functions(SPEC)}
+    devices = tools["post_devices"]
+    assert devices["properties"]["body"]["type"] == "array" and devices["required"] == ["body"]
+    update = tools["put_devices_by_id"]
+    assert {"id", "dry_run", "name", "site", "parent"} <= set(update["properties"]) and "name" in update["required"]
+    assert "oneOf" in tools["post_alerts"]["properties"]["body"]
+    assert operation_plans["post_alerts"]["body_argument"] == "body"
+    assert operation_plans["put_devices_by_id"]["body_argument"] is None
+
+def test_identical_fragments_are_shared():
+    tools = {tool.name: tool.inputSchema for tool in register_functions(SPEC)}
+    assert tools["post_errors"]["properties"]["code"] is tools["post_faults"]["properties"]["code"]
+    assert tools["post_errors"]["properties"] is tools["post_faults"]["properties"]
+    interner = SchemaInterner()
+    first = interner.intern({"a": [1, {"b": True}]})
+    assert interner.intern({"a": [1, {"b": True}]}) is first
+    assert interner.intern({"a": [1, {"b": 1}]}) is not first
+    assert interner.shared == 3 and len(interner) == 6
+
+def test_dispatcher_sends_wrapped_body(monkeypatch):
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    register_functions(SPEC)
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", SPEC)
+    response = SimpleNamespace(text="{}", status_code=200, headers={}, raise_for_status=lambda: None)
+    request = SimpleNamespace(params=SimpleNamespace(name="post_devices", arguments={"body": [{"name": "sw1"}]}))
+    with patch("requests.request", return_value=response) as mock_request:
+        asyncio.run(lowlevel.dispatcher_handler(request))
+    assert mock_request.call_args.kwargs["json"] == [{"name": "sw1"}]
+    assert mock_request.call_args.kwargs["params"] is None
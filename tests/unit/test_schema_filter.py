@@ -0,0 +1,82 @@
+"""
+Unit tests for schema-driven response slimming.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy.openapi import operation_plans, register_functions
+from mcp_openapi_proxy.schema_filter import FieldCompiler, compile_response_fields, filter_fields
+
+SPEC = {
+    "openapi": "3.0.0",
+    "servers": [{"url": "https://api.example.com"}],
+    "paths": {
+        "/devices": {"get": {"summary": "List devices", "responses": {"200": {
+            "description": "OK",
+            "content": {"application/json": {"schema": {
+                "type": "array", "items": {"$ref": "#/components/schemas/Device"},
+            }}},
+        }}}},
+    },
+    "components": {"schemas": {
+        "Device": {
+            "allOf": [{"$ref": "#/components/schemas/Base"}],
+            "type": "object",
+            "required": ["name"],
+            "properties": {
+                "name": {"type": "string"},
+                "site": {"type": "object", "properties": {"name": {"type": "string"}}},
+                "labels": {"type": "object", "additionalProperties": {"type": "string"}},
+                "parent": {"$ref": "#/components/schemas/Device"},
+            },
+        },
+        "Base": {"type": "object", "required": ["id"], "properties": {"id": {"type": "integer"}}},
+    }},
+}
+
+DEVICE = {
+    "id": 1, "name": "sw1", "serial": "X1", "_links": {"self": "/devices/1"},
+    "site": {"name": "syd", "url": "/sites/7"},
+    "labels": {"rack": "r1", "row": "a"},
+    "parent": {"id": 0, "name": "chassis", "serial": "X0", "parent": {"id": -1, "extra": True}},
+}
+
+def compile_devices(mode="all", top_n=0):
+    operation = SPEC["paths"]["/devices"]["get"]
+    return FieldCompiler(SPEC, mode, top_n).compile(operation["responses"]["200"]["content"]["application/json"]["schema"])
+
+def test_undocumented_fields_are_dropped():
+    filtered = filter_fields([DEVICE], compile_devices())
+    assert filtered == [{
+        "id": 1, "name": "sw1", "site": {"name": "syd"}, "labels": {"rack": "r1", "row": "a"},
+        "parent": {"id": 0, "name": "chassis", "parent": {"id": -1, "extra": True}},
+    }]
+
+def test_required_and_top_n_modes():
+    assert filter_fields(DEVICE, compile_devices(mode="required")) == {"id": 1, "name": "sw1"}
+    # Top-N applies to each schema; allOf members are merged afterwards.
+    assert set(filter_fields(DEVICE, compile_devices(top_n=2))) == {"id", "name", "site"}
+
+def test_operations_without_schema_are_left_alone(monkeypatch):
+    assert compile_response_fields({"responses": {"204": {"description": "No content"}}}, SPEC) is None
+
+def test_whitelist_is_compiled_into_call_plan_and_applied(monkeypatch):
+    monkeypatch.setenv("RESPONSE_SCHEMA_FILTER", "true")
+    monkeypatch.delenv("TOOL_WHITELIST", raising=False)
+    monkeypatch.delenv("TOOL_NAME_PREFIX", raising=False)
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    tools = register_functions(SPEC)
+    assert operation_plans["get_devices"]["response_fields"]["site"] == {"name": None}
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", SPEC)
+    response = SimpleNamespace(text=json.dumps([DEVICE]), status_code=200, headers={}, raise_for_status=lambda: None)
+    request = SimpleNamespace(params=SimpleNamespace(name=tools[0].name, arguments={}))
+    with patch("requests.request", return_value=response):
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    returned = json.loads(result.content[0].text)[0]
+    assert "serial" not in returned and "_links" not in returned
+    lowlevel.tools.clear()
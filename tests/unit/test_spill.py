@@ -0,0 +1,79 @@
+"""
+Unit tests for spilling large responses to server-side resources.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy import spill
+from mcp_openapi_proxy.spill import SpillStore, maybe_spill, read_spill_resource
+
+@pytest.fixture(autouse=True)
+def clean_store(monkeypatch):
+    monkeypatch.delenv("SPILL_STORE", raising=False)
+    spill.reset_spill_store()
+    yield
+    spill.reset_spill_store()
+
+def test_memory_store_evicts_least_recently_used():
+    store = SpillStore(max_bytes=10, max_entries=5)
+    first = store.put(b"aaaa")
+    second = store.put(b"bbbb")
+    store.get(first.entry_id)
+    store.put(b"cccc")
+    assert store.get(second.entry_id) is None
+    assert store.read(first.entry_id)[0] == b"aaaa"
+
+def test_file_store_ranges_respect_character_boundaries(tmp_path):
+    store = SpillStore(directory=str(tmp_path))
+    data = "aé€b".encode("utf-8")
+    entry = store.put(data)
+    chunks, offset = [], 0
+    while offset < entry.size:
+        chunk, _ = store.read(entry.entry_id, offset, 2)
+        chunks.append(bytes(chunk))
+        offset += 2
+    assert b"".join(chunks) == data
+    assert all(chunk.decode("utf-8") is not None for chunk in chunks)
+    store.clear()
+    assert list(tmp_path.iterdir()) == []
+
+def test_small_responses_are_not_spilled(monkeypatch):
+    monkeypatch.setenv("SPILL_THRESHOLD_BYTES", "100")
+    assert maybe_spill("x" * 100, "get_items") is None
+
+def test_spilled_response_is_read_in_ranges(monkeypatch):
+    monkeypatch.setenv("SPILL_THRESHOLD_BYTES", "100")
+    monkeypatch.setenv("SPILL_PREVIEW_BYTES", "10")
+    body = json.dumps([{"id": i} for i in range(50)])
+    handle = maybe_spill(body, "get_items")
+    assert handle["size"] == len(body)
+    assert handle["preview"] == body[:10]
+    first = read_spill_resource(f"{handle['resource']}?offset=0&length=200").contents[0].text
+    rest = read_spill_resource(f"{handle['resource']}?offset=200&length=100000").contents[0].text
+    assert first + rest == body
+    assert "not found" in read_spill_resource("proxy://responses/missing").contents[0].text
+
+def test_dispatcher_returns_handle_for_large_body(monkeypatch):
+    monkeypatch.setenv("SPILL_THRESHOLD_BYTES", "1000")
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    spec = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": {"/items": {"get": {"summary": "List items", "responses": {"200": {"description": "OK"}}}}},
+    }
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", spec)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_items")])
+    body = json.dumps([{"id": i, "name": "x" * 20} for i in range(100)])
+    response = SimpleNamespace(text=body, status_code=200, headers={}, raise_for_status=lambda: None)
+    request = SimpleNamespace(params=SimpleNamespace(name="get_items", arguments={}))
+    with patch("requests.request", return_value=response):
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    handle = json.loads(result.content[0].text)
+    assert handle["resource"].startswith("proxy://responses/")
+    read = asyncio.run(lowlevel.read_resource(SimpleNamespace(params=SimpleNamespace(uri=handle["resource"] + "?length=100000"))))
+    assert json.loads(read.contents[0].text) == json.loads(body)
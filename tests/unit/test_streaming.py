@@ -0,0 +1,113 @@
+"""
+Unit tests for streaming top-level array responses.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy import metrics
+from mcp_openapi_proxy.streaming import ArrayScanner, stream_array, stream_enabled
+
+EVENTS = [{"id": i, "type": "push", "payload": {"size": i * 10, "ref": None}, "note": "x" * 20} for i in range(2000)]
+BODY = json.dumps(EVENTS).encode()
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in ("RESPONSE_STREAM_TOOLS", "RESPONSE_STREAM_MAX_ITEMS", "RESPONSE_TOKEN_BUDGET", "RESPONSE_PROJECTIONS",
+                 "RESPONSE_COMPACT", "RESPONSE_TABULAR", "PAGINATION_TOOLS", "SUMMARIZE_TOOLS"):
+        monkeypatch.delenv(name, raising=False)
+    metrics.reset()
+
+def chunked(data, size=7):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+class StreamingResponse:
+    """A response whose body is read chunk by chunk, recording how much was consumed."""
+
+    def __init__(self, body, size=100):
+        self.body = body
+        self.size = size
+        self.consumed = 0
+        self.closed = False
+        self.status_code = 200
+        self.headers = {"Content-Type": "application/json"}
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), self.size):
+            self.consumed += self.size
+            yield self.body[i:i + self.size]
+
+    def close(self):
+        self.closed = True
+
+    def raise_for_status(self):
+        pass
+
+def test_scanner_handles_elements_split_across_chunks():
+    values = [12345, -1.5e3, "a,]\"b", True, None, {"k": [1, {"z": "ü"}]}, [], 7]
+    scanner = ArrayScanner(chunked(json.dumps(values, ensure_ascii=False).encode(), 3))
+    assert scanner.start()
+    assert list(scanner.items()) == values
+
+def test_scanner_rejects_malformed_arrays():
+    for body in (b"[1, 2", b"[1 2]", b"[1, }"):
+        scanner = ArrayScanner(chunked(body, 2))
+        assert scanner.start()
+        with pytest.raises(ValueError):
+            list(scanner.items())
+
+def test_stream_enabled_excludes_paginated_tools(monkeypatch):
+    monkeypatch.setenv("RESPONSE_STREAM_TOOLS", "list_*")
+    monkeypatch.setenv("PAGINATION_TOOLS", "list_pages")
+    assert stream_enabled("list_events")
+    assert not stream_enabled("list_pages")
+    assert not stream_enabled("get_event")
+
+def test_stops_reading_at_budget(monkeypatch):
+    monkeypatch.setenv("RESPONSE_TOKEN_BUDGET", "500")
+    monkeypatch.setenv("RESPONSE_COMPACT", "true")
+    response = StreamingResponse(BODY)
+    text, note, streamed = stream_array(response, "list_events", "/events")
+    items = json.loads(text)
+    assert streamed and note["stopped_by"] == "budget" and note["returned"] == len(items)
+    assert items[0] == {"id": 0, "type": "push", "payload": {"size": 0}, "note": "x" * 20}
+    assert len(text) + len(json.dumps(note)) <= 500 * 4
+    assert response.closed and response.consumed < len(BODY) // 10
+    assert metrics.get("streaming.stopped_by.budget") == 1
+
+def test_element_wise_projection_and_item_limit(monkeypatch):
+    monkeypatch.setenv("RESPONSE_STREAM_MAX_ITEMS", "3")
+    monkeypatch.setenv("RESPONSE_PROJECTIONS", json.dumps({"list_events": "[?id > `10`].id"}))
+    text, note, streamed = stream_array(StreamingResponse(BODY), "list_events", "/events")
+    assert json.loads(text) == [11, 12, 13]
+    assert note["stopped_by"] == "max_items" and "continuation_token" not in note
+
+def test_whole_document_projection_and_objects_fall_back():
+    text, note, streamed = stream_array(StreamingResponse(BODY), "list_events", "/events", select="[*].id | [0]")
+    assert not streamed and note is None and json.loads(text) == EVENTS
+    text, note, streamed = stream_array(StreamingResponse(b' {"count": 1}'), "list_events", "/events")
+    assert not streamed and text == '{"count": 1}'
+
+def test_dispatcher_streams_array_responses(monkeypatch):
+    monkeypatch.setenv("RESPONSE_STREAM_TOOLS", "get_events")
+    monkeypatch.setenv("RESPONSE_TOKEN_BUDGET", "300")
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    spec = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": {"/events": {"get": {"summary": "Events", "responses": {"200": {"description": "OK"}}}}},
+    }
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", spec)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_events")])
+    response = StreamingResponse(BODY)
+    request = SimpleNamespace(params=SimpleNamespace(name="get_events", arguments={}))
+    with patch("requests.request", return_value=response):
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    items = json.loads(result.content[0].text)
+    note = json.loads(result.content[1].text)
+    assert items[0]["id"] == 0 and note["returned"] == len(items) < len(EVENTS)
+    assert response.consumed < len(BODY)
@@ -0,0 +1,75 @@
+"""
+Unit tests for statistical summarization of large numeric arrays.
+"""
+import json
+import statistics
+
+import pytest
+
+from mcp_openapi_proxy import metrics, spill, summarize
+from mcp_openapi_proxy.summarize import Summarizer, numeric_stats, summarize_enabled
+from mcp_openapi_proxy.transform import transform_response
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in ("SUMMARIZE_TOOLS", "SUMMARIZE_MIN_POINTS", "SUMMARIZE_SERIES_POINTS", "SUMMARIZE_PERCENTILES"):
+        monkeypatch.delenv(name, raising=False)
+    metrics.reset()
+    spill.reset_spill_store()
+    yield
+    spill.reset_spill_store()
+
+def test_numeric_stats_pure_python(monkeypatch):
+    monkeypatch.setattr(summarize, "np", None)
+    values = list(range(101))
+    stats = numeric_stats(values, (5, 50, 95), 10)
+    assert (stats["count"], stats["min"], stats["max"], stats["mean"]) == (101, 0.0, 100.0, 50.0)
+    assert stats["percentiles"] == {"p5": 5.0, "p50": 50.0, "p95": 95.0}
+    assert stats["stdev"] == pytest.approx(statistics.pstdev(values))
+    assert len(stats["series"]) == 10
+    assert stats["series"][0] == pytest.approx(4.5)
+
+def test_numeric_stats_match_numpy():
+    np = pytest.importorskip("numpy")
+    values = [float(v) for v in np.random.default_rng(0).normal(size=997)]
+    fast = numeric_stats(values, (5, 50, 95), 7)
+    summarize.np, saved = None, summarize.np
+    try:
+        slow = numeric_stats(values, (5, 50, 95), 7)
+    finally:
+        summarize.np = saved
+    for key in ("min", "max", "mean", "stdev"):
+        assert fast[key] == pytest.approx(slow[key])
+    assert fast["percentiles"] == pytest.approx(slow["percentiles"])
+    assert fast["series"] == pytest.approx(slow["series"])
+
+def test_records_summarize_numeric_fields_only():
+    records = [{"ts": f"t{i}", "cpu": i % 10, "mem": None if i % 2 else 100 + i} for i in range(40)]
+    stored = []
+    summary = Summarizer(min_points=20, points=4, store_raw=lambda items: stored.append(items) or "proxy://responses/x").summarize(
+        {"host": "a", "points": records}
+    )
+    assert summary["host"] == "a"
+    points = summary["points"]
+    assert points["count"] == 40 and set(points["fields"]) == {"cpu", "mem"}
+    assert points["fields"]["mem"]["count"] == 20
+    assert points["sample"] == [records[0], records[10], records[20], records[30]]
+    assert points["raw"] == "proxy://responses/x" and stored == [records]
+
+def test_short_and_mixed_arrays_are_kept():
+    summarizer = Summarizer(min_points=5)
+    assert summarizer.summarize([1, 2, 3]) == [1, 2, 3]
+    assert summarizer.summarize([1, "a", 2, 3, 4]) == [1, "a", 2, 3, 4]
+    assert summarizer.summarize([{"name": "a"}] * 5) == [{"name": "a"}] * 5
+
+def test_transform_keeps_raw_data_readable(monkeypatch):
+    monkeypatch.setenv("SUMMARIZE_TOOLS", "get_metrics*")
+    monkeypatch.setenv("SUMMARIZE_MIN_POINTS", "100")
+    assert summarize_enabled("get_metrics_cpu") and not summarize_enabled("get_devices")
+    values = [i * 0.5 for i in range(500)]
+    result = json.loads(transform_response(json.dumps({"values": values}), "get_metrics_cpu", "/metrics"))
+    assert result["values"]["summarized"] and result["values"]["max"] == 249.5
+    assert len(result["values"]["series"]) == 50
+    raw = spill.read_spill_resource(result["values"]["raw"] + "?length=100000").contents[0].text
+    assert json.loads(raw) == values
+    assert metrics.get("summarize.points") == 500
@@ -0,0 +1,53 @@
+"""
+Unit tests for tabular encoding of arrays of objects.
+"""
+import json
+
+import pytest
+
+from mcp_openapi_proxy import metrics
+from mcp_openapi_proxy.tabular import TabularEncoder, tabular_mode
+from mcp_openapi_proxy.transform import transform_response
+
+DEVICES = [{"id": i, "name": f"sw{i}", "status": "active"} for i in range(10)]
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in ("RESPONSE_TABULAR", "RESPONSE_TABULAR_OVERRIDES", "RESPONSE_TABULAR_FORMAT",
+                 "RESPONSE_TABULAR_MIN_ROWS", "RESPONSE_TABULAR_MIN_SAVINGS"):
+        monkeypatch.delenv(name, raising=False)
+    metrics.reset()
+
+def test_rows_layout_fills_missing_keys():
+    records = [{"id": 1, "name": "a"}, {"id": 2}, {"id": 3, "name": "c", "role": "x"}]
+    table = TabularEncoder("always").encode(records)
+    assert table == {"columns": ["id", "name", "role"], "rows": [[1, "a", None], [2, None, None], [3, "c", "x"]]}
+
+def test_columns_layout_and_nested_arrays():
+    body = {"count": 2, "results": [{"id": i, "ports": [{"n": 1}, {"n": 2}, {"n": 3}]} for i in range(3)]}
+    encoded = TabularEncoder("always", layout="columns").encode(body)
+    assert encoded["count"] == 2
+    assert encoded["results"]["columns"]["id"] == [0, 1, 2]
+    assert encoded["results"]["columns"]["ports"][0] == {"columns": {"n": [1, 2, 3]}}
+
+def test_auto_mode_requires_savings():
+    wide = [{"k": "x" * 200} for _ in range(5)]
+    assert TabularEncoder("auto", min_savings=0.2).encode(wide) == wide
+    assert TabularEncoder("auto", min_savings=0.2).encode(DEVICES)["columns"] == ["id", "name", "status"]
+    assert TabularEncoder("auto").encode(DEVICES[:2]) == DEVICES[:2]
+    assert TabularEncoder("auto").encode([1, 2, 3, 4]) == [1, 2, 3, 4]
+
+def test_per_tool_override(monkeypatch):
+    monkeypatch.setenv("RESPONSE_TABULAR", "auto")
+    monkeypatch.setenv("RESPONSE_TABULAR_OVERRIDES", json.dumps({"get_status": "off", "/dcim/*": "always"}))
+    assert tabular_mode("get_status", "/status") == "off"
+    assert tabular_mode("get_devices", "/dcim/devices") == "always"
+    assert tabular_mode("get_sites", "/sites") == "auto"
+
+def test_transform_encodes_and_counts(monkeypatch):
+    monkeypatch.setenv("RESPONSE_TABULAR", "auto")
+    body = json.dumps({"results": DEVICES})
+    transformed = json.loads(transform_response(body, "get_devices", "/devices"))
+    assert transformed["results"]["rows"][3] == [3, "sw3", "active"]
+    assert metrics.get("tabular.arrays") == 1
+    assert metrics.get("tabular.bytes_saved") == len(json.dumps(DEVICES)) - len(json.dumps(transformed["results"]))
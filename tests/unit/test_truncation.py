@@ -0,0 +1,102 @@
+"""
+Unit tests for token-budget truncation and continuation.
+"""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy import truncation
+from mcp_openapi_proxy.truncation import ContinuationCache, Remainder, continue_result, truncate_response
+
+@pytest.fixture(autouse=True)
+def clean_cache(monkeypatch):
+    for name in ("RESPONSE_TOKENIZER", "RESPONSE_BYTES_PER_TOKEN", "CONTINUATION_MAX_ENTRIES"):
+        monkeypatch.delenv(name, raising=False)
+    truncation.reset_continuation_cache()
+    yield
+    truncation.reset_continuation_cache()
+
+def read_all(head, note):
+    """Follow continuation tokens and return every slice as decoded JSON."""
+    slices = [json.loads(head)]
+    while note is not None:
+        result = continue_result({"continuation_token": note["continuation_token"]})
+        assert not result.isError
+        slices.append(json.loads(result.content[0].text))
+        note = json.loads(result.content[1].text) if len(result.content) > 1 else None
+    return slices
+
+def test_small_responses_pass_through(monkeypatch):
+    monkeypatch.setenv("RESPONSE_TOKEN_BUDGET", "100")
+    assert truncate_response("[1, 2, 3]", "get_items") == ("[1, 2, 3]", None)
+
+def test_top_level_array_is_cut_at_element_boundaries(monkeypatch):
+    monkeypatch.setenv("RESPONSE_TOKEN_BUDGET", "100")
+    items = [{"id": i, "name": "x" * 20} for i in range(50)]
+    head, note = truncate_response(json.dumps(items), "get_items")
+    assert note["returned"] == len(json.loads(head)) < 50
+    assert note["remaining"] == 50 - note["returned"]
+    slices = read_all(head, note)
+    assert [item for chunk in slices for item in chunk] == items
+    assert all(len(json.dumps(chunk)) <= 100 * 4 for chunk in slices)
+
+def test_array_inside_object_keeps_envelope(monkeypatch):
+    monkeypatch.setenv("RESPONSE_TOKEN_BUDGET", "60")
+    body = {"count": 30, "results": [{"id": i} for i in range(30)], "tags": ["a"]}
+    head, note = truncate_response(json.dumps(body), "get_items")
+    first = json.loads(head)
+    assert first["count"] == 30 and first["tags"] == ["a"]
+    assert note["path"] == "results"
+    slices = read_all(head, note)
+    assert first["results"] + [item for chunk in slices[1:] for item in chunk] == body["results"]
+
+def test_text_is_cut_at_lines_and_tokens_are_repeatable(monkeypatch):
+    monkeypatch.setenv("RESPONSE_TOKEN_BUDGET", "40")
+    text = "".join(f"line {i}\n" for i in range(100))
+    head, note = truncate_response(text, "get_log")
+    assert head.endswith("\n")
+    first = continue_result({"continuation_token": note["continuation_token"]})
+    again = continue_result({"continuation_token": note["continuation_token"]})
+    assert first.content[0].text == again.content[0].text
+
+def test_pluggable_tokenizer(monkeypatch):
+    monkeypatch.setenv("RESPONSE_TOKEN_BUDGET", "50")
+    monkeypatch.setenv("RESPONSE_TOKENIZER", "builtins:len")
+    assert truncation.get_tokenizer()("x" * 8) == 8
+    monkeypatch.setenv("RESPONSE_TOKENIZER", "no_such_module:count")
+    assert truncation.get_tokenizer()("x" * 8) == 2
+
+def test_cache_is_bounded_and_expired_tokens_fail():
+    cache = ContinuationCache(max_entries=2)
+    entries = [Remainder("array", ["1", "2"], "get_items", 10, None) for _ in range(3)]
+    for entry in entries:
+        cache.put(entry)
+    assert cache.get(entries[0].entry_id) is None
+    assert cache.get(entries[2].entry_id) is entries[2]
+    assert continue_result({"continuation_token": "missing.1"}).isError
+
+def test_dispatcher_adds_continuation_note(monkeypatch):
+    monkeypatch.setenv("RESPONSE_TOKEN_BUDGET", "100")
+    monkeypatch.delenv("SERVER_URL_OVERRIDE", raising=False)
+    spec = {
+        "openapi": "3.0.0",
+        "servers": [{"url": "https://api.example.com"}],
+        "paths": {"/items": {"get": {"summary": "List items", "responses": {"200": {"description": "OK"}}}}},
+    }
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", spec)
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_items"), truncation.continue_tool()])
+    items = [{"id": i, "name": "x" * 20} for i in range(40)]
+    response = SimpleNamespace(text=json.dumps(items), status_code=200, headers={}, raise_for_status=lambda: None)
+    request = SimpleNamespace(params=SimpleNamespace(name="get_items", arguments={}))
+    with patch("requests.request", return_value=response) as upstream:
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+        note = json.loads(result.content[1].text)
+        follow = SimpleNamespace(params=SimpleNamespace(
+            name="continue_result", arguments={"continuation_token": note["continuation_token"]}))
+        continued = asyncio.run(lowlevel.dispatcher_handler(follow))
+    assert upstream.call_count == 1
+    assert json.loads(continued.content[0].text)[0] == items[note["returned"]]
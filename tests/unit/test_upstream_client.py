@@ -0,0 +1,72 @@
+"""
+Unit tests for the pooled httpx upstream client and its pool metrics.
+"""
+import asyncio
+
+import httpx
+import pytest
+import requests
+
+from mcp_openapi_proxy import metrics, upstream
+from mcp_openapi_proxy.upstream import send_request, pool_metrics
+
+@pytest.fixture
+def mock_client(monkeypatch):
+    monkeypatch.setenv("UPSTREAM_CLIENT", "httpx")
+    metrics.reset()
+
+    def handler(request):
+        if request.url.path == "/missing":
+            return httpx.Response(404, json={"error": "not found"})
+        if request.url.path == "/down":
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json={"path": request.url.path, "q": request.url.params.get("q")})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(upstream._httpx_clients, True, client)
+    yield client
+    client.close()
+    metrics.reset()
+
+def test_httpx_response_looks_like_requests(mock_client):
+    response = asyncio.run(send_request("https://api.example.com", "/items", "get_items", "GET", {}, params={"q": "x"}))
+    response.raise_for_status()
+    assert response.status_code == 200
+    assert response.json() == {"path": "/items", "q": "x"}
+
+def test_httpx_status_error_maps_to_requests_http_error(mock_client):
+    response = asyncio.run(send_request("https://api.example.com", "/missing", "get_missing", "GET", {}))
+    with pytest.raises(requests.exceptions.HTTPError):
+        response.raise_for_status()
+
+def test_httpx_transport_error_maps_to_requests_connection_error(mock_client):
+    with pytest.raises(requests.exceptions.ConnectionError):
+        asyncio.run(send_request("https://api.example.com", "/down", "get_down", "GET", {}))
+
+def test_pool_metrics_count_requests(mock_client):
+    async def burst():
+        await asyncio.gather(*[
+            send_request("https://api.example.com", f"/items/{i}", "get_item", "GET", {}) for i in range(3)
+        ])
+    asyncio.run(burst())
+    stats = pool_metrics()
+    assert stats["upstream.requests"] == 3
+    assert stats["upstream.requests.HTTP/1.1"] == 3
+    assert stats["upstream.in_flight"] == 0
+    assert stats["upstream.in_flight_peak"] >= 1
+    assert stats["upstream.client"] == "httpx"
+
+def test_close_clients_closes_the_pool(monkeypatch):
+    monkeypatch.setenv("UPSTREAM_CLIENT", "httpx")
+    client = upstream.get_httpx_client(True)
+    assert upstream.get_httpx_client(True) is client
+    upstream.close_clients()
+    assert client.is_closed and upstream._httpx_clients == {}
+    assert upstream.get_httpx_client(True) is not client
+
+def test_http2_flag_selects_httpx(monkeypatch):
+    monkeypatch.delenv("UPSTREAM_CLIENT", raising=False)
+    monkeypatch.setenv("UPSTREAM_HTTP2", "true")
+    assert upstream.use_httpx()
+    monkeypatch.setenv("UPSTREAM_HTTP2", "false")
+    assert not upstream.use_httpx()
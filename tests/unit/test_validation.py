@@ -0,0 +1,102 @@
+"""
+Unit tests for validating tool arguments before calling upstream.
+"""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import mcp_openapi_proxy.server_lowlevel as lowlevel
+from mcp_openapi_proxy import metrics
+from mcp_openapi_proxy.validation import (
+    ValidatorCache, _compile_fastjsonschema, _compile_jsonschema, reset_validator_cache, to_json_schema,
+    validate_arguments,
+)
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "string"},
+        "limit": {"type": "integer"},
+        "body": {"type": "array", "items": {"type": "object", "properties": {"name": {"type": "string"}}, "required": ["name"]}},
+    },
+    "required": ["id"],
+    "additionalProperties": False,
+}
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    monkeypatch.delenv("VALIDATE_ARGUMENTS", raising=False)
+    reset_validator_cache()
+    metrics.reset()
+
+def test_reports_every_problem_with_its_location():
+    problems = _compile_jsonschema(SCHEMA)({"limit": "10", "body": [{"name": "a"}, {}], "extra": 1})
+    assert problems == [
+        "arguments: 'id' is a required property",
+        "arguments: Additional properties are not allowed ('extra' was unexpected)",
+        "body[1]: 'name' is a required property",
+        "limit: '10' is not of type 'integer'",
+    ]
+    assert validate_arguments("get_item", SCHEMA, {"id": "1", "limit": 5}) is None
+
+OPENAPI_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer", "format": "int64", "exclusiveMinimum": True, "minimum": 0},
+        "name": {"type": "string", "nullable": True, "example": "sw1"},
+        "status": {"type": "string", "enum": ["active", "offline"], "nullable": True},
+        "tags": {"type": "array", "items": {"type": "string", "format": "slug", "x-order": 1}},
+    },
+    "required": ["id"],
+}
+
+def test_openapi_schemas_become_json_schema():
+    converted = to_json_schema(OPENAPI_SCHEMA)
+    assert converted["properties"]["id"] == {"type": "integer", "exclusiveMinimum": 0}
+    assert converted["properties"]["name"] == {"type": ["string", "null"]}
+    assert converted["properties"]["status"]["enum"] == ["active", "offline", None]
+    assert converted["properties"]["tags"]["items"] == {"type": "string"}
+    assert to_json_schema({"allOf": [{"type": "object"}], "nullable": True}) == {"anyOf": [{"allOf": [{"type": "object"}]}, {"type": "null"}]}
+
+@pytest.mark.parametrize("backend", ["jsonschema", "fastjsonschema"])
+def test_openapi_schemas_validate_on_both_backends(backend):
+    if backend == "fastjsonschema":
+        pytest.importorskip("fastjsonschema")
+    compile_schema = {"jsonschema": _compile_jsonschema, "fastjsonschema": _compile_fastjsonschema}[backend]
+    cache = ValidatorCache(compile_schema)
+    validator = cache.get("get_device", OPENAPI_SCHEMA)
+    assert validator is not None
+    assert validator({"id": 9007199254740993, "name": None, "status": None, "tags": ["a"]}) == []
+    assert validator({"id": 0})
+    assert validator({"id": 1, "name": 5})
+    assert validator({"id": 1, "status": "gone"})
+
+def test_schemas_compile_once_per_tool():
+    calls = []
+
+    def compile_schema(schema):
+        calls.append(schema)
+        return lambda arguments: []
+
+    cache = ValidatorCache(compile_schema)
+    for _ in range(3):
+        cache.get("get_item", SCHEMA)
+    cache.get("get_item", dict(SCHEMA))
+    assert len(calls) == 2
+
+def test_broken_schemas_are_not_enforced():
+    assert validate_arguments("get_item", {"type": "no-such-type"}, {"id": 1}) is None
+
+def test_dispatcher_rejects_before_sending(monkeypatch):
+    monkeypatch.setenv("VALIDATE_ARGUMENTS", "true")
+    monkeypatch.setattr(lowlevel, "openapi_spec_data", {"openapi": "3.0.0", "paths": {}})
+    monkeypatch.setattr(lowlevel, "tools", [SimpleNamespace(name="get_item", inputSchema=SCHEMA)])
+    request = SimpleNamespace(params=SimpleNamespace(name="get_item", arguments={"id": "1", "limit": "ten"}))
+    with patch("requests.request") as mock_request:
+        result = asyncio.run(lowlevel.dispatcher_handler(request))
+    assert result.isError
+    assert "Invalid arguments for get_item" in result.content[0].text and "- limit: " in result.content[0].text
+    mock_request.assert_not_called()
+    assert metrics.get("validation.rejected") == 1
@@ -0,0 +1,116 @@
+"""
+Unit tests for upstream connection pre-warming, DNS caching and keepalive requests.
+"""
+import socket
+
+import httpx
+import pytest
+
+from mcp_openapi_proxy import circuit_breaker, hedging, load_balancer, metrics, upstream, warmup
+from mcp_openapi_proxy.warmup import DnsCache, Warmer, candidate_urls, prewarm, start_warmup
+
+ADDR = [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("10.0.0.1", 443))]
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    metrics.reset()
+    yield
+    warmup.reset_dns_cache()
+    metrics.reset()
+
+@pytest.fixture
+def seen_requests(monkeypatch):
+    monkeypatch.setenv("UPSTREAM_CLIENT", "httpx")
+    monkeypatch.setattr(warmup, "resolve", lambda base_url: True)
+    seen = []
+
+    def handler(request):
+        seen.append((request.method, request.url.path))
+        return httpx.Response(405)
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setitem(upstream._httpx_clients, True, client)
+    yield seen
+    client.close()
+
+def test_dns_cache_honours_ttl(monkeypatch):
+    calls = []
+
+    def resolver(host, port, *args):
+        calls.append(host)
+        return ADDR
+
+    now = [100.0]
+    monkeypatch.setattr(warmup.time, "monotonic", lambda: now[0])
+    cache = DnsCache(ttl=30, resolver=resolver)
+    assert cache.getaddrinfo("api.example.com", 443) == ADDR
+    assert cache.getaddrinfo("api.example.com", 443) == ADDR
+    assert calls == ["api.example.com"]
+    now[0] += 31
+    cache.getaddrinfo("api.example.com", 443)
+    assert len(calls) == 2
+    assert metrics.get("dns.cache_hits") == 1
+
+def test_dns_cache_serves_stale_answer_on_failure(monkeypatch):
+    answers = [ADDR]
+
+    def resolver(host, port, *args):
+        if not answers:
+            raise socket.gaierror("temporary failure")
+        return answers.pop()
+
+    now = [0.0]
+    monkeypatch.setattr(warmup.time, "monotonic", lambda: now[0])
+    cache = DnsCache(ttl=1, resolver=resolver)
+    cache.getaddrinfo("api.example.com", 443)
+    now[0] += 5
+    assert cache.getaddrinfo("api.example.com", 443) == ADDR
+
+def test_install_dns_cache_from_env(monkeypatch):
+    monkeypatch.setenv("DNS_CACHE_TTL", "60")
+    cache = warmup.install_dns_cache()
+    assert cache is not None and socket.getaddrinfo == cache.getaddrinfo
+    warmup.reset_dns_cache()
+    assert socket.getaddrinfo is warmup._original_getaddrinfo
+
+def test_prewarm_opens_requested_connections(seen_requests):
+    assert prewarm("https://api.example.com", 3) == 3
+    assert seen_requests == [("HEAD", "/")] * 3
+    assert metrics.get("upstream.prewarmed_connections") == 3
+
+def test_prewarm_without_pool_only_resolves(seen_requests, monkeypatch):
+    monkeypatch.setenv("UPSTREAM_CLIENT", "requests")
+    assert prewarm("https://api.example.com", 3) == 0
+    assert seen_requests == []
+
+def test_keepalive_requests_every_upstream(seen_requests):
+    warmer = Warmer(["https://a.example.com", "https://b.example.com/v1"], keepalive_path="/health")
+    assert warmer.keepalive_once() == 2
+    assert seen_requests == [("HEAD", "/health"), ("HEAD", "/v1/health")]
+
+def test_start_warmup_disabled_by_default(monkeypatch):
+    for name in ("DNS_CACHE_TTL", "UPSTREAM_PREWARM_CONNECTIONS", "UPSTREAM_KEEPALIVE_PATH"):
+        monkeypatch.delenv(name, raising=False)
+    assert start_warmup(["https://api.example.com"]) is None
+
+def reset_balancing():
+    load_balancer.reset_load_balancer()
+    circuit_breaker.reset_circuit_breakers()
+    hedging.reset_hedger()
+
+@pytest.mark.parametrize("env, expected", [
+    ({}, ["https://a.example.com"]),
+    ({"LOAD_BALANCER_STRATEGY": "round_robin"}, ["https://a.example.com", "https://b.example.com"]),
+    ({"CIRCUIT_BREAKER_ENABLED": "true"}, ["https://a.example.com", "https://b.example.com"]),
+    ({"HEDGE_ENABLED": "true"}, ["https://a.example.com", "https://b.example.com"]),
+])
+def test_only_urls_calls_can_reach_are_warmed(monkeypatch, env, expected):
+    for name in ("LOAD_BALANCER_STRATEGY", "CIRCUIT_BREAKER_ENABLED", "HEDGE_ENABLED"):
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    reset_balancing()
+    try:
+        assert candidate_urls(["https://a.example.com", "https://b.example.com"]) == expected
+    finally:
+        reset_balancing()